@@ -1,16 +1,16 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, abort
 from werkzeug.security import check_password_hash, generate_password_hash
 import datetime
-import json
 from config import Config
 from models import db
-from utils.export import export_attendance_csv, export_attendance_pdf
 
 from dotenv import load_dotenv
 load_dotenv()
 
 # Import the backup function at the top of the file
 from utils.backup import backup_deleted_records
+from utils.roster_cache import roster_cache
+from utils.conditional import make_etag, is_not_modified, not_modified, with_validators
 
 # Create Flask app and configure
 app = Flask(__name__)
@@ -30,33 +30,52 @@ from models.course import Course
 from models.user import User
 from models.student import Student
 from models.attendance import Attendance
+from models.data_version import DataVersion
 
 # Import blueprints AFTER db initialization to avoid circular imports
 from routes import student_bp, admin_bp, graph_bp
 
+# Shared service layer used by both the page routes and the /api blueprints
+from services.checkin import check_in
+from services.dashboard import get_cached_dashboard_data
+from services.courses import list_courses, add_course, get_course_detail, update_course
+from services.courses import delete_course as delete_course_record
+from services.graphs import render_graph
+from services.export_jobs import export_attendance_now
+
 # Register blueprints
 app.register_blueprint(admin_bp, url_prefix='/api')
 app.register_blueprint(student_bp, url_prefix='/api')
 app.register_blueprint(graph_bp, url_prefix='/api')
 
+# Chart and export backends load on first use; optionally import them in the background
+from utils.prewarm import backend_prewarm
+backend_prewarm.init_app(app)
+
+# Load today's check-ins so duplicate scans and the live feed are answered from memory
+from utils.checkin_registry import daily_checkins
+from utils.live_feed import live_feed
+with app.app_context():
+    try:
+        daily_checkins.rebuild()
+        live_feed.prime()
+    except Exception as e:
+        # Tables may not exist yet (e.g. before init_db.py has run)
+        app.logger.warning(f"Could not preload today's check-ins: {str(e)}")
+
 @app.route('/', methods=['GET', 'POST'])
 def login():
     # Get current datetime to use in template
     now = datetime.datetime.now()
 
     if request.method == 'POST':
+        data = check_in(request.form.get('id'))
+
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            # Handle AJAX request - forward to API and return JSON directly
-            response = app.test_client().post('/api/', data=request.form)
-            return response.data
+            # Handle AJAX request - return the kiosk JSON directly
+            return jsonify(data)
         else:
             # Handle regular form submission
-            student_id = request.form.get('id')
-
-            # Make API call to student login endpoint through test client
-            response = app.test_client().post('/api/', data={'id': student_id})
-            data = json.loads(response.data)
-
             if not data.get('success'):
                 flash(data.get('message', 'Error logging in'), 'error')
 
@@ -71,30 +90,15 @@ def admin_dashboard():
         flash('Unauthorized access! Admins only.')
         return redirect(url_for('admin_login'))
 
-    # Handle regular page load - get data from API
+    # Handle regular page load - get data from the dashboard service
     try:
         filter_type = request.args.get('filter', 'weekly')
 
-        # Create a test client with preserved session context
-        test_client = app.test_client()
-        with test_client.session_transaction() as test_session:
-            # Copy session data to test client session
-            test_session['admin'] = session.get('admin')
-            test_session['admin_image'] = session.get('admin_image')
-
-        # Make the request with debug info
-        app.logger.debug(f"Requesting API data with filter: {filter_type}")
-        response = test_client.get(f'/api/admin?filter={filter_type}')
-
-        # Check response status and content before parsing
-        app.logger.debug(f"API response status: {response.status_code}")
-        app.logger.debug(f"API response type: {type(response.data)}")
-        app.logger.debug(f"API response length: {len(response.data) if response.data else 0}")
-
-        # Only try parsing if we have data
-        if response.data:
-            data = json.loads(response.data)
+        app.logger.debug(f"Loading dashboard data with filter: {filter_type}")
+        # The template only shows each recent student's course
+        data, _ = get_cached_dashboard_data(filter_type, request.args.get('startDate'), request.args.get('endDate'), include=('course',))
 
+        if data:
             # Ensure we have all courses in the chart data
             if 'weekly_course_visits' not in data or not data['weekly_course_visits']:
                 # Fallback: get all courses from database
@@ -107,13 +111,10 @@ def admin_dashboard():
 
             # Process logged_in_users to make it compatible with the template
             logged_in_users_pairs = []
-            if 'logged_in_users' in data:
-                for user_data in data['logged_in_users']:
-                    student_dict = user_data.get('student', {})
-                    student = Student.query.get(student_dict.get('id'))
-                    if student and 'login_time' in user_data and user_data['login_time']:
-                        login_time = datetime.datetime.fromisoformat(user_data['login_time'])
-                        logged_in_users_pairs.append((student, login_time))
+            for user_data in data.get('logged_in_users', []):
+                if user_data.get('login_time'):
+                    login_time = datetime.datetime.fromisoformat(user_data['login_time'])
+                    logged_in_users_pairs.append((user_data['student'], login_time))
 
             data['logged_in_users'] = logged_in_users_pairs
 
@@ -125,24 +126,12 @@ def admin_dashboard():
             # Add timestamp for client-side real-time display
             data['server_timestamp'] = datetime.datetime.now().isoformat()
 
-            # Ensure weekly_course_visits is properly formatted for JSON
-            if 'weekly_course_visits' in data:
-                # Log the data structure before rendering
-                app.logger.debug(f"weekly_course_visits type: {type(data['weekly_course_visits'])}")
-                app.logger.debug(f"weekly_course_visits courses: {list(data['weekly_course_visits'].keys())}")
-
-                # Make sure it's already a dict (not a string)
-                if isinstance(data['weekly_course_visits'], str):
-                    data['weekly_course_visits'] = json.loads(data['weekly_course_visits'])
-
             return render_template('admin_new/ae_dashboard.html', **data)
         else:
-            raise ValueError("Empty response from API")
+            raise ValueError("Empty dashboard data")
 
     except Exception as e:
         app.logger.error(f"Dashboard error: {str(e)}", exc_info=True)
-        if 'response' in locals() and hasattr(response, 'data'):
-            app.logger.error(f"Response content: {response.data}")
 
         # Get the admin user for the avatar display even in error case
         admin_username = session.get('admin')
@@ -247,6 +236,7 @@ def manage_students():
             )
             db.session.add(new_student)
             db.session.commit()
+            roster_cache.invalidate(new_student.id)
             flash('Student added successfully!')
 
         elif 'remove' in request.form:
@@ -255,6 +245,7 @@ def manage_students():
             if student:
                 db.session.delete(student)
                 db.session.commit()
+                roster_cache.invalidate(student_id)
                 flash(f'Student with ID {student_id} deleted successfully!')
             else:
                 flash('Student not found.')
@@ -263,7 +254,7 @@ def manage_students():
 
     # For GET requests, fetch the students directly
     try:
-        students = Student.query.all()
+        students = Student.query.options(*Student.eager(('course',))).all()
         return render_template('admin_new/ae_manage.html', students=students)
     except Exception as e:
         app.logger.error(f"Error loading students: {str(e)}")
@@ -308,6 +299,7 @@ def edit_student(student_id):
                 student.image = image_filename
 
             db.session.commit()
+            roster_cache.invalidate(student_id)
             flash('Student updated successfully!', 'success')
         except Exception as e:
             db.session.rollback()
@@ -366,6 +358,7 @@ def add_student():
 
             db.session.add(student)
             db.session.commit()
+            roster_cache.invalidate(student_id)
             flash('Student added successfully!', 'success')
             return redirect(url_for('manage_students'))
         except Exception as e:
@@ -390,6 +383,7 @@ def delete_student(student_id):
 
             db.session.delete(student)
             db.session.commit()
+            roster_cache.invalidate(student_id)
             return jsonify({'success': True, 'message': f'Student {student_id} deleted successfully'}), 200
         else:
             return jsonify({'success': False, 'message': 'Student not found'}), 404
@@ -413,44 +407,12 @@ def download_records():
     admin = User.query.filter_by(username=admin_username).first()
 
     if request.method == 'POST':
-        # Process the form submission
-        filter_type = request.form.get('filter', 'weekly')
-        course_id = request.form.get('course')
-        start_date_str = request.form.get('start_date')
-        end_date_str = request.form.get('end_date')
-        start_time_str = request.form.get('start_time')
-        end_time_str = request.form.get('end_time')
-
-        # Calculate date ranges similar to the blueprint function
-        today = datetime.datetime.now()
-
-        if filter_type == 'weekly':
-            start_date = today - datetime.timedelta(weeks=1)
-            end_date = today
-        elif filter_type == 'monthly':
-            start_date = today - datetime.timedelta(weeks=4)
-            end_date = today
-        elif filter_type == 'yearly':
-            start_date = today - datetime.timedelta(weeks=52)
-            end_date = today
-        else:
-            try:
-                start_date = datetime.datetime.strptime(start_date_str, '%Y-%m-%d') if start_date_str else today - datetime.timedelta(weeks=1)
-                end_date = datetime.datetime.strptime(end_date_str, '%Y-%m-%d') if end_date_str else today
-
-                if start_time_str:
-                    start_date = start_date.replace(hour=int(start_time_str.split(':')[0]), minute=int(start_time_str.split(':')[1]))
-                if end_time_str:
-                    end_date = end_date.replace(hour=int(end_time_str.split(':')[0]), minute=int(end_time_str.split(':')[1]))
-            except ValueError as e:
-                flash(f'Error parsing dates: {str(e)}', 'danger')
-                return redirect(url_for('download_records'))
-
-        # Handle export actions
-        if 'export_csv' in request.form:
-            return export_attendance_csv(start_date, end_date, course_id)
-        elif 'export_pdf' in request.form:
-            return export_attendance_pdf(start_date, end_date, course_id)
+        # Same formats and validation as the export jobs, built in this request
+        try:
+            return export_attendance_now(request.form)
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('download_records'))
 
     # For GET requests, just render the template with courses
     courses = Course.query.all()
@@ -463,6 +425,11 @@ def get_locations():
         province = request.args.get('province', '')
         municipality = request.args.get('municipality', '')
 
+        # Locations only change through the ORM, which bumps their counter
+        etag = make_etag('locations', DataVersion.current('locations'), province, municipality)
+        if is_not_modified(etag):
+            return not_modified(etag)
+
         filters = {}
         if province:
             filters['province'] = province
@@ -480,7 +447,7 @@ def get_locations():
             }
             for loc in locations
         ]
-        return jsonify(location_data)
+        return with_validators(jsonify(location_data), etag)
     except Exception as e:
         app.logger.error(f"Error getting locations: {str(e)}")
         return jsonify({'error': 'Failed to fetch locations'}), 500
@@ -492,19 +459,7 @@ def download_graph():
         return redirect(url_for('admin_login'))
 
     try:
-        weekly_course_visits = request.args.get('weekly_course_visits')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-
-        # Add these parameters to the API call if provided
-        params = {'weekly_course_visits': weekly_course_visits}
-        if start_date:
-            params['start_date'] = start_date
-        if end_date:
-            params['end_date'] = end_date
-
-        response = app.test_client().get('/api/admin/download_graph', query_string=params)
-        return response
+        return render_graph(request.args)
     except Exception as e:
         app.logger.error(f"Download graph error: {str(e)}")
         flash(f"Error downloading graph: {str(e)}", 'error')
@@ -684,18 +639,16 @@ def manage_courses():
         flash('Unauthorized access!')
         return redirect(url_for('admin_login'))
 
-    # Forward to API endpoint
-    test_client = app.test_client()
-    with test_client.session_transaction() as test_session:
-        test_session['admin'] = session.get('admin')
-        test_session['admin_image'] = session.get('admin_image')
-
     if request.method == 'POST':
-        response = test_client.post('/api/admin/manage_courses', data=request.form, content_type='application/x-www-form-urlencoded')
-        return response.data
-    else:
-        response = test_client.get('/api/admin/manage_courses')
-        return response.data
+        payload, status = add_course(request.form.get('course_name'))
+        return jsonify(payload), status
+
+    try:
+        return render_template('admin_new/ae_manage_courses.html', courses=list_courses())
+    except Exception as e:
+        app.logger.error(f"Error loading courses: {str(e)}")
+        flash(f"Error loading courses: {str(e)}", 'danger')
+        return render_template('admin_new/ae_manage_courses.html', courses=[])
 
 @app.route('/admin/edit_course/<int:course_id>', methods=['GET', 'POST'])
 def edit_course(course_id):
@@ -703,31 +656,32 @@ def edit_course(course_id):
         flash('Unauthorized access!')
         return redirect(url_for('admin_login'))
 
-    # Forward to API endpoint
-    test_client = app.test_client()
-    with test_client.session_transaction() as test_session:
-        test_session['admin'] = session.get('admin')
-        test_session['admin_image'] = session.get('admin_image')
-
     if request.method == 'POST':
-        response = test_client.post(f'/api/admin/edit_course/{course_id}', data=request.form, content_type='application/x-www-form-urlencoded')
-        return response.data
-    else:
-        response = test_client.get(f'/api/admin/edit_course/{course_id}')
-        return response.data
+        payload, status = update_course(course_id, request.form.get('course_name'))
+        return jsonify(payload), status
+
+    try:
+        detail = get_course_detail(course_id, Student.parse_include(request.args.get('include'), default=('location',)))
+    except Exception as e:
+        app.logger.error(f"Error loading course data: {str(e)}")
+        flash(f"Error loading course data: {str(e)}", 'danger')
+        return redirect(url_for('manage_courses'))
+
+    if detail is None:
+        abort(404)
+
+    course, students_data = detail
+    return render_template('admin_new/ae_edit_course.html',
+                         course=course,
+                         enrolled_students=students_data)
 
 @app.route('/admin/delete_course/<int:course_id>', methods=['DELETE'])
 def delete_course(course_id):
     if 'admin' not in session:
         return jsonify({'success': False, 'message': 'Unauthorized access'}), 403
 
-    # Forward to API endpoint
-    test_client = app.test_client()
-    with test_client.session_transaction() as test_session:
-        test_session['admin'] = session.get('admin')
-
-    response = test_client.delete(f'/api/admin/delete_course/{course_id}')
-    return response.data
+    payload, status = delete_course_record(course_id)
+    return jsonify(payload), status
 
 if __name__ == '__main__':
     app.run(host=app.config['HOST'], port=app.config['PORT'], debug=app.config['DEBUG'], secret_key=app.config['SECRET_KEY'])
@@ -0,0 +1,98 @@
+"""
+Import-time budget check.
+
+Imports ``app`` in fresh interpreters (as every gunicorn or uwsgi worker
+does on boot) against a throwaway SQLite database and fails if the fastest
+run exceeds the budget, or if a chart or export backend that should load
+on first use was imported. Prints the slowest imports of ``app``.
+
+    python check_import_time.py --budget 1.0 --runs 3
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Top-level packages that must not be imported with the app
+LAZY_BACKENDS = ('matplotlib', 'reportlab', 'weasyprint', 'pypdf', 'pyarrow')
+
+PROBE = (
+    "import json, sys, time\n"
+    "started = time.perf_counter()\n"
+    "import app\n"
+    "seconds = time.perf_counter() - started\n"
+    "loaded = sorted({name.split('.')[0] for name in sys.modules} & set(json.loads(sys.argv[1])))\n"
+    "print(json.dumps({'seconds': seconds, 'backends': loaded}))\n"
+)
+
+def measure_import(database_url):
+    """
+    Import ``app`` once in a new interpreter.
+
+    Returns:
+        dict: ``seconds``, the lazy ``backends`` that were loaded, and
+        ``imports``, the slowest direct imports of ``app`` as
+        ``(module, seconds)`` pairs
+    """
+    env = dict(os.environ, DATABASE_URL=database_url, PREWARM_BACKENDS='False')
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE, json.dumps(LAZY_BACKENDS)],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing app failed:\n{process.stderr[-2000:]}")
+
+    # The probe prints its result last; app start-up may log before it
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+
+    # -X importtime lines: "import time: self [us] | cumulative | <indented module>"
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, module = line.split('|', 2)
+        if cumulative.strip().isdigit() and module.startswith('   ') and not module.startswith('    '):
+            imports.append((module.strip(), int(cumulative) / 1e6))
+    result['imports'] = sorted(imports, key=lambda item: item[1], reverse=True)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail if importing the app takes longer than a budget.')
+    parser.add_argument('--budget', type=float, default=1.0, help='Maximum seconds for the fastest import (default 1.0)')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters to time; the fastest counts')
+    parser.add_argument('--top', type=int, default=8, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='import-time-')
+    try:
+        database_url = 'sqlite:///' + os.path.join(work_dir, 'import_time.db')
+        runs = [measure_import(database_url) for _ in range(max(args.runs, 1))]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    best = min(runs, key=lambda run: run['seconds'])
+    print(f"app import: {best['seconds']:.3f}s fastest of {len(runs)} (budget {args.budget:.3f}s)")
+    print('Slowest imports (cumulative, includes -X importtime overhead):')
+    for module, seconds in best['imports'][:args.top]:
+        print(f"  {seconds:>7.3f}s  {module}")
+
+    failures = []
+    if best['seconds'] > args.budget:
+        failures.append(f"import took {best['seconds']:.3f}s, over the {args.budget:.3f}s budget")
+    backends = sorted({backend for run in runs for backend in run['backends']})
+    if backends:
+        failures.append(f"backends imported at start-up: {', '.join(backends)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print('OK')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
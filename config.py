@@ -15,6 +15,52 @@ class Config:
     PORT = int(os.environ.get('PORT', 1000))
     HOST = os.environ.get('HOST', '0.0.0.0')
 
+    # Kiosk check-in caches
+    ROSTER_CACHE_TTL = int(os.environ.get('ROSTER_CACHE_TTL', 300))
+    # Group commit of check-ins: how long the batch leader waits for more rows
+    CHECKIN_FLUSH_INTERVAL_MS = float(os.environ.get('CHECKIN_FLUSH_INTERVAL_MS', 5))
+    CHECKIN_BATCH_SIZE = int(os.environ.get('CHECKIN_BATCH_SIZE', 64))
+    # Longest a kiosk request waits for its batch to commit before reporting an error
+    CHECKIN_WAIT_TIMEOUT_SECONDS = float(os.environ.get('CHECKIN_WAIT_TIMEOUT_SECONDS', 30))
+    # Offline kiosk replay (/api/checkins/bulk); set a token to require X-Kiosk-Token
+    # (kiosks store it when the page is opened once as /#kiosk-token=<token>)
+    KIOSK_SYNC_TOKEN = os.environ.get('KIOSK_SYNC_TOKEN')
+    OFFLINE_CHECKIN_MAX_RECORDS = int(os.environ.get('OFFLINE_CHECKIN_MAX_RECORDS', 10000))
+    OFFLINE_CHECKIN_MAX_SKEW_MINUTES = int(os.environ.get('OFFLINE_CHECKIN_MAX_SKEW_MINUTES', 5))
+    # Incremental attendance feed (/api/attendance/changes); set a token to allow X-Sync-Token
+    ATTENDANCE_SYNC_TOKEN = os.environ.get('ATTENDANCE_SYNC_TOKEN')
+    ATTENDANCE_CHANGES_PAGE_SIZE = int(os.environ.get('ATTENDANCE_CHANGES_PAGE_SIZE', 500))
+    ATTENDANCE_CHANGES_MAX_PAGE = int(os.environ.get('ATTENDANCE_CHANGES_MAX_PAGE', 5000))
+    # Threads per worker process; gunicorn.conf.py, waitress_server.py and run.py read it too
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 8))
+    # Live check-in feed (/api/admin/live_checkins); each subscriber holds a server thread,
+    # so at most WEB_THREADS - 1 are admitted per process and streams close after a while
+    LIVE_FEED_BUFFER_SIZE = int(os.environ.get('LIVE_FEED_BUFFER_SIZE', 10))
+    LIVE_FEED_MAX_SUBSCRIBERS = int(os.environ.get('LIVE_FEED_MAX_SUBSCRIBERS', 4))
+    LIVE_FEED_QUEUE_SIZE = int(os.environ.get('LIVE_FEED_QUEUE_SIZE', 100))
+    LIVE_FEED_KEEPALIVE_SECONDS = int(os.environ.get('LIVE_FEED_KEEPALIVE_SECONDS', 15))
+    LIVE_FEED_MAX_STREAM_SECONDS = int(os.environ.get('LIVE_FEED_MAX_STREAM_SECONDS', 300))
+    # Multi-process fallback: poll attendance instead of the in-process publish hook
+    LIVE_FEED_POLL_DATABASE = os.environ.get('LIVE_FEED_POLL_DATABASE', 'False').lower() == 'true'
+    LIVE_FEED_POLL_SECONDS = float(os.environ.get('LIVE_FEED_POLL_SECONDS', 1))
+    # Dashboard cache: how long a stale payload may be served while it is recomputed
+    DASHBOARD_CACHE_MAX_STALE_SECONDS = int(os.environ.get('DASHBOARD_CACHE_MAX_STALE_SECONDS', 60))
+    # Payloads kept per worker; custom date ranges beyond this evict the least recently used
+    DASHBOARD_CACHE_MAX_ENTRIES = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRIES', 64))
+    # First month (1-12) of the academic year used by the monthly charts
+    ACADEMIC_YEAR_START_MONTH = int(os.environ.get('ACADEMIC_YEAR_START_MONTH', 8))
+    # Background exports: finished files are shared by all workers through EXPORT_DIR
+    EXPORT_DIR = os.environ.get('EXPORT_DIR', os.path.join(BASE_DIR, 'exports'))
+    EXPORT_JOB_WORKERS = int(os.environ.get('EXPORT_JOB_WORKERS', 2))
+    EXPORT_JOB_TIMEOUT_SECONDS = int(os.environ.get('EXPORT_JOB_TIMEOUT_SECONDS', 900))
+    EXPORT_ARTIFACT_MAX_AGE_HOURS = int(os.environ.get('EXPORT_ARTIFACT_MAX_AGE_HOURS', 24))
+    # Long PDF reports are rendered in chunks by this many processes (1 renders in the worker)
+    PDF_RENDER_PROCESSES = int(os.environ.get('PDF_RENDER_PROCESSES', min(4, os.cpu_count() or 1)))
+    # Rendered PDF and columnar downloads larger than this are spooled to disk before streaming
+    EXPORT_SPOOL_MAX_BYTES = int(os.environ.get('EXPORT_SPOOL_MAX_BYTES', 8 * 1024 * 1024))
+    # Import chart/PDF backends in the background after a worker's first request
+    PREWARM_BACKENDS = os.environ.get('PREWARM_BACKENDS', 'True').lower() == 'true'
+
     # Email configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
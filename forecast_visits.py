@@ -0,0 +1,39 @@
+import argparse
+import datetime
+from flask import Flask
+from models import db
+from services.forecast import update_forecasts, HORIZON_DAYS
+from config import Config
+
+def forecast_visits(app=None, start_day=None, days=HORIZON_DAYS):
+    """
+    Refit the visit forecasts per course and store the next days.
+
+    Meant to run nightly after the library closes (for example from cron),
+    so the forecast starting tomorrow includes today's check-ins.
+    """
+    # If no app was provided, create a temporary one for the job
+    if app is None:
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        rows = update_forecasts(start_day, days)
+        db.session.commit()
+
+    print(f"Stored {rows} visit forecasts starting {start_day or 'tomorrow'}")
+    return rows
+
+def _parse_day(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+# This allows the script to be run directly
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fit visit forecasts per course from the attendance history.')
+    parser.add_argument('--start', type=_parse_day, help='First day to forecast (YYYY-MM-DD, default tomorrow)')
+    parser.add_argument('--days', type=int, default=HORIZON_DAYS, help=f'Number of days to forecast (default {HORIZON_DAYS})')
+    args = parser.parse_args()
+
+    forecast_visits(start_day=args.start, days=args.days)
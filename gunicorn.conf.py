@@ -0,0 +1,13 @@
+"""
+gunicorn settings, used by the Procfile and render.yaml.
+
+Threaded workers: every open live check-in stream holds a thread, and the
+group-commit writer batches check-ins between the threads of a worker. A
+single sync worker would be blocked by the first dashboard left open.
+"""
+import os
+
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+# Keep in step with the app, which admits at most WEB_THREADS - 1 live feed subscribers
+threads = int(os.environ.get('WEB_THREADS', 8))
@@ -0,0 +1,336 @@
+"""
+Kiosk load test.
+
+Seeds a throwaway SQLite database, starts the app under each server mode
+(waitress, gunicorn, uwsgi) and has N simulated kiosks post student IDs to
+the check-in endpoint. Reports throughput, latency percentiles and database
+lock errors per server mode.
+
+    python load_test.py --servers waitress,gunicorn,uwsgi --kiosks 16 --duration 20
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fragments of the kiosk messages used to classify responses
+DUPLICATE_MESSAGE = 'already logged in'
+UNKNOWN_MESSAGE = 'No student ID number found'
+LOCK_MESSAGES = ('database is locked', 'database is busy', 'deadlock detected', 'could not obtain lock')
+
+def seed_database(db_path, students):
+    """Create a fresh SQLite database with ``students`` students and no attendance."""
+    from flask import Flask
+    from models import db
+    from models.course import Course
+    from models.location import Location
+    from models.student import Student
+    from init_db import init_database
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    init_database(app)
+
+    with app.app_context():
+        course_ids = [course.id for course in Course.query.all()]
+        locations = [
+            {'barangay': f'Barangay {i}', 'municipality': f'Municipality {i % 7}', 'province': 'Misamis Occidental'}
+            for i in range(50)
+        ]
+        db.session.execute(Location.__table__.insert(), locations)
+        location_ids = [location.id for location in Location.query.all()]
+
+        rows = [{
+            'id': f'{2025000000 + i}',
+            'first_name': f'Student{i}',
+            'middle_name': None,
+            'last_name': 'Load',
+            'age': 18 + i % 6,
+            'image': 'uploads/default_image.jpg',
+            'course_id': course_ids[i % len(course_ids)],
+            'location_id': location_ids[i % len(location_ids)]
+        } for i in range(students)]
+        db.session.execute(Student.__table__.insert(), rows)
+        db.session.commit()
+
+    return [row['id'] for row in rows]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def server_command(mode, port, args):
+    """Return the command line that serves ``wsgi:app`` on ``port``, or None if unavailable."""
+    address = f'127.0.0.1:{port}'
+
+    if mode == 'waitress':
+        # Same entry point as production, bound through HOST/PORT
+        return [sys.executable, 'waitress_server.py']
+    if mode == 'gunicorn':
+        if shutil.which('gunicorn') is None:
+            return None
+        return [
+            'gunicorn', '--bind', address,
+            '--workers', str(args.workers),
+            '--threads', str(args.threads),
+            '--worker-class', 'gthread',
+            'wsgi:app'
+        ]
+    if mode == 'uwsgi':
+        if shutil.which('uwsgi') is None:
+            return None
+        # uwsgi.ini binds a uwsgi-protocol socket on $(PORT); add a plain HTTP one for the kiosks
+        return ['uwsgi', '--ini', 'uwsgi.ini', '--http-socket', address, '--disable-logging']
+    raise ValueError(f'Unknown server mode: {mode}')
+
+def wait_until_ready(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            conn.close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+class Workload:
+    """Hands out student IDs to the kiosks according to the scan mix."""
+
+    def __init__(self, student_ids, mix, seed):
+        self._fresh = list(student_ids)
+        self._checked_in = []
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._unknown = 0
+        self._weights = mix
+
+    def next_scan(self):
+        with self._lock:
+            kind = self._random.choices(('valid', 'duplicate', 'unknown'), weights=self._weights)[0]
+            if kind == 'duplicate' and not self._checked_in:
+                kind = 'valid'
+            if kind == 'valid' and not self._fresh:
+                kind = 'duplicate' if self._checked_in else 'unknown'
+
+            if kind == 'valid':
+                student_id = self._fresh.pop(self._random.randrange(len(self._fresh)))
+                self._checked_in.append(student_id)
+            elif kind == 'duplicate':
+                student_id = self._random.choice(self._checked_in)
+            else:
+                self._unknown += 1
+                student_id = f'UNKNOWN-{self._unknown}'
+            return kind, student_id
+
+def classify(status, body):
+    if status >= 500:
+        return 'server_error'
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return 'bad_response'
+
+    if data.get('success'):
+        return 'checked_in'
+    message = data.get('message') or ''
+    if any(fragment in message for fragment in LOCK_MESSAGES):
+        return 'lock_error'
+    if DUPLICATE_MESSAGE in message:
+        return 'duplicate'
+    if UNKNOWN_MESSAGE in message:
+        return 'unknown'
+    return 'error'
+
+def kiosk(port, workload, deadline, samples, lock):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = {
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'X-Requested-With': 'XMLHttpRequest'
+    }
+    local = []
+
+    while time.monotonic() < deadline:
+        expected, student_id = workload.next_scan()
+        body = urllib.parse.urlencode({'id': student_id})
+        started = time.perf_counter()
+        try:
+            conn.request('POST', '/', body=body, headers=headers)
+            response = conn.getresponse()
+            outcome = classify(response.status, response.read())
+        except (OSError, http.client.HTTPException):
+            outcome = 'connection_error'
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local.append((expected, outcome, time.perf_counter() - started))
+
+    conn.close()
+    with lock:
+        samples.extend(local)
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+# Outcome each scan kind should produce
+EXPECTED_OUTCOME = {'valid': 'checked_in', 'duplicate': 'duplicate', 'unknown': 'unknown'}
+
+def run_mode(mode, args, work_dir):
+    db_path = os.path.join(work_dir, f'{mode}.db')
+    student_ids = seed_database(db_path, args.students)
+
+    port = free_port()
+    command = server_command(mode, port, args)
+    if command is None:
+        return {'server': mode, 'skipped': f'{mode} is not installed'}
+
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f'sqlite:///{db_path}',
+        'HOST': '127.0.0.1',
+        # uwsgi reads PORT for its uwsgi-protocol socket; everyone else serves HTTP on it
+        'PORT': str(free_port() if mode == 'uwsgi' else port),
+        'DEBUG': 'False'
+    })
+    log_path = os.path.join(work_dir, f'{mode}.log')
+    with open(log_path, 'wb') as log:
+        process = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    try:
+        if not wait_until_ready(port, process):
+            return {'server': mode, 'skipped': f'server did not start, see {log_path}'}
+
+        workload = Workload(student_ids, (args.valid, args.duplicate, args.unknown), args.seed)
+        samples = []
+        lock = threading.Lock()
+        started = time.monotonic()
+        deadline = started + args.duration
+        threads = [
+            threading.Thread(target=kiosk, args=(port, workload, deadline, samples, lock))
+            for _ in range(args.kiosks)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    return summarize(mode, samples, elapsed, db_path)
+
+def summarize(mode, samples, elapsed, db_path):
+    import sqlite3
+
+    latencies = sorted(sample[2] * 1000 for sample in samples)
+    outcomes = {}
+    mismatches = 0
+    for expected, outcome, _ in samples:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        if outcome == EXPECTED_OUTCOME[expected] or outcome in ('lock_error', 'server_error', 'connection_error'):
+            continue
+        mismatches += 1
+
+    conn = sqlite3.connect(db_path)
+    rows, students = conn.execute(
+        'SELECT COUNT(*), COUNT(DISTINCT student_id) FROM attendance'
+    ).fetchone()
+    conn.close()
+
+    return {
+        'server': mode,
+        'requests': len(samples),
+        'seconds': round(elapsed, 2),
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        'lock_errors': outcomes.get('lock_error', 0),
+        'outcomes': outcomes,
+        # Scans answered differently from what the mix asked for (e.g. a duplicate accepted)
+        'mismatches': mismatches,
+        'attendance_rows': rows,
+        'duplicate_rows': rows - students
+    }
+
+def print_report(results):
+    header = f"{'server':<10}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'locks':>8}{'errors':>8}{'dup rows':>10}"
+    print()
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        if 'skipped' in result:
+            print(f"{result['server']:<10}skipped: {result['skipped']}")
+            continue
+        outcomes = result['outcomes']
+        errors = sum(count for outcome, count in outcomes.items()
+                     if outcome not in ('checked_in', 'duplicate', 'unknown', 'lock_error'))
+        print(
+            f"{result['server']:<10}{result['requests']:>10}{result['throughput_rps']:>10}"
+            f"{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+            f"{result['lock_errors']:>8}{errors:>8}{result['duplicate_rows']:>10}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the kiosk check-in endpoint.')
+    parser.add_argument('--servers', default='waitress,gunicorn,uwsgi',
+                        help='Comma-separated server modes to test')
+    parser.add_argument('--kiosks', type=int, default=16, help='Concurrent simulated kiosks')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to run each server mode')
+    parser.add_argument('--students', type=int, default=5000, help='Students to seed')
+    parser.add_argument('--valid', type=float, default=70, help='Weight of first scans of the day')
+    parser.add_argument('--duplicate', type=float, default=20, help='Weight of repeat scans')
+    parser.add_argument('--unknown', type=float, default=10, help='Weight of unknown IDs')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--seed', type=int, default=2025, help='Random seed for the scan mix')
+    parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file')
+    parser.add_argument('--keep', action='store_true', help='Keep the seeded databases and server logs')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='kiosk-load-')
+    results = []
+    try:
+        for mode in [mode.strip() for mode in args.servers.split(',') if mode.strip()]:
+            print(f"[{datetime.datetime.now():%H:%M:%S}] {mode}: {args.kiosks} kiosks for {args.duration:g}s")
+            results.append(run_mode(mode, args, work_dir))
+    finally:
+        if args.keep:
+            print(f"Databases and logs kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+if __name__ == '__main__':
+    main()
@@ -8,4 +8,8 @@ from .location import Location
 from .user import User
 from .course import Course
 from .student import Student
-from .attendance import Attendance
\ No newline at end of file
+from .attendance import Attendance
+from .attendance_rollup import AttendanceDailyRollup
+from .place_rollup import AttendancePlaceRollup
+from .data_version import DataVersion
+from .visit_forecast import VisitForecast
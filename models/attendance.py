@@ -1,11 +1,60 @@
 from . import db
 import datetime
 
+def dialect_insert(dialect_name):
+    """
+    Return the dialect's ``insert`` construct, which supports ``ON CONFLICT``.
+
+    Raises:
+        NotImplementedError: On databases other than SQLite and PostgreSQL,
+            which lack ``ON CONFLICT`` with ``RETURNING`` (e.g. MySQL)
+    """
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect_name}")
+    return insert
+
+def time_columns(check_in_time):
+    """
+    The stored date parts of a check-in time.
+
+    Returns:
+        dict: ``attendance_day`` (date), ``dow`` (0=Sunday, as in the charts)
+        and ``hour`` (0-23)
+    """
+    return {
+        'attendance_day': check_in_time.date(),
+        'dow': (check_in_time.weekday() + 1) % 7,
+        'hour': check_in_time.hour
+    }
+
+def _time_column_default(name):
+    def default(context):
+        check_in_time = context.get_current_parameters().get('check_in_time')
+        return time_columns(check_in_time or datetime.datetime.now())[name]
+    return default
+
 class Attendance(db.Model):
     __tablename__ = 'attendance'
+    __table_args__ = (
+        # At most one check-in per student per day
+        db.Index('uq_attendance_student_day', 'student_id', 'attendance_day', unique=True),
+        # Date range predicates, with weekday and hour available from the index alone
+        db.Index('ix_attendance_day_dow_hour', 'attendance_day', 'dow', 'hour'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.String(20), db.ForeignKey('students.id'), nullable=False)
     check_in_time = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now)
+    # Stored parts of check_in_time, so aggregations filter and group on indexed columns
+    # (see utils/time_buckets.py); populated on write
+    attendance_day = db.Column(db.Date, nullable=False, default=_time_column_default('attendance_day'))
+    dow = db.Column(db.SmallInteger, nullable=False, default=_time_column_default('dow'))
+    hour = db.Column(db.SmallInteger, nullable=False, default=_time_column_default('hour'))
+    check_in_date = db.synonym('attendance_day')
 
     # Changed from backref to back_populates to match Student model
     student = db.relationship('Student', back_populates='attendance_records')
@@ -17,35 +66,54 @@ class Attendance(db.Model):
             'check_in_time': self.check_in_time
         }
 
+    @classmethod
+    def insert_once_per_day(cls, dialect_name):
+        """
+        Build an ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` statement for check-ins.
+
+        Rows that would give a student a second check-in on the same day are
+        skipped by the database; the returned rows are the ones inserted.
+
+        Args:
+            dialect_name (str): ``db.engine.dialect.name``
+
+        Returns:
+            Insert statement returning ``student_id`` and ``attendance_day``
+        """
+        return dialect_insert(dialect_name)(cls.__table__).on_conflict_do_nothing(
+            index_elements=['student_id', 'attendance_day']
+        ).returning(cls.student_id, cls.attendance_day)
+
     @classmethod
     def has_logged_in_today(cls, student_id):
         """Check if student has already logged in today"""
-        today_start = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + datetime.timedelta(days=1)
+        from utils.checkin_registry import daily_checkins
 
-        return cls.query.filter(
-            cls.student_id == student_id,
-            cls.check_in_time >= today_start,
-            cls.check_in_time < today_end
-        ).first() is not None
+        return daily_checkins.first_login(student_id) is not None
 
     @classmethod
     def get_today_login(cls, student_id):
-        """Get today's login record for a student"""
-        today_start = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + datetime.timedelta(days=1)
-
+        """Get today's login record for a student (served by the per-day unique index)"""
         return cls.query.filter(
             cls.student_id == student_id,
-            cls.check_in_time >= today_start,
-            cls.check_in_time < today_end
+            cls.attendance_day == datetime.date.today()
         ).first()
 
     @classmethod
-    def get_unique_daily_logins(cls, start_date, end_date, course_id=None):
-        """Get unique daily logins within date range"""
+    def unique_daily_logins_query(cls, start_date, end_date, course_id=None):
+        """
+        Query of unique daily logins (first login per student and day) within whole days.
+
+        Shared by every export; see ``utils.daily_logins`` for reading it as columns.
+
+        Returns:
+            Query of ``(student_id, first_name, middle_name, last_name,
+            course_name, attendance_date, first_login_time)`` rows ordered by
+            date (newest first), last name and first name
+        """
         from models.student import Student
         from models.course import Course
+        from utils.time_buckets import day_range
 
         query = db.session.query(
             cls.student_id,
@@ -53,21 +121,116 @@ class Attendance(db.Model):
             Student.middle_name,
             Student.last_name,
             Course.course_name,
-            db.func.date(cls.check_in_time).label('attendance_date'),
+            cls.check_in_date.label('attendance_date'),
             db.func.min(cls.check_in_time).label('first_login_time')
         ).join(
             Student, Student.id == cls.student_id
         ).join(
             Course, Course.id == Student.course_id
         ).filter(
-            cls.check_in_time >= start_date,
-            cls.check_in_time <= end_date
+            *day_range(start_date, end_date)
         )
 
-        if course_id:
+        # Form values arrive as strings; a blank one means every course
+        if course_id and str(course_id).strip():
             query = query.filter(Student.course_id == course_id)
 
         return query.group_by(
             cls.student_id,
-            db.func.date(cls.check_in_time)
-        ).all()
+            cls.check_in_date
+        ).order_by(
+            db.desc('attendance_date'),
+            Student.last_name,
+            Student.first_name
+        )
+
+    @classmethod
+    def checkins_query(cls, start_date, end_date, course_id=None):
+        """
+        Query of raw check-ins within whole days, with the student's course.
+
+        Check-ins of students that were deleted are kept, without a course.
+
+        Returns:
+            Query of ``(id, student_id, course_id, course_name, check_in_time,
+            attendance_day, dow, hour)`` rows ordered by date (newest first)
+            and check-in time
+        """
+        from models.student import Student
+        from models.course import Course
+        from utils.time_buckets import day_range
+
+        query = db.session.query(
+            cls.id,
+            cls.student_id,
+            Student.course_id,
+            Course.course_name,
+            cls.check_in_time,
+            cls.attendance_day,
+            cls.dow,
+            cls.hour
+        ).outerjoin(
+            Student, Student.id == cls.student_id
+        ).outerjoin(
+            Course, Course.id == Student.course_id
+        ).filter(
+            *day_range(start_date, end_date)
+        )
+
+        if course_id and str(course_id).strip():
+            query = query.filter(Student.course_id == course_id)
+
+        return query.order_by(
+            cls.attendance_day.desc(),
+            cls.check_in_time
+        )
+
+    @classmethod
+    def changes_after(cls, after_id, limit, dialect_name):
+        """
+        Check-ins inserted after ``after_id``, oldest first (keyset on the primary key).
+
+        Ids are drawn before a transaction commits, so on PostgreSQL a row can
+        become visible while a lower id is still uncommitted. ``settled`` is
+        false for rows inserted by a transaction no older than the oldest one
+        still running; readers must stop before the first unsettled row, as
+        lower ids may still appear. SQLite runs one write transaction at a
+        time, so there every row is settled.
+
+        Args:
+            after_id (int): Last id the caller has seen (0 for the start)
+            limit (int): Maximum number of rows
+            dialect_name (str): ``db.engine.dialect.name``
+
+        Returns:
+            Select of ``(id, student_id, check_in_time, attendance_day, settled)`` rows
+        """
+        if dialect_name == 'postgresql':
+            # age() of the row's inserting xid against the oldest running one,
+            # reduced to a 32-bit xid (PostgreSQL 13+); frozen rows count as oldest
+            settled = db.literal_column(
+                "age(attendance.xmin) > "
+                "age((pg_snapshot_xmin(pg_current_snapshot())::text::numeric % 4294967296)::text::xid)",
+                db.Boolean
+            )
+        else:
+            settled = db.true()
+
+        return db.select(
+            cls.id,
+            cls.student_id,
+            cls.check_in_time,
+            cls.attendance_day,
+            settled.label('settled')
+        ).where(
+            cls.id > after_id
+        ).order_by(
+            cls.id
+        ).limit(limit)
+
+    @classmethod
+    def get_unique_daily_logins(cls, start_date, end_date, course_id=None):
+        """Get unique daily logins within date range (whole days) as ``DailyLogins`` columns"""
+        from utils.daily_logins import fetch_daily_logins
+
+        return fetch_daily_logins(start_date, end_date, course_id)
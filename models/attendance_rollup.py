@@ -0,0 +1,204 @@
+from . import db
+from .attendance import Attendance, dialect_insert
+from .data_version import DataVersion
+
+# Bucket keys for students without a course or location
+NO_COURSE = 0
+NO_MUNICIPALITY = ''
+
+class AttendanceDailyRollup(db.Model):
+    """
+    Check-ins per day, course and municipality.
+
+    Maintained in the same transaction as every attendance insert, so the
+    dashboard can aggregate one row per bucket and day instead of scanning
+    raw check-ins. Visits are attributed to the student's course and
+    municipality at check-in time. ``rebuild`` recomputes any date range
+    from ``attendance`` (see ``rebuild_rollup.py``). A student checks in at
+    most once a day, so a bucket's ``visits`` is also its number of distinct
+    visitors that day.
+    """
+    __tablename__ = 'attendance_daily_rollup'
+    __table_args__ = (
+        db.Index('uq_attendance_rollup_bucket', 'day', 'course_id', 'municipality', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    # Not a foreign key: history is kept when a course is deleted; 0 means no course
+    course_id = db.Column(db.Integer, nullable=False, default=NO_COURSE)
+    municipality = db.Column(db.String(100), nullable=False, default=NO_MUNICIPALITY)
+    visits = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'course_id': self.course_id,
+            'municipality': self.municipality,
+            'visits': self.visits
+        }
+
+    @classmethod
+    def record_checkins(cls, executor, checkins):
+        """
+        Add newly inserted check-ins to their buckets.
+
+        Must run in the transaction that inserted the attendance rows.
+
+        Args:
+            executor: The ``Connection`` or ``Session`` that inserted them
+            checkins (list): ``(student_id, attendance_day)`` pairs, at most
+                one per student and day
+        """
+        from models.student import Student
+        from models.location import Location
+
+        if not checkins:
+            return
+
+        student_ids = list({student_id for student_id, _ in checkins})
+        buckets_by_student = {}
+        for chunk_start in range(0, len(student_ids), 500):
+            rows = executor.execute(
+                db.select(Student.id, Student.course_id, Location.municipality)
+                .outerjoin(Location, Location.id == Student.location_id)
+                .where(Student.id.in_(student_ids[chunk_start:chunk_start + 500]))
+            )
+            for student_id, course_id, municipality in rows:
+                buckets_by_student[student_id] = (course_id or NO_COURSE, municipality or NO_MUNICIPALITY)
+
+        counts = {}
+        for student_id, day in checkins:
+            course_id, municipality = buckets_by_student.get(student_id, (NO_COURSE, NO_MUNICIPALITY))
+            key = (day, course_id, municipality)
+            counts[key] = counts.get(key, 0) + 1
+
+        insert = dialect_insert(db.engine.dialect.name)(cls.__table__)
+        statement = insert.on_conflict_do_update(
+            index_elements=['day', 'course_id', 'municipality'],
+            set_={'visits': cls.__table__.c.visits + insert.excluded.visits}
+        )
+        executor.execute(statement, [{
+            'day': day,
+            'course_id': course_id,
+            'municipality': municipality,
+            'visits': count
+        } for (day, course_id, municipality), count in counts.items()])
+
+    @classmethod
+    def rebuild(cls, start_day=None, end_day=None):
+        """
+        Recompute the rollup from ``attendance`` for a date range (inclusive).
+
+        Leaving both dates out rebuilds the whole table. The caller commits.
+
+        Returns:
+            int: Number of buckets written
+        """
+        from models.student import Student
+        from models.location import Location
+
+        delete = db.delete(cls)
+        if start_day:
+            delete = delete.where(cls.day >= start_day)
+        if end_day:
+            delete = delete.where(cls.day <= end_day)
+        db.session.execute(delete)
+
+        course_id = db.func.coalesce(Student.course_id, NO_COURSE)
+        municipality = db.func.coalesce(Location.municipality, NO_MUNICIPALITY)
+        buckets = db.select(
+            Attendance.attendance_day,
+            course_id,
+            municipality,
+            db.func.count(Attendance.id)
+        ).outerjoin(
+            Student, Student.id == Attendance.student_id
+        ).outerjoin(
+            Location, Location.id == Student.location_id
+        ).group_by(
+            Attendance.attendance_day,
+            course_id,
+            municipality
+        )
+        if start_day:
+            buckets = buckets.where(Attendance.attendance_day >= start_day)
+        if end_day:
+            buckets = buckets.where(Attendance.attendance_day <= end_day)
+
+        result = db.session.execute(
+            db.insert(cls).from_select(
+                ['day', 'course_id', 'municipality', 'visits'],
+                buckets
+            )
+        )
+        DataVersion.bump(db.session)
+        return result.rowcount
+
+    @classmethod
+    def buckets_between(cls, start_day, end_day):
+        """
+        Rollup rows in a date range (inclusive) with their course names.
+
+        Returns:
+            list: ``(day, course_name, municipality, visits)`` tuples;
+            ``course_name`` is None for students without a course
+        """
+        from models.course import Course
+
+        return db.session.query(
+            cls.day,
+            Course.course_name,
+            cls.municipality,
+            cls.visits
+        ).outerjoin(
+            Course, Course.id == cls.course_id
+        ).filter(
+            cls.day >= start_day,
+            cls.day <= end_day
+        ).all()
+
+    @classmethod
+    def visits_by_course_month(cls, start_day, end_day):
+        """
+        Visits per course and calendar month in a date range (inclusive).
+
+        Returns:
+            list: ``(course_id, month, visits)`` tuples, ``month`` being 1-12;
+            ``course_id`` is ``NO_COURSE`` for students without a course
+        """
+        from utils.time_buckets import bucket_expression, bucket_key
+
+        month = bucket_expression('month', cls.day)
+        rows = db.session.query(
+            cls.course_id,
+            month,
+            db.func.sum(cls.visits)
+        ).filter(
+            cls.day >= start_day,
+            cls.day <= end_day
+        ).group_by(
+            cls.course_id,
+            month
+        ).all()
+        return [(course_id, bucket_key('month', value).month, visits) for course_id, value, visits in rows]
+
+    @classmethod
+    def visits_by_day_course(cls, start_day, end_day):
+        """
+        Visits per day and course in a date range (inclusive).
+
+        Returns:
+            list: ``(day, course_id, visits)`` tuples
+        """
+        return db.session.query(
+            cls.day,
+            cls.course_id,
+            db.func.sum(cls.visits)
+        ).filter(
+            cls.day >= start_day,
+            cls.day <= end_day
+        ).group_by(
+            cls.day,
+            cls.course_id
+        ).all()
@@ -0,0 +1,64 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from . import db
+from .attendance import dialect_insert
+
+# Tables with their own change counter
+TRACKED_TABLES = ('attendance', 'students', 'courses', 'locations')
+
+class DataVersion(db.Model):
+    """
+    Change counters shared by every worker process.
+
+    Each tracked table has a counter named after it, and the ``dashboard``
+    counter moves with any of them. Counters are bumped in the same
+    transaction as the change, so caches and ETags in any worker can tell
+    whether their data is current with a single primary-key read.
+    """
+    __tablename__ = 'data_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def bump(cls, executor, *names):
+        """
+        Increment counters inside the caller's transaction.
+
+        Args:
+            executor: ``Connection`` or ``Session`` doing the write
+            *names (str): Counter names; ``dashboard`` is always included
+        """
+        names = sorted({'dashboard', *names})
+        insert = dialect_insert(db.engine.dialect.name)(cls.__table__)
+        statement = insert.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'version': cls.__table__.c.version + 1}
+        )
+        executor.execute(statement, [{'name': name, 'version': 1} for name in names])
+
+    @classmethod
+    def current(cls, *names):
+        """
+        Return counter values (0 for counters never bumped).
+
+        Returns:
+            int: The ``dashboard`` counter if no names are given, or the
+            single named counter; a tuple in argument order for several
+        """
+        names = names or ('dashboard',)
+        versions = dict(db.session.query(cls.name, cls.version).filter(cls.name.in_(names)))
+        values = tuple(versions.get(name, 0) for name in names)
+        return values[0] if len(values) == 1 else values
+
+@event.listens_for(Session, 'before_flush')
+def _bump_on_tracked_changes(session, flush_context, instances):
+    # ORM writes to tracked models bump their counters in the same flush;
+    # Core inserts (check-in writer, offline batches) call DataVersion.bump themselves
+    changed = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(instance, '__tablename__', None)
+        if table in TRACKED_TABLES and (instance not in session.dirty or session.is_modified(instance)):
+            changed.add(table)
+    if changed:
+        DataVersion.bump(session.connection(), *changed)
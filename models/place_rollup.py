@@ -0,0 +1,246 @@
+from . import db
+from .attendance import Attendance, dialect_insert
+from .data_version import DataVersion
+
+# Hierarchy of place levels, widest first
+LEVELS = ('province', 'municipality', 'barangay')
+# Place name for students without a location, and for levels below a row's own
+NO_PLACE = ''
+
+class AttendancePlaceRollup(db.Model):
+    """
+    Check-ins per day at every level of the location hierarchy.
+
+    Each check-in adds to one province row, one municipality row and one
+    barangay row of its day, with the names below a row's level left
+    empty. Any level and date range is then a sum over rows of that level
+    only, without joining ``attendance`` to ``students`` and ``locations``.
+    Like ``AttendanceDailyRollup`` it is maintained in the same transaction
+    as every attendance insert and attributes visits to the student's
+    location at check-in time.
+
+    A student checks in at most once a day, so a bucket's ``visits`` is also
+    its number of distinct visitors that day; distinct visitors over a
+    longer range cannot be summed from days (see ``drill_down``).
+    """
+    __tablename__ = 'attendance_place_rollup'
+    __table_args__ = (
+        db.Index('uq_attendance_place_bucket', 'level', 'day', 'province', 'municipality', 'barangay', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    level = db.Column(db.String(20), nullable=False)
+    province = db.Column(db.String(100), nullable=False, default=NO_PLACE)
+    municipality = db.Column(db.String(100), nullable=False, default=NO_PLACE)
+    barangay = db.Column(db.String(100), nullable=False, default=NO_PLACE)
+    visits = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'level': self.level,
+            'province': self.province,
+            'municipality': self.municipality,
+            'barangay': self.barangay,
+            'visits': self.visits
+        }
+
+    @classmethod
+    def record_checkins(cls, executor, checkins):
+        """
+        Add newly inserted check-ins to their place buckets.
+
+        Must run in the transaction that inserted the attendance rows.
+
+        Args:
+            executor: The ``Connection`` or ``Session`` that inserted them
+            checkins (list): ``(student_id, attendance_day)`` pairs, at most
+                one per student and day
+        """
+        from models.student import Student
+        from models.location import Location
+
+        if not checkins:
+            return
+
+        student_ids = list({student_id for student_id, _ in checkins})
+        places_by_student = {}
+        for chunk_start in range(0, len(student_ids), 500):
+            rows = executor.execute(
+                db.select(Student.id, Location.province, Location.municipality, Location.barangay)
+                .outerjoin(Location, Location.id == Student.location_id)
+                .where(Student.id.in_(student_ids[chunk_start:chunk_start + 500]))
+            )
+            for student_id, *names in rows:
+                places_by_student[student_id] = tuple(name or NO_PLACE for name in names)
+
+        counts = {}
+        for student_id, day in checkins:
+            names = places_by_student.get(student_id, (NO_PLACE,) * len(LEVELS))
+            for depth, level in enumerate(LEVELS, start=1):
+                key = (level, day, *names[:depth], *(NO_PLACE,) * (len(LEVELS) - depth))
+                counts[key] = counts.get(key, 0) + 1
+
+        insert = dialect_insert(db.engine.dialect.name)(cls.__table__)
+        statement = insert.on_conflict_do_update(
+            index_elements=['level', 'day', 'province', 'municipality', 'barangay'],
+            set_={'visits': cls.__table__.c.visits + insert.excluded.visits}
+        )
+        executor.execute(statement, [{
+            'level': level,
+            'day': day,
+            'province': province,
+            'municipality': municipality,
+            'barangay': barangay,
+            'visits': count
+        } for (level, day, province, municipality, barangay), count in counts.items()])
+
+    @classmethod
+    def rebuild(cls, start_day=None, end_day=None):
+        """
+        Recompute the place rollup from ``attendance`` for a date range (inclusive).
+
+        Leaving both dates out rebuilds the whole table. The caller commits.
+
+        Returns:
+            int: Number of buckets written
+        """
+        from models.student import Student
+        from models.location import Location
+
+        delete = db.delete(cls)
+        if start_day:
+            delete = delete.where(cls.day >= start_day)
+        if end_day:
+            delete = delete.where(cls.day <= end_day)
+        db.session.execute(delete)
+
+        names = [db.func.coalesce(getattr(Location, level), NO_PLACE) for level in LEVELS]
+        written = 0
+        for depth, level in enumerate(LEVELS, start=1):
+            grouped = names[:depth]
+            buckets = db.select(
+                db.literal(level),
+                Attendance.attendance_day,
+                *grouped,
+                *(db.literal(NO_PLACE) for _ in range(len(LEVELS) - depth)),
+                db.func.count(Attendance.id)
+            ).outerjoin(
+                Student, Student.id == Attendance.student_id
+            ).outerjoin(
+                Location, Location.id == Student.location_id
+            ).group_by(
+                Attendance.attendance_day,
+                *grouped
+            )
+            if start_day:
+                buckets = buckets.where(Attendance.attendance_day >= start_day)
+            if end_day:
+                buckets = buckets.where(Attendance.attendance_day <= end_day)
+
+            result = db.session.execute(
+                db.insert(cls).from_select(
+                    ['level', 'day', *LEVELS, 'visits'],
+                    buckets
+                )
+            )
+            written += result.rowcount
+        DataVersion.bump(db.session)
+        return written
+
+    @classmethod
+    def drill_down(cls, level, start_day, end_day, province=None, municipality=None, limit=None, visitors=False):
+        """
+        Visits per place of one level in a date range (inclusive), busiest first.
+
+        Args:
+            level (str): One of ``LEVELS``
+            start_day (date): First day
+            end_day (date): Last day
+            province (str, optional): Only places in this province
+            municipality (str, optional): Only places in this municipality
+            limit (int, optional): Maximum number of places
+            visitors (bool): Also count distinct visitors over the whole range
+                (``distinct_visitors``); this one reads ``attendance``
+
+        Returns:
+            list: Dicts with the place names down to ``level``, ``visits``
+            and, with ``visitors``, ``distinct_visitors``
+        """
+        if level not in LEVELS:
+            raise ValueError(f"Unknown place level: {level}")
+
+        names = [getattr(cls, name) for name in LEVELS[:LEVELS.index(level) + 1]]
+        visits = db.func.sum(cls.visits)
+        query = db.session.query(
+            *names,
+            visits
+        ).filter(
+            cls.level == level,
+            cls.day >= start_day,
+            cls.day <= end_day
+        )
+        if province is not None:
+            query = query.filter(cls.province == province)
+        if municipality is not None:
+            query = query.filter(cls.municipality == municipality)
+        query = query.group_by(*names).order_by(visits.desc(), *names)
+        if limit:
+            query = query.limit(limit)
+
+        places = []
+        for row in query:
+            place = {name.key: value for name, value in zip(names, row)}
+            place['visits'] = int(row[-1])
+            places.append(place)
+
+        if visitors and places:
+            counts = cls._distinct_visitors(level, start_day, end_day, province, municipality)
+            for place in places:
+                place['distinct_visitors'] = counts.get(tuple(place[name.key] for name in names), 0)
+        return places
+
+    @classmethod
+    def _distinct_visitors(cls, level, start_day, end_day, province=None, municipality=None):
+        """Distinct students per place of ``level`` over a date range, keyed by the place names"""
+        from models.student import Student
+        from models.location import Location
+        from utils.time_buckets import day_range
+
+        names = [db.func.coalesce(getattr(Location, name), NO_PLACE) for name in LEVELS[:LEVELS.index(level) + 1]]
+        query = db.session.query(
+            *names,
+            db.func.count(db.distinct(Attendance.student_id))
+        ).outerjoin(
+            Student, Student.id == Attendance.student_id
+        ).outerjoin(
+            Location, Location.id == Student.location_id
+        ).filter(
+            *day_range(start_day, end_day)
+        )
+        if province is not None:
+            query = query.filter(db.func.coalesce(Location.province, NO_PLACE) == province)
+        if municipality is not None:
+            query = query.filter(db.func.coalesce(Location.municipality, NO_PLACE) == municipality)
+        return {tuple(row[:-1]): row[-1] for row in query.group_by(*names)}
+
+    @classmethod
+    def visits_between(cls, level, start_day, end_day):
+        """
+        Rows of one level in a date range (inclusive), one per place and day.
+
+        Returns:
+            list: ``(day, province, municipality, barangay, visits)`` tuples
+        """
+        return db.session.query(
+            cls.day,
+            cls.province,
+            cls.municipality,
+            cls.barangay,
+            cls.visits
+        ).filter(
+            cls.level == level,
+            cls.day >= start_day,
+            cls.day <= end_day
+        ).all()
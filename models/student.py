@@ -1,8 +1,12 @@
 from models import db
+from sqlalchemy.orm import selectinload
 
 class Student(db.Model):
     __tablename__ = 'students'
 
+    # Relations that to_dict() can embed, in serialization order
+    RELATIONS = ('course', 'location', 'managed_by')
+
     id = db.Column(db.String(20), primary_key=True)
     first_name = db.Column(db.String(50), nullable=False)
     middle_name = db.Column(db.String(50))
@@ -20,26 +24,66 @@ class Student(db.Model):
     attendance_records = db.relationship('Attendance', back_populates='student', lazy=True)
     managed_by = db.relationship('User', foreign_keys=[managed_by_user_id], back_populates='managed_students')
 
-    def to_dict(self):
-        return {
+    @classmethod
+    def parse_include(cls, value, default=RELATIONS):
+        """
+        Parse an ``include`` request argument into a tuple of relation names.
+
+        ``None`` means "not given" and returns the default; an empty string or
+        ``none`` omits every relation. Unknown names are ignored.
+        """
+        if value is None:
+            return tuple(default)
+        names = {name.strip() for name in value.split(',')}
+        return tuple(name for name in cls.RELATIONS if name in names)
+
+    @classmethod
+    def eager(cls, include=RELATIONS):
+        """Loader options that fetch the requested relations in one extra SELECT each"""
+        loaders = {
+            'course': selectinload(cls.course),
+            'location': selectinload(cls.location),
+            'managed_by': selectinload(cls.managed_by)
+        }
+        return [loaders[name] for name in include]
+
+    @classmethod
+    def serialize_many(cls, query, include=RELATIONS):
+        """
+        Serialize every student matched by a query.
+
+        The requested relations are loaded up front, so the whole list costs
+        one query plus one per relation instead of one per student.
+        """
+        include = tuple(include)
+        return [student.to_dict(include) for student in query.options(*cls.eager(include)).all()]
+
+    def to_dict(self, include=RELATIONS):
+        data = {
             'id': self.id,
             'first_name': self.first_name,
             'middle_name': self.middle_name,
             'last_name': self.last_name,
             'age': self.age,
-            'image': self.image,
-            'course': {
+            'image': self.image
+        }
+
+        if 'course' in include:
+            data['course'] = {
                 'id': self.course.id,
                 'course_name': self.course.course_name
-            } if self.course else None,
-            'location': {
+            } if self.course else None
+        if 'location' in include:
+            data['location'] = {
                 'id': self.location.id,
                 'barangay': self.location.barangay,
                 'municipality': self.location.municipality,
                 'province': self.location.province
-            } if self.location else None,
-            'managed_by': {
+            } if self.location else None
+        if 'managed_by' in include:
+            data['managed_by'] = {
                 'id': self.managed_by.id,
                 'username': self.managed_by.username
             } if self.managed_by else None
-        }
\ No newline at end of file
+
+        return data
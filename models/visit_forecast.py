@@ -0,0 +1,81 @@
+from datetime import datetime
+from . import db
+from .data_version import DataVersion
+
+class VisitForecast(db.Model):
+    """
+    Forecast visits per course and day.
+
+    Written by the nightly ``forecast_visits.py`` job and only read by the
+    dashboard and ``/api/admin/forecast``. Each run replaces the forecasts
+    from its first day on; forecasts for past days are kept so they can be
+    compared with what actually happened.
+    """
+    __tablename__ = 'visit_forecasts'
+    __table_args__ = (
+        db.Index('uq_visit_forecast_day_course', 'day', 'course_id', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    # Not a foreign key, like the daily rollup it is fitted from
+    course_id = db.Column(db.Integer, nullable=False)
+    expected = db.Column(db.Float, nullable=False, default=0.0)
+    lower = db.Column(db.Float, nullable=False, default=0.0)
+    upper = db.Column(db.Float, nullable=False, default=0.0)
+    generated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'course_id': self.course_id,
+            'expected': self.expected,
+            'lower': self.lower,
+            'upper': self.upper,
+            'generated_at': self.generated_at.isoformat()
+        }
+
+    @classmethod
+    def replace_from(cls, start_day, rows):
+        """
+        Replace every forecast from ``start_day`` on. The caller commits.
+
+        Args:
+            start_day (date): First forecast day of the new run
+            rows (list): Dicts with ``day``, ``course_id``, ``expected``,
+                ``lower`` and ``upper``
+        """
+        db.session.execute(db.delete(cls).where(cls.day >= start_day))
+        if rows:
+            generated_at = datetime.now()
+            db.session.execute(db.insert(cls), [{**row, 'generated_at': generated_at} for row in rows])
+        DataVersion.bump(db.session, 'forecasts')
+
+    @classmethod
+    def between(cls, start_day, end_day):
+        """
+        Stored forecasts in a date range (inclusive) with their course names.
+
+        Returns:
+            list: ``(day, course_name, expected, lower, upper, generated_at)``
+            tuples ordered by day and course; ``course_name`` is None for
+            courses deleted since the forecast was made
+        """
+        from models.course import Course
+
+        return db.session.query(
+            cls.day,
+            Course.course_name,
+            cls.expected,
+            cls.lower,
+            cls.upper,
+            cls.generated_at
+        ).outerjoin(
+            Course, Course.id == cls.course_id
+        ).filter(
+            cls.day >= start_day,
+            cls.day <= end_day
+        ).order_by(
+            cls.day,
+            cls.course_id
+        ).all()
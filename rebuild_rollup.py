@@ -0,0 +1,44 @@
+import argparse
+import datetime
+from flask import Flask
+from models import db
+from models.attendance_rollup import AttendanceDailyRollup
+from models.place_rollup import AttendancePlaceRollup
+from config import Config
+
+def rebuild_rollup(app=None, start_day=None, end_day=None):
+    """
+    Recompute ``attendance_daily_rollup`` and ``attendance_place_rollup``
+    from the attendance history.
+
+    Check-ins keep the rollups up to date on their own; run this after
+    importing or editing attendance rows directly, preferably while the
+    kiosks are idle.
+    """
+    # If no app was provided, create a temporary one for the rebuild
+    if app is None:
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        buckets = AttendanceDailyRollup.rebuild(start_day, end_day)
+        place_buckets = AttendancePlaceRollup.rebuild(start_day, end_day)
+        db.session.commit()
+
+    print(f"Rebuilt attendance_daily_rollup for {start_day or 'the beginning'} to {end_day or 'today'}: {buckets} buckets")
+    print(f"Rebuilt attendance_place_rollup for {start_day or 'the beginning'} to {end_day or 'today'}: {place_buckets} buckets")
+    return buckets
+
+def _parse_day(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+# This allows the script to be run directly
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild the daily attendance rollups from history.')
+    parser.add_argument('--start', type=_parse_day, help='First day to rebuild (YYYY-MM-DD)')
+    parser.add_argument('--end', type=_parse_day, help='Last day to rebuild (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    rebuild_rollup(start_day=args.start, end_day=args.end)
@@ -3,26 +3,43 @@ import sqlalchemy
 from datetime import datetime, timedelta
 import json
 import io
-import matplotlib.pyplot as plt
+import queue
 import random
+import time
 import string
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from flask import redirect, url_for, flash, session, current_app, request, jsonify, send_file, render_template
+from flask import redirect, url_for, flash, session, current_app, request, jsonify, send_file, render_template, abort, Response
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
 from models import db
 from routes import admin_bp
-from sqlalchemy import extract
 from models.user import User
 from models.course import Course
 from models.student import Student
 from models.attendance import Attendance
 from models.location import Location
+from models.place_rollup import AttendancePlaceRollup, LEVELS as PLACE_LEVELS
 from utils.export import export_attendance_csv, export_attendance_pdf
-from utils.backup import backup_deleted_records  # Add this import
+from utils.roster_cache import roster_cache
+from utils.checkin_registry import daily_checkins
+from utils.attendance_writer import attendance_writer
+from utils.live_feed import live_feed
+from utils.dashboard_cache import dashboard_cache
+from utils.export_jobs import export_jobs, JOB_ID_PATTERN
+from utils.prewarm import backend_prewarm
+from utils.conditional import make_etag, is_not_modified, not_modified, with_validators
+from models.data_version import DataVersion
+from services.dashboard import get_cached_dashboard_data, dashboard_cache_key, resolve_date_range
+from services.courses import list_courses, add_course, get_course_detail, update_course
+from services.courses import delete_course as delete_course_record
+from services.graphs import render_graph
+from services.occupancy import occupancy_matrix
+from services.forecast import get_forecast
+from services.export_jobs import submit_attendance_export, export_attendance_now
+from utils.graph_export import generate_occupancy_heatmap
 from utils.email_verification import (
     generate_verification_code,
     send_verification_email,
@@ -56,207 +73,21 @@ def admin_dashboard():
             start_date_str = request.args.get('startDate')
             end_date_str = request.args.get('endDate')
 
-            today = datetime.now()
-
-            # Determine date range based on filter or custom dates
-            if start_date_str and end_date_str and filter_type == 'custom':
-                start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-                # Set end_date to end of day
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-            elif filter_type == 'weekly':
-                start_date = today - timedelta(weeks=1)
-                end_date = today
-            elif filter_type == 'monthly':
-                start_date = today - timedelta(weeks=4)
-                end_date = today
-            elif filter_type == 'yearly':
-                start_date = today - timedelta(weeks=52)
-                end_date = today
-            else:
-                start_date = today - timedelta(weeks=1)
-                end_date = today
-
-            # Log the filter type and date range for debugging
-            current_app.logger.debug(f"Filter: {filter_type}, Date range: {start_date} to {end_date}")
-
             if request.method == 'POST' and 'export_csv' in request.form:
+                start_date, end_date = resolve_date_range(filter_type, start_date_str, end_date_str)
                 return export_attendance_csv(start_date, end_date)
 
-            # Get all courses first to ensure all are included in chart data
-            all_courses = Course.query.all()
-            current_app.logger.debug(f"Found {len(all_courses)} courses in database")
-
-            # Initialize weekly course visits with all available courses
-            weekly_course_visits = {}
-            for course in all_courses:
-                weekly_course_visits[course.course_name] = [0, 0, 0, 0, 0, 0, 0]
-                current_app.logger.debug(f"Initialized course: {course.course_name}")
-
-            # Query attendance data grouped by course and day of week
-            attendance_by_course_day = (
-                db.session.query(
-                    Course.course_name,
-                    extract('dow', Attendance.check_in_time).label('day_of_week'),
-                    db.func.count(Attendance.id).label('visit_count')
-                )
-                .join(Student, Student.id == Attendance.student_id)
-                .join(Course, Course.id == Student.course_id)
-                .filter(Attendance.check_in_time >= start_date)
-                .filter(Attendance.check_in_time <= end_date)
-                .group_by(Course.course_name, extract('dow', Attendance.check_in_time))
-                .all()
-            )
-
-            current_app.logger.debug(f"Found {len(attendance_by_course_day)} attendance records")
-
-            # Populate the weekly course visits data
-            for course_name, day_of_week, visit_count in attendance_by_course_day:
-                if course_name in weekly_course_visits:
-                    # Convert PostgreSQL day of week (0=Sunday) to array index
-                    day_index = int(day_of_week)
-                    weekly_course_visits[course_name][day_index] = visit_count
-                    current_app.logger.debug(f"Updated {course_name} day {day_index}: {visit_count} visits")
-
-            # Log final chart data
-            current_app.logger.debug(f"Final weekly_course_visits: {weekly_course_visits}")
-
-            # Get place visits data
-            place_visits_raw = (
-                db.session.query(Location.municipality, db.func.count(
-                    Attendance.id).label('visits'))
-                .join(Student, Student.location_id == Location.id)
-                .join(Attendance, Attendance.student_id == Student.id)
-                .filter(Attendance.check_in_time >= start_date)
-                .filter(Attendance.check_in_time <= end_date)
-                .group_by(Location.municipality)
-                .order_by(db.func.count(Attendance.id).desc())
-                .all()
-            )
-
-            place_visits = [{"municipality": place, "visits": visits}
-                            for place, visits in place_visits_raw]
-
-            # Get recent logins (students who logged in within the last 24 hours)
-            # Modified to show only one login per student per day
-            recent_time = today - timedelta(hours=24)
-
-            # Get the most recent login per student per day using subquery approach
-            subquery = db.session.query(
-                Attendance.student_id,
-                db.func.date(Attendance.check_in_time).label('login_date'),
-                db.func.max(Attendance.check_in_time).label('latest_login')
-            ).filter(
-                Attendance.check_in_time >= recent_time
-            ).group_by(
-                Attendance.student_id,
-                db.func.date(Attendance.check_in_time)
-            ).subquery()
-
-            recent_logins = db.session.query(
-                Attendance,
-                Student
-            ).join(
-                Student, Student.id == Attendance.student_id
-            ).join(
-                subquery,
-                db.and_(
-                    Attendance.student_id == subquery.c.student_id,
-                    Attendance.check_in_time == subquery.c.latest_login
-                )
-            ).order_by(
-                db.desc(Attendance.check_in_time)
-            ).limit(10).all()
-
-            logged_in_users = []
-            for attendance, student in recent_logins:
-                logged_in_users.append({
-                    'student': student.to_dict(),
-                    'login_time': attendance.check_in_time.isoformat()
-                })
-
-            # Calculate statistics based on unique daily logins
-            total_visitors = db.session.query(
-                db.func.count(db.distinct(
-                    db.func.concat(
-                        db.func.date(Attendance.check_in_time),
-                        '_',
-                        Attendance.student_id
-                    )
-                ))
-            ).filter(
-                Attendance.check_in_time >= start_date,
-                Attendance.check_in_time <= end_date
-            ).scalar() or 0
-
-            # Calculate monthly logins (unique daily logins)
-            month_start = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            total_logins_month = db.session.query(
-                db.func.count(db.distinct(
-                    db.func.concat(
-                        db.func.date(Attendance.check_in_time),
-                        '_',
-                        Attendance.student_id
-                    )
-                ))
-            ).filter(
-                Attendance.check_in_time >= month_start
-            ).scalar() or 0
-
-            # Calculate percentage increase (simplified)
-            prev_month_start = (month_start - timedelta(days=1)).replace(day=1)
-            prev_month_logins = db.session.query(
-                db.func.count(db.distinct(
-                    db.func.concat(
-                        db.func.date(Attendance.check_in_time),
-                        '_',
-                        Attendance.student_id
-                    )
-                ))
-            ).filter(
-                Attendance.check_in_time >= prev_month_start,
-                Attendance.check_in_time < month_start
-            ).scalar() or 1
-
-            login_percentage_increase = round(
-                ((total_logins_month - prev_month_logins) / prev_month_logins) * 100, 1
-            ) if prev_month_logins > 0 else 0
-
-            # Set icon classes based on increase/decrease
-            if login_percentage_increase >= 0:
-                login_icon_class = 'ti-arrow-up-right text-success'
-                login_bg_class = 'bg-light-success'
-            else:
-                login_icon_class = 'ti-arrow-down-right text-danger'
-                login_bg_class = 'bg-light-danger'
-
-            # Top places logic
-            top_weekly_places = place_visits[:2] if place_visits else []
+            include = Student.parse_include(request.args.get('include'))
 
-            if top_weekly_places:
-                top_weekly_place_visits_icon_class = 'ti-arrow-up-left text-success'
-                top_weekly_place_visits_bg_class = 'bg-light-success'
-            else:
-                top_weekly_place_visits_icon_class = 'ti-arrow-down-right text-danger'
-                top_weekly_place_visits_bg_class = 'bg-light-danger'
+            # Answer revalidations from the data version alone
+            cache_key = dashboard_cache_key(filter_type, start_date_str, end_date_str, include)
+            etag = make_etag('dashboard', DataVersion.current(), cache_key)
+            if is_not_modified(etag):
+                return not_modified(etag)
 
-            return jsonify({
-                'success': True,
-                'weekly_course_visits': weekly_course_visits,
-                'logged_in_users': logged_in_users,
-                'total_visitors': total_visitors,
-                'total_logins_month': total_logins_month,
-                'login_percentage_increase': login_percentage_increase,
-                'login_icon_class': login_icon_class,
-                'login_bg_class': login_bg_class,
-                'top_weekly_places': top_weekly_places,
-                'top_weekly_place_visits_icon_class': top_weekly_place_visits_icon_class,
-                'top_weekly_place_visits_bg_class': top_weekly_place_visits_bg_class,
-                'place_visits': place_visits,
-                'filter_type': filter_type,
-                'start_date': start_date.isoformat(),
-                'end_date': end_date.isoformat()
-            })
+            data, version = get_cached_dashboard_data(filter_type, start_date_str, end_date_str, include)
+            # Tag with the version actually served, which is older while a refresh is running
+            return with_validators(jsonify(data), make_etag('dashboard', version, cache_key))
 
         except Exception as e:
             current_app.logger.error(f"Dashboard error: {str(e)}", exc_info=True)
@@ -338,6 +169,7 @@ def manage_students():
                 )
                 db.session.add(new_student)
                 db.session.commit()
+                roster_cache.invalidate(new_student.id)
                 flash('Student added successfully!')
 
             elif 'remove' in request.form:
@@ -346,6 +178,7 @@ def manage_students():
                 if student:
                     db.session.delete(student)
                     db.session.commit()
+                    roster_cache.invalidate(student_id)
                     flash(
                         f'Student with ID {student_id} deleted successfully!')
                 else:
@@ -353,7 +186,7 @@ def manage_students():
 
             return redirect(url_for('manage_students'))
 
-        students = Student.query.all()
+        students = Student.query.options(*Student.eager(('course',))).all()
         return render_template('admin_new/ae_manage.html', students=students)
     else:
         flash('Unauthorized access!')
@@ -393,6 +226,7 @@ def edit_student(student_id):
                     student.image = image_filename
 
                 db.session.commit()
+                roster_cache.invalidate(student_id)
                 flash('Student updated successfully!', 'success')
             except Exception as e:
                 db.session.rollback()
@@ -446,6 +280,7 @@ def add_student():
 
                 db.session.add(student)
                 db.session.commit()
+                roster_cache.invalidate(student_id)
                 flash('Student added successfully!', 'success')
                 return redirect(url_for('manage_students'))
             except sqlalchemy.exc.OperationalError as e:
@@ -478,6 +313,7 @@ def delete_student(student_id):
     if student:
         db.session.delete(student)
         db.session.commit()
+        roster_cache.invalidate(student_id)
         return jsonify({'success': True, 'message': f'Student {student_id} deleted successfully'}), 200
     else:
         return jsonify({'success': False, 'message': 'Student not found'}), 404
@@ -506,38 +342,12 @@ def export_pdf():
 @admin_required
 def download_records():
     if 'admin' in session:
-        filter_type = request.form.get('filter', 'weekly')
-        course_id = request.form.get('course')
-        start_date_str = request.form.get('start_date')
-        end_date_str = request.form.get('end_date')
-        start_time_str = request.form.get('start_time')
-        end_time_str = request.form.get('end_time')
-
-        today = datetime.now()
-
-        if filter_type == 'weekly':
-            start_date = today - timedelta(weeks=1)
-            end_date = today
-        elif filter_type == 'monthly':
-            start_date = today - timedelta(weeks=4)
-            end_date = today
-        elif filter_type == 'yearly':
-            start_date = today - timedelta(weeks=52)
-            end_date = today
-        else:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d') if start_date_str else today - timedelta(weeks=1)
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d') if end_date_str else today
-
-        if start_time_str:
-            start_date = start_date.replace(hour=int(start_time_str.split(':')[0]), minute=int(start_time_str.split(':')[1]))
-        if end_time_str:
-            end_date = end_date.replace(hour=int(end_time_str.split(':')[0]), minute=int(end_time_str.split(':')[1]))
-
         if request.method == 'POST':
-            if 'export_csv' in request.form:
-                return export_attendance_csv(start_date, end_date, course_id)
-            elif 'export_pdf' in request.form:
-                return export_attendance_pdf(start_date, end_date, course_id)
+            # Same formats and validation as the export jobs, built in this request
+            try:
+                return export_attendance_now(request.form)
+            except ValueError as e:
+                flash(str(e), 'error')
 
         courses = Course.query.all()
         return render_template('admin_new/ae_download.html', courses=courses)
@@ -545,6 +355,49 @@ def download_records():
         flash('Unauthorized access! Admins only.')
         return redirect(url_for('admin_login'))
 
+def _export_job_payload(status):
+    """Job status with the URLs the download page polls and downloads from"""
+    payload = {'success': status['status'] != 'failed', **status}
+    payload['status_url'] = url_for('admin.export_job_status', job_id=status['job_id'])
+    if status['status'] == 'done':
+        payload['download_url'] = url_for('admin.export_job_download', job_id=status['job_id'])
+    return payload
+
+@admin_bp.route('/admin/exports', methods=['POST'])
+@admin_required
+def submit_export_job():
+    """Queue a CSV, PDF, Parquet or Arrow export of the download form; 202 until the file is ready"""
+    try:
+        status = submit_attendance_export(request.form)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error submitting export job: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': f'Error submitting export: {str(e)}'}), 500
+
+    return jsonify(_export_job_payload(status)), 200 if status['status'] == 'done' else 202
+
+@admin_bp.route('/admin/exports/<job_id>', methods=['GET'])
+@admin_required
+def export_job_status(job_id):
+    if not JOB_ID_PATTERN.match(job_id):
+        return jsonify({'success': False, 'message': 'Invalid job id'}), 400
+
+    status = export_jobs.status(job_id)
+    if status['status'] == 'missing':
+        return jsonify({'success': False, 'message': 'Export not found'}), 404
+    return jsonify(_export_job_payload(status))
+
+@admin_bp.route('/admin/exports/<job_id>/download', methods=['GET'])
+@admin_required
+def export_job_download(job_id):
+    artifact = export_jobs.artifact(job_id) if JOB_ID_PATTERN.match(job_id) else None
+    if artifact is None:
+        return jsonify({'success': False, 'message': 'Export not found'}), 404
+
+    path, download_name = artifact
+    return send_file(path, as_attachment=True, download_name=download_name)
+
 # Move this to be a standalone function that can be imported
 def get_all_locations():
     """Get all locations - utility function"""
@@ -616,6 +469,10 @@ def get_locations():
             province = request.args.get('province', '')
             municipality = request.args.get('municipality', '')
 
+            etag = make_etag('locations', DataVersion.current('locations'), province, municipality)
+            if is_not_modified(etag):
+                return not_modified(etag)
+
             filters = {}
             if province:
                 filters['province'] = province
@@ -633,7 +490,7 @@ def get_locations():
                 }
                 for loc in locations
             ]
-            return jsonify(location_data)
+            return with_validators(jsonify(location_data), etag)
         except Exception as e:
             current_app.logger.error(f"Error getting locations: {str(e)}")
             return jsonify({'error': 'Failed to fetch locations'}), 500
@@ -649,28 +506,111 @@ def get_admin_locations():
 def download_graph():
     try:
         # Process either GET or POST parameters
-        if request.method == 'POST':
-            weekly_course_visits_str = request.form.get('weekly_course_visits')
-            start_date = request.form.get('start_date')
-            end_date = request.form.get('end_date')
-        else:  # GET
-            weekly_course_visits_str = request.args.get('weekly_course_visits')
-            start_date = request.args.get('start_date')
-            end_date = request.args.get('end_date')
-
-        if not weekly_course_visits_str:
-            current_app.logger.error("Missing weekly_course_visits parameter")
-            return jsonify({'success': False, 'message': 'Missing data parameter'}), 400
-
-        # Import here to avoid circular imports
-        from utils.graph_export import generate_visitor_statistics_graph
-
-        # Generate and return the graph
-        return generate_visitor_statistics_graph(weekly_course_visits_str, start_date, end_date)
+        return render_graph(request.form if request.method == 'POST' else request.args)
     except Exception as e:
         current_app.logger.error(f"Error in download_graph: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'message': f'Error generating graph: {str(e)}'}), 500
 
+@admin_bp.route('/admin/occupancy', methods=['GET'])
+@admin_required
+def occupancy_heatmap():
+    """Check-ins per weekday and hour of day, as JSON or a heatmap image (format=png)"""
+    filter_type = request.args.get('filter', 'monthly')
+    course_id = request.args.get('course_id', type=int)
+    by_course = request.args.get('by_course', '').lower() in ('1', 'true', 'yes')
+
+    try:
+        start_date, end_date = resolve_date_range(filter_type, request.args.get('startDate'), request.args.get('endDate'))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid date range'}), 400
+
+    try:
+        data = occupancy_matrix(start_date, end_date, course_id=course_id, by_course=by_course)
+
+        if request.args.get('format') == 'png':
+            title = f"Library Occupancy by Hour ({start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')})"
+            return generate_occupancy_heatmap(data['matrix'], title=title, course_matrices=data.get('courses'))
+
+        return jsonify({
+            'success': True,
+            'start_date': start_date.date().isoformat(),
+            'end_date': end_date.date().isoformat(),
+            **data
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error building occupancy heatmap: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': f'Error building occupancy heatmap: {str(e)}'}), 500
+
+@admin_bp.route('/admin/places', methods=['GET'])
+@admin_required
+def place_drill_down():
+    """
+    Visits per province, municipality or barangay from the place rollup.
+
+    Query parameters: ``level`` (default province), optional ``province``
+    and ``municipality`` to drill into, ``limit``, the dashboard's
+    ``filter``/``startDate``/``endDate``, and ``visitors=true`` to also
+    count distinct visitors over the range (this one reads ``attendance``).
+    """
+    level = request.args.get('level', 'province')
+    if level not in PLACE_LEVELS:
+        return jsonify({'success': False, 'message': f"level must be one of {', '.join(PLACE_LEVELS)}"}), 400
+
+    try:
+        start_date, end_date = resolve_date_range(
+            request.args.get('filter', 'monthly'), request.args.get('startDate'), request.args.get('endDate')
+        )
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid date range'}), 400
+
+    province = request.args.get('province')
+    municipality = request.args.get('municipality')
+    limit = request.args.get('limit', type=int)
+    visitors = request.args.get('visitors', 'false').lower() == 'true'
+
+    try:
+        # The dashboard counter also moves when the rollups are rebuilt
+        etag = make_etag(
+            'places', DataVersion.current(), level, province, municipality, limit,
+            start_date.date(), end_date.date(), visitors
+        )
+        if is_not_modified(etag):
+            return not_modified(etag)
+
+        places = AttendancePlaceRollup.drill_down(
+            level, start_date.date(), end_date.date(),
+            province=province, municipality=municipality, limit=limit, visitors=visitors
+        )
+        return with_validators(jsonify({
+            'success': True,
+            'level': level,
+            'start_date': start_date.date().isoformat(),
+            'end_date': end_date.date().isoformat(),
+            'places': places
+        }), etag)
+    except Exception as e:
+        current_app.logger.error(f"Error reading place statistics: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': f'Error reading place statistics: {str(e)}'}), 500
+
+@admin_bp.route('/admin/forecast', methods=['GET'])
+@admin_required
+def visit_forecast():
+    """Stored visit forecasts per course for the next days (days=1-31, default 7)"""
+    days = request.args.get('days', 7, type=int)
+    if not 1 <= days <= 31:
+        return jsonify({'success': False, 'message': 'days must be between 1 and 31'}), 400
+
+    try:
+        today = datetime.now().date()
+        etag = make_etag('forecast', DataVersion.current('forecasts', 'courses'), today, days)
+        if is_not_modified(etag):
+            return not_modified(etag)
+
+        return with_validators(jsonify({'success': True, **get_forecast(today, days)}), etag)
+    except Exception as e:
+        current_app.logger.error(f"Error reading visit forecasts: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': f'Error reading visit forecasts: {str(e)}'}), 500
+
 @admin_bp.route('/admin/manage_admins', methods=['GET', 'POST'])
 @admin_required
 def manage_admins():
@@ -848,17 +788,17 @@ def user_management():
                 db.session.commit()
                 return jsonify({'success': True, 'message': 'Course assigned successfully'})
 
-    # Get data for GET requests
-    managed_students = Student.query.filter_by(managed_by_user_id=current_user.id).all()
+    # Get data for GET requests; relations are loaded up front, and callers
+    # can drop the ones they do not need with ?include=course,location
+    include = Student.parse_include(request.args.get('include'))
     managed_courses = Course.query.filter_by(managed_by_user_id=current_user.id).all()
-    unassigned_students = Student.query.filter_by(managed_by_user_id=None).all()
     unassigned_courses = Course.query.filter_by(managed_by_user_id=None).all()
 
     return jsonify({
         'success': True,
-        'managed_students': [student.to_dict() for student in managed_students],
+        'managed_students': Student.serialize_many(Student.query.filter_by(managed_by_user_id=current_user.id), include),
         'managed_courses': [course.to_dict() for course in managed_courses],
-        'unassigned_students': [student.to_dict() for student in unassigned_students],
+        'unassigned_students': Student.serialize_many(Student.query.filter_by(managed_by_user_id=None), include),
         'unassigned_courses': [course.to_dict() for course in unassigned_courses]
     })
 
@@ -883,11 +823,72 @@ def edit_managed_student(student_id):
         student.age = request.form.get('age', student.age)
 
         db.session.commit()
+        roster_cache.invalidate(student_id)
         return jsonify({'success': True, 'message': 'Student updated successfully', 'student': student.to_dict()})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Error updating student: {str(e)}'}), 500
 
+@admin_bp.route('/admin/metrics', methods=['GET'])
+@admin_required
+def admin_metrics():
+    """Per-worker cache and check-in counters"""
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'roster_cache': roster_cache.stats(),
+        'daily_checkins': daily_checkins.stats(),
+        'checkin_writer': attendance_writer.stats(),
+        'live_feed': live_feed.stats(),
+        'dashboard_cache': dashboard_cache.stats(),
+        'export_jobs': export_jobs.stats(),
+        'backend_prewarm': backend_prewarm.stats()
+    })
+
+@admin_bp.route('/admin/live_checkins', methods=['GET'])
+def live_checkins():
+    """
+    Server-Sent Events stream of check-ins, starting with the recent-logins snapshot.
+
+    Each stream holds a server thread, so it is closed after
+    ``LIVE_FEED_MAX_STREAM_SECONDS``; the browser reconnects after the
+    ``retry`` delay and gets a fresh snapshot.
+    """
+    if 'admin' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized access'}), 403
+
+    subscriber, snapshot = live_feed.subscribe()
+    if subscriber is None:
+        return jsonify({'success': False, 'message': 'Too many live feed subscribers'}), 503
+
+    keepalive = current_app.config.get('LIVE_FEED_KEEPALIVE_SECONDS', 15)
+    closes_at = time.monotonic() + current_app.config.get('LIVE_FEED_MAX_STREAM_SECONDS', 300)
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+            while True:
+                remaining = closes_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event = subscriber.get(timeout=min(keepalive, remaining))
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ': keepalive\n\n'
+                    continue
+                if event is None:
+                    break
+                yield f"id: {event['seq']}\nevent: checkin\ndata: {json.dumps(event)}\n\n"
+        finally:
+            live_feed.unsubscribe(subscriber)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @admin_bp.route('/test', methods=['GET'])
 def test_endpoint():
     return jsonify({"message": "Admin blueprint is working correctly!"})
@@ -1071,42 +1072,12 @@ def manage_courses():
         return jsonify({'success': False, 'message': 'Unauthorized access'}), 401
 
     if request.method == 'POST':
-        try:
-            course_name = request.form.get('course_name')
-            if not course_name:
-                return jsonify({'success': False, 'message': 'Course name is required'}), 400
-
-            # Check if course already exists
-            existing_course = Course.query.filter_by(course_name=course_name).first()
-            if existing_course:
-                return jsonify({'success': False, 'message': 'Course already exists'}), 400
-
-            # Create new course
-            new_course = Course(course_name=course_name)
-            db.session.add(new_course)
-            db.session.commit()
-
-            current_app.logger.info(f"Added new course: {course_name}")
-            return jsonify({'success': True, 'message': 'Course added successfully', 'course': new_course.to_dict()})
-
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error adding course: {str(e)}")
-            return jsonify({'success': False, 'message': f'Error adding course: {str(e)}'}), 500
+        payload, status = add_course(request.form.get('course_name'))
+        return jsonify(payload), status
 
     # GET request - return courses data
     try:
-        courses = Course.query.all()
-        courses_data = []
-
-        for course in courses:
-            student_count = Student.query.filter_by(course_id=course.id).count()
-            course_dict = course.to_dict()
-            course_dict['student_count'] = student_count
-            courses_data.append(course_dict)
-
-        current_app.logger.debug(f"Returning {len(courses_data)} courses")
-        return render_template('admin_new/ae_manage_courses.html', courses=courses_data)
+        return render_template('admin_new/ae_manage_courses.html', courses=list_courses())
     except Exception as e:
         current_app.logger.error(f"Error loading courses: {str(e)}")
         flash(f"Error loading courses: {str(e)}", 'danger')
@@ -1118,74 +1089,34 @@ def edit_course(course_id):
     if 'admin' not in session:
         return jsonify({'success': False, 'message': 'Unauthorized access'}), 403
 
-    course = Course.query.get_or_404(course_id)
-
     if request.method == 'POST':
-        try:
-            course_name = request.form.get('course_name')
-            if not course_name:
-                return jsonify({'success': False, 'message': 'Course name is required'}), 400
-
-            # Check if another course with the same name exists
-            existing_course = Course.query.filter(
-                Course.course_name == course_name,
-                Course.id != course_id
-            ).first()
-
-            if existing_course:
-                return jsonify({'success': False, 'message': 'Course name already exists'}), 400
+        payload, status = update_course(course_id, request.form.get('course_name'))
+        return jsonify(payload), status
 
-            course.course_name = course_name
-            db.session.commit()
-
-            return jsonify({'success': True, 'message': 'Course updated successfully!'})
-
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error updating course: {str(e)}")
-            return jsonify({'success': False, 'message': f'Error updating course: {str(e)}'}), 500
-
-    # GET request - get course data and enrolled students
+    # GET request - get course data and enrolled students (the page only shows locations)
     try:
-        enrolled_students = Student.query.filter_by(course_id=course.id).all()
-        students_data = [student.to_dict() for student in enrolled_students]
-
-        return render_template('admin_new/ae_edit_course.html',
-                             course=course.to_dict(),
-                             enrolled_students=students_data)
+        detail = get_course_detail(course_id, Student.parse_include(request.args.get('include'), default=('location',)))
     except Exception as e:
         current_app.logger.error(f"Error loading course data: {str(e)}")
         flash(f"Error loading course data: {str(e)}", 'danger')
         return redirect(url_for('admin.manage_courses'))
 
+    if detail is None:
+        abort(404)
+
+    course, students_data = detail
+    return render_template('admin_new/ae_edit_course.html',
+                         course=course,
+                         enrolled_students=students_data)
+
 @admin_bp.route('/admin/delete_course/<int:course_id>', methods=['DELETE'])
 @admin_required
 def delete_course(course_id):
     if 'admin' not in session:
         return jsonify({'success': False, 'message': 'Unauthorized access'}), 403
 
-    try:
-        course = Course.query.get(course_id)
-        if not course:
-            return jsonify({'success': False, 'message': 'Course not found'}), 404
-
-        # Check if there are students enrolled in this course
-        student_count = Student.query.filter_by(course_id=course_id).count()
-        if student_count > 0:
-            return jsonify({'success': False, 'message': f'Cannot delete course. {student_count} students are enrolled in this course.'}), 400
-
-        # Create backup before deletion
-        backup_deleted_records('Course', [course])
-
-        db.session.delete(course)
-        db.session.commit()
-
-        return jsonify({'success': True, 'message': f'Course "{course.course_name}" deleted successfully'}), 200
-
-    except Exception as e:
-        db.session.rollback()
-        current_app.logger.error(f"Error deleting course: {str(e)}")
-        return jsonify({'success': False, 'message': f'Error deleting course: {str(e)}'}), 500
+    payload, status = delete_course_record(course_id)
+    return jsonify(payload), status
 
 @admin_bp.route('/admin/course_students/<int:course_id>', methods=['GET'])
 @admin_required
@@ -1195,28 +1126,41 @@ def get_course_students(course_id):
         return jsonify({'success': False, 'message': 'Unauthorized access'}), 403
 
     try:
-        course = Course.query.get_or_404(course_id)
-        students = Student.query.filter_by(course_id=course_id).all()
+        include = Student.parse_include(request.args.get('include'))
+        etag = make_etag(
+            'course_students',
+            DataVersion.current('students', 'courses', 'attendance'),
+            course_id,
+            include
+        )
+        if is_not_modified(etag):
+            return not_modified(etag)
 
-        students_data = []
-        for student in students:
-            student_data = student.to_dict()
+        course = Course.query.get_or_404(course_id)
+        students_data = Student.serialize_many(Student.query.filter_by(course_id=course_id), include)
+
+        # Most recent visit of every student in the course, in one grouped query
+        last_visits = dict(
+            db.session.query(Attendance.student_id, db.func.max(Attendance.check_in_time))
+            .join(Student, Student.id == Attendance.student_id)
+            .filter(Student.course_id == course_id)
+            .group_by(Attendance.student_id)
+            .all()
+        )
+
+        for student_data in students_data:
             # Add recent attendance info
-            recent_attendance = Attendance.query.filter_by(student_id=student.id)\
-                .order_by(Attendance.check_in_time.desc()).first()
-
-            if recent_attendance:
-                student_data['last_visit'] = recent_attendance.check_in_time.isoformat()
-            else:
-                student_data['last_visit'] = None
+            last_visit = last_visits.get(student_data['id'])
+            if isinstance(last_visit, str):
+                # SQLite returns aggregates over DATETIME columns as plain strings
+                last_visit = datetime.fromisoformat(last_visit)
+            student_data['last_visit'] = last_visit.isoformat() if last_visit else None
 
-            students_data.append(student_data)
-
-        return jsonify({
+        return with_validators(jsonify({
             'success': True,
             'course': course.to_dict(),
             'students': students_data
-        })
+        }), etag)
 
     except Exception as e:
         current_app.logger.error(f"Error getting course students: {str(e)}")
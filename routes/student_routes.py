@@ -1,78 +1,103 @@
-import datetime
-from models import db
-from flask import request, jsonify, current_app
+import hmac
+import json
+from flask import request, jsonify, current_app, Response, session, stream_with_context
 from routes import student_bp
-from models.student import Student
-from models.attendance import Attendance
+from services.checkin import check_in, parse_offline_batch, ingest_offline_checkins
+from services.attendance_changes import decode_cursor, cursor_is_current, get_changes, iter_changes
 
 @student_bp.route('/', methods=['GET', 'POST'])
 def login():
-    student = None
-    message = None
-    success = True
-
     if request.method == 'POST':
-        try:
-            student_id = request.form['id']
-            current_app.logger.info(f"Student ID entered: {student_id}")
+        return jsonify(check_in(request.form.get('id')))
 
-            student = Student.query.filter_by(id=student_id).first()
+    return jsonify({
+        'success': True,
+        'message': None,
+        'student': None
+    })
 
-            if student:
-                # Check if student has already logged in today
-                today_start = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                today_end = today_start + datetime.timedelta(days=1)
+@student_bp.route('/checkins/bulk', methods=['POST'])
+def bulk_checkins():
+    """
+    Replay scans queued by a kiosk while it was offline.
 
-                existing_attendance = Attendance.query.filter(
-                    Attendance.student_id == student.id,
-                    Attendance.check_in_time >= today_start,
-                    Attendance.check_in_time < today_end
-                ).first()
+    Accepts a JSON array or NDJSON of ``{student_id, scanned_at}`` records
+    and streams back one NDJSON result line per record, followed by a
+    summary line. Answers 503 when the batch could not be committed, so
+    the kiosk keeps the whole batch for its next sync.
+    """
+    token = current_app.config.get('KIOSK_SYNC_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('X-Kiosk-Token', ''), token):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
 
-                if existing_attendance:
-                    # Student already logged in today
-                    success = False
-                    login_time = existing_attendance.check_in_time.strftime('%I:%M %p')
-                    message = f'You have already logged in today at {login_time}. Only one login per day is allowed.'
-                    student_data = None
-                    current_app.logger.info(f"Student {student_id} attempted duplicate login - already logged in at {login_time}")
-                else:
-                    # Create new attendance record for today
-                    new_attendance = Attendance(
-                        student_id=student.id,
-                        check_in_time=datetime.datetime.now()
-                    )
-                    db.session.add(new_attendance)
-                    db.session.commit()
+    try:
+        records = parse_offline_batch(request.get_data())
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Invalid batch: {str(e)}'}), 400
 
-                    student_data = student.to_dict()
-                    if hasattr(student, 'course') and student.course and 'course' not in student_data:
-                        student_data['course'] = {
-                            'id': student.course.id,
-                            'course_name': student.course.course_name
-                        }
+    max_records = current_app.config.get('OFFLINE_CHECKIN_MAX_RECORDS', 10000)
+    if len(records) > max_records:
+        return jsonify({'success': False, 'message': f'Batch too large (max {max_records} records)'}), 413
 
-                    current_app.logger.info(f"Student {student_id} logged in successfully for the first time today")
-            else:
-                success = False
-                message = 'No student ID number found. Please try again.'
-                student_data = None
-                current_app.logger.warning(f"Student ID {student_id} not found in database")
+    results = ingest_offline_checkins(records)
+    # The batch transaction failed (e.g. database is locked): the kiosk keeps its scans
+    status = 503 if any(result['status'] == 'error' for result in results) else 200
 
-        except Exception as e:
-            db.session.rollback()
-            success = False
-            message = f'An error occurred during login: {str(e)}'
-            student_data = None
-            current_app.logger.error(f"Error during student login: {str(e)}", exc_info=True)
+    def generate():
+        counts = {}
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+            yield json.dumps(result) + '\n'
+        yield json.dumps({'summary': True, 'total': len(results), 'counts': counts}) + '\n'
 
-    else:
-        success = True
-        message = None
-        student_data = None
+    return Response(generate(), status=status, mimetype='application/x-ndjson')
 
-    return jsonify({
-        'success': success,
-        'message': message,
-        'student': student_data
-    })
\ No newline at end of file
+@student_bp.route('/attendance/changes', methods=['GET'])
+def attendance_changes():
+    """
+    Check-ins inserted after a cursor, for mirroring attendance elsewhere.
+
+    Query parameters: ``after`` (cursor from the previous page; omit it to
+    start from the first check-in), ``limit`` (page size, at most
+    ``ATTENDANCE_CHANGES_MAX_PAGE``) and ``format=ndjson`` (or an
+    ``application/x-ndjson`` Accept header) to stream one JSON line per
+    check-in followed by a ``next_cursor`` line. Pages are read by keyset
+    on the primary key, so each costs only the rows it returns.
+
+    Requires ``X-Sync-Token`` when ``ATTENDANCE_SYNC_TOKEN`` is set, or an
+    admin session.
+    """
+    token = current_app.config.get('ATTENDANCE_SYNC_TOKEN')
+    has_token = token and hmac.compare_digest(request.headers.get('X-Sync-Token', ''), token)
+    if not has_token and 'admin' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    max_page = current_app.config.get('ATTENDANCE_CHANGES_MAX_PAGE', 5000)
+    limit = request.args.get('limit', type=int) or current_app.config.get('ATTENDANCE_CHANGES_PAGE_SIZE', 500)
+    if not 1 <= limit <= max_page:
+        return jsonify({'success': False, 'message': f'Limit must be between 1 and {max_page}'}), 400
+
+    cursor = request.args.get('after') or None
+    after_id = 0
+    if cursor:
+        try:
+            after_id, check_in_time = decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        if not cursor_is_current(after_id, check_in_time):
+            return jsonify({
+                'success': False,
+                'message': 'Cursor no longer matches the attendance table; resync from a full export'
+            }), 410
+
+    try:
+        if request.args.get('format') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+            lines = iter_changes(after_id, limit, cursor)
+            return Response(
+                stream_with_context(json.dumps(line) + '\n' for line in lines),
+                mimetype='application/x-ndjson'
+            )
+        return jsonify({'success': True, **get_changes(after_id, limit, cursor)})
+    except Exception as e:
+        current_app.logger.error(f"Error reading attendance changes: {str(e)}")
+        return jsonify({'success': False, 'message': 'Error reading attendance changes'}), 500
@@ -8,5 +8,7 @@ if __name__ == "__main__":
     # Get HOST from environment variable with fallback to 0.0.0.0 (from .env)
     host = os.environ.get("HOST", "0.0.0.0")
 
+    threads = app.config['WEB_THREADS']
+
     print(f"Starting server on {host}:{port}")
-    serve(app, host=host, port=port)
\ No newline at end of file
+    serve(app, host=host, port=port, threads=threads)
\ No newline at end of file
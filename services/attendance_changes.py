@@ -0,0 +1,120 @@
+import base64
+import datetime
+from models import db
+from models.attendance import Attendance
+from utils.row_batches import iter_row_batches
+
+# Rows fetched per round trip while streaming NDJSON
+STREAM_CHUNK_ROWS = 500
+
+def encode_cursor(attendance_id, check_in_time):
+    """Opaque cursor pointing just after a check-in"""
+    raw = f"{attendance_id}:{check_in_time.isoformat()}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    ``(attendance_id, check_in_time)`` of a cursor from ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        attendance_id, check_in_time = raw.split(':', 1)
+        return int(attendance_id), datetime.datetime.fromisoformat(check_in_time)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+def cursor_is_current(attendance_id, check_in_time):
+    """
+    Whether a cursor still points into this attendance table.
+
+    The check-in it names must still be there with the same time, or be
+    below the highest id (deleted since). Otherwise the table was restored
+    or its ids reused, so rows after the cursor may have been skipped and
+    the mirror has to resync from a full export.
+    """
+    row = db.session.execute(
+        db.select(Attendance.check_in_time).where(Attendance.id == attendance_id)
+    ).first()
+    if row is not None:
+        return row.check_in_time == check_in_time
+    last_id = db.session.execute(db.select(db.func.max(Attendance.id))).scalar()
+    return last_id is not None and attendance_id < last_id
+
+def _change(row):
+    attendance_id, student_id, check_in_time, attendance_day, _ = row
+    return {
+        'id': attendance_id,
+        'student_id': student_id,
+        'check_in_time': check_in_time.isoformat(),
+        'attendance_day': attendance_day.isoformat()
+    }
+
+def _changes_after(after_id, limit):
+    return Attendance.changes_after(after_id, limit, db.engine.dialect.name)
+
+def get_changes(after_id, limit, cursor=None):
+    """
+    One page of check-ins inserted after ``after_id``.
+
+    The page ends before the first check-in whose transaction is not yet
+    settled (see ``Attendance.changes_after``), so a cursor never moves past
+    an id that could still commit: every check-in is delivered exactly once,
+    in id order, at the cost of a short delay while older transactions run.
+
+    Args:
+        after_id (int): Id from the cursor (0 for the start)
+        limit (int): Page size
+        cursor (str, optional): The request cursor, returned again when
+            there are no new rows
+
+    Returns:
+        dict: ``changes``, ``next_cursor`` and ``has_more``
+    """
+    rows = db.session.execute(_changes_after(after_id, limit + 1)).all()
+    settled = next((index for index, row in enumerate(rows) if not row.settled), len(rows))
+    has_more = settled > limit
+    rows = rows[:min(settled, limit)]
+    return {
+        'changes': [_change(row) for row in rows],
+        'next_cursor': encode_cursor(rows[-1].id, rows[-1].check_in_time) if rows else cursor,
+        'has_more': has_more
+    }
+
+def iter_changes(after_id, limit, cursor=None):
+    """
+    The page of ``get_changes`` as NDJSON-ready dicts, fetched in chunks.
+
+    The query runs before this returns, so errors surface to the caller.
+    Rows are read with ``iter_row_batches``, so a slow client does not hold
+    SQLite's lock.
+
+    Returns:
+        generator: One dict per check-in, then a trailer with
+        ``next_cursor`` and ``has_more``
+    """
+    batches = iter_row_batches(_changes_after(after_id, limit + 1), STREAM_CHUNK_ROWS)
+
+    def generate():
+        last = None
+        sent = 0
+        has_more = False
+        for row in (row for batch in batches for row in batch):
+            if not row[4]:
+                break
+            if sent == limit:
+                has_more = True
+                break
+            yield _change(row)
+            last = row
+            sent += 1
+        # Release the cursor (or spool file) now rather than when collected
+        batches.close()
+        yield {
+            'next_cursor': encode_cursor(last[0], last[2]) if last else cursor,
+            'has_more': has_more
+        }
+
+    return generate()
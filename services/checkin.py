@@ -0,0 +1,255 @@
+import datetime
+import json
+from flask import current_app
+from models import db
+from models.student import Student
+from models.attendance import Attendance, time_columns
+from models.attendance_rollup import AttendanceDailyRollup
+from models.place_rollup import AttendancePlaceRollup
+from models.data_version import DataVersion
+from utils.roster_cache import roster_cache
+from utils.checkin_registry import daily_checkins
+from utils.attendance_writer import attendance_writer
+from utils.live_feed import live_feed
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+_ID_CHUNK_SIZE = 500
+
+def check_in(student_id):
+    """
+    Check a student in at the kiosk.
+
+    Args:
+        student_id (str): The scanned or typed student ID
+
+    Returns:
+        dict: Kiosk payload with ``success``, ``message`` and ``student`` keys
+    """
+    success = True
+    message = None
+    student_data = None
+
+    try:
+        student_id = (student_id or '').strip()
+        current_app.logger.info(f"Student ID entered: {student_id}")
+
+        # Kiosk view of the student, served from the per-worker roster cache
+        student = roster_cache.get(student_id) if student_id else None
+
+        if student:
+            # Students known to have checked in today are answered from memory;
+            # otherwise a single INSERT ... ON CONFLICT DO NOTHING decides
+            first_login = daily_checkins.peek(student['id'])
+
+            if first_login is None:
+                check_in_time = datetime.datetime.now()
+                # Returns once the group-commit writer has made the row durable
+                if attendance_writer.submit(student['id'], check_in_time):
+                    daily_checkins.record(student['id'], check_in_time)
+                    live_feed.publish(student, check_in_time)
+                    student_data = student
+                    current_app.logger.info(f"Student {student_id} logged in successfully for the first time today")
+                else:
+                    # Lost the race to another kiosk or worker for today's row
+                    existing = Attendance.get_today_login(student['id'])
+                    first_login = existing.check_in_time if existing else check_in_time
+                    daily_checkins.record(student['id'], first_login)
+
+            if first_login is not None:
+                # Student already logged in today
+                success = False
+                login_time = first_login.strftime('%I:%M %p')
+                message = f'You have already logged in today at {login_time}. Only one login per day is allowed.'
+                current_app.logger.info(f"Student {student_id} attempted duplicate login - already logged in at {login_time}")
+        else:
+            success = False
+            message = 'No student ID number found. Please try again.'
+            current_app.logger.warning(f"Student ID {student_id} not found in database")
+
+    except Exception as e:
+        db.session.rollback()
+        success = False
+        message = f'An error occurred during login: {str(e)}'
+        student_data = None
+        current_app.logger.error(f"Error during student login: {str(e)}", exc_info=True)
+
+    return {
+        'success': success,
+        'message': message,
+        'student': student_data
+    }
+
+def parse_offline_batch(raw_body):
+    """
+    Parse a batch of queued kiosk scans.
+
+    Accepts either a JSON array or NDJSON (one JSON object per line).
+
+    Returns:
+        list: One entry per record; unparseable NDJSON lines become ``None``
+    """
+    text = raw_body.decode('utf-8') if isinstance(raw_body, bytes) else raw_body
+    text = text.strip()
+    if not text:
+        return []
+
+    if text.startswith('['):
+        records = json.loads(text)
+        if not isinstance(records, list):
+            raise ValueError('Expected a JSON array of check-ins')
+        return records
+
+    records = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            records.append(None)
+    return records
+
+def ingest_offline_checkins(records):
+    """
+    Apply a batch of offline kiosk scans in a single transaction.
+
+    Each record is ``{"student_id": ..., "scanned_at": <ISO 8601>}``. The
+    one-login-per-day rule is applied per record against the database and
+    against earlier records in the same batch.
+
+    Args:
+        records (list): Parsed records, as returned by ``parse_offline_batch``
+
+    Returns:
+        list: One result dict per record, in input order
+    """
+    results = []
+    candidates = []
+    now = datetime.datetime.now()
+    max_skew = datetime.timedelta(minutes=current_app.config.get('OFFLINE_CHECKIN_MAX_SKEW_MINUTES', 5))
+
+    for index, record in enumerate(records):
+        result = {'index': index, 'student_id': None, 'status': 'invalid', 'message': None}
+        results.append(result)
+
+        if not isinstance(record, dict):
+            result['message'] = 'Record is not a JSON object'
+            continue
+
+        student_id = str(record.get('student_id') or '').strip()
+        result['student_id'] = student_id or None
+        if not student_id:
+            result['message'] = 'Missing student_id'
+            continue
+
+        try:
+            scanned_at = _parse_scanned_at(record.get('scanned_at'))
+        except (TypeError, ValueError):
+            result['message'] = 'Invalid or missing scanned_at'
+            continue
+
+        if scanned_at > now + max_skew:
+            result['message'] = 'scanned_at is in the future'
+            continue
+
+        candidates.append((result, student_id, scanned_at))
+
+    if not candidates:
+        return results
+
+    # Look up known students and existing check-in days with one query per chunk
+    student_ids = list({student_id for _, student_id, _ in candidates})
+    first_day = min(scanned_at for _, _, scanned_at in candidates).date()
+    last_day = max(scanned_at for _, _, scanned_at in candidates).date()
+
+    known_students = set()
+    checked_in = {}
+    for chunk_start in range(0, len(student_ids), _ID_CHUNK_SIZE):
+        chunk = student_ids[chunk_start:chunk_start + _ID_CHUNK_SIZE]
+        known_students.update(
+            row[0] for row in db.session.query(Student.id).filter(Student.id.in_(chunk))
+        )
+        existing = db.session.query(
+            Attendance.student_id,
+            Attendance.attendance_day,
+            Attendance.check_in_time
+        ).filter(
+            Attendance.student_id.in_(chunk),
+            Attendance.attendance_day >= first_day,
+            Attendance.attendance_day <= last_day
+        )
+        for existing_id, existing_day, existing_time in existing:
+            checked_in[(existing_id, existing_day)] = existing_time
+
+    rows = []
+    pending = {}
+    for result, student_id, scanned_at in candidates:
+        if student_id not in known_students:
+            result['status'] = 'unknown_student'
+            result['message'] = 'No student ID number found'
+            continue
+
+        key = (student_id, scanned_at.date())
+        if key in checked_in:
+            result['status'] = 'duplicate'
+            result['message'] = f'Already logged in on {key[1].isoformat()} at {checked_in[key].strftime("%I:%M %p")}'
+            continue
+
+        checked_in[key] = scanned_at
+        pending[key] = result
+        rows.append({'student_id': student_id, 'check_in_time': scanned_at, **time_columns(scanned_at)})
+        result['status'] = 'inserted'
+        result['check_in_time'] = scanned_at.isoformat()
+
+    inserted = set()
+    if rows:
+        try:
+            # Rows that lost a race with a live kiosk check-in are skipped by the unique key
+            statement = Attendance.insert_once_per_day(db.engine.dialect.name)
+            inserted = {
+                (row.student_id, row.attendance_day)
+                for row in db.session.execute(statement, rows).all()
+            }
+            AttendanceDailyRollup.record_checkins(db.session, list(inserted))
+            AttendancePlaceRollup.record_checkins(db.session, list(inserted))
+            if inserted:
+                DataVersion.bump(db.session, 'attendance')
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Offline check-in batch failed: {str(e)}", exc_info=True)
+            for result in results:
+                if result['status'] == 'inserted':
+                    result['status'] = 'error'
+                    result['message'] = f'Batch insert failed: {str(e)}'
+                    result.pop('check_in_time', None)
+            return results
+
+        published = []
+        for row in rows:
+            key = (row['student_id'], row['attendance_day'])
+            if key in inserted:
+                daily_checkins.record(row['student_id'], row['check_in_time'])
+                published.append(row)
+            else:
+                result = pending[key]
+                result['status'] = 'duplicate'
+                result['message'] = f'Already logged in on {key[1].isoformat()}'
+                result.pop('check_in_time', None)
+
+        # Replayed scans reach the live feed in the order they were made
+        for row in sorted(published, key=lambda row: row['check_in_time']):
+            student = roster_cache.get(row['student_id'])
+            if student is not None:
+                live_feed.publish(student, row['check_in_time'])
+
+    current_app.logger.info(f"Offline check-in batch: {len(records)} records, {len(inserted)} inserted")
+    return results
+
+def _parse_scanned_at(value):
+    scanned_at = datetime.datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    if scanned_at.tzinfo is not None:
+        # Kiosks send UTC; attendance times are stored in server local time
+        scanned_at = scanned_at.astimezone().replace(tzinfo=None)
+    return scanned_at
@@ -0,0 +1,140 @@
+from flask import current_app
+from sqlalchemy.orm import selectinload
+from models import db
+from models.course import Course
+from models.student import Student
+from utils.backup import backup_deleted_records
+from utils.roster_cache import roster_cache
+
+def list_courses():
+    """Return all courses with their enrolled student counts"""
+    # One grouped COUNT instead of a count query per course
+    student_counts = dict(
+        db.session.query(Student.course_id, db.func.count(Student.id))
+        .group_by(Student.course_id)
+        .all()
+    )
+
+    courses = Course.query.options(selectinload(Course.managed_by)).all()
+    courses_data = []
+
+    for course in courses:
+        course_dict = course.to_dict()
+        course_dict['student_count'] = student_counts.get(course.id, 0)
+        courses_data.append(course_dict)
+
+    current_app.logger.debug(f"Returning {len(courses_data)} courses")
+    return courses_data
+
+def add_course(course_name):
+    """
+    Create a new course.
+
+    Returns:
+        tuple: (JSON payload, HTTP status code)
+    """
+    try:
+        if not course_name:
+            return {'success': False, 'message': 'Course name is required'}, 400
+
+        # Check if course already exists
+        existing_course = Course.query.filter_by(course_name=course_name).first()
+        if existing_course:
+            return {'success': False, 'message': 'Course already exists'}, 400
+
+        # Create new course
+        new_course = Course(course_name=course_name)
+        db.session.add(new_course)
+        db.session.commit()
+
+        current_app.logger.info(f"Added new course: {course_name}")
+        return {'success': True, 'message': 'Course added successfully', 'course': new_course.to_dict()}, 200
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error adding course: {str(e)}")
+        return {'success': False, 'message': f'Error adding course: {str(e)}'}, 500
+
+def get_course_detail(course_id, include=Student.RELATIONS):
+    """
+    Get a course and its enrolled students.
+
+    Args:
+        course_id (int): Course to load
+        include (tuple, optional): Student relations to embed
+
+    Returns:
+        tuple: (course dict, list of student dicts), or None if the course does not exist
+    """
+    course = Course.query.get(course_id)
+    if not course:
+        return None
+
+    students_data = Student.serialize_many(Student.query.filter_by(course_id=course.id), include)
+    return course.to_dict(), students_data
+
+def update_course(course_id, course_name):
+    """
+    Rename a course.
+
+    Returns:
+        tuple: (JSON payload, HTTP status code)
+    """
+    course = Course.query.get(course_id)
+    if not course:
+        return {'success': False, 'message': 'Course not found'}, 404
+
+    try:
+        if not course_name:
+            return {'success': False, 'message': 'Course name is required'}, 400
+
+        # Check if another course with the same name exists
+        existing_course = Course.query.filter(
+            Course.course_name == course_name,
+            Course.id != course_id
+        ).first()
+
+        if existing_course:
+            return {'success': False, 'message': 'Course name already exists'}, 400
+
+        course.course_name = course_name
+        db.session.commit()
+        # The course name is embedded in every cached kiosk view
+        roster_cache.invalidate()
+
+        return {'success': True, 'message': 'Course updated successfully!'}, 200
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error updating course: {str(e)}")
+        return {'success': False, 'message': f'Error updating course: {str(e)}'}, 500
+
+def delete_course(course_id):
+    """
+    Delete a course that has no enrolled students.
+
+    Returns:
+        tuple: (JSON payload, HTTP status code)
+    """
+    try:
+        course = Course.query.get(course_id)
+        if not course:
+            return {'success': False, 'message': 'Course not found'}, 404
+
+        # Check if there are students enrolled in this course
+        student_count = Student.query.filter_by(course_id=course_id).count()
+        if student_count > 0:
+            return {'success': False, 'message': f'Cannot delete course. {student_count} students are enrolled in this course.'}, 400
+
+        # Create backup before deletion
+        backup_deleted_records('Course', [course])
+
+        db.session.delete(course)
+        db.session.commit()
+
+        return {'success': True, 'message': f'Course "{course.course_name}" deleted successfully'}, 200
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error deleting course: {str(e)}")
+        return {'success': False, 'message': f'Error deleting course: {str(e)}'}, 500
@@ -0,0 +1,342 @@
+from datetime import date, datetime, timedelta
+import numpy as np
+from flask import current_app
+from models import db
+from models.course import Course
+from models.student import Student
+from models.attendance import Attendance
+from models.attendance_rollup import AttendanceDailyRollup
+from models.place_rollup import AttendancePlaceRollup
+from utils.dashboard_cache import dashboard_cache
+from utils.academic_year import academic_year_start_month, academic_year_of, academic_year_bounds, academic_month_labels
+from services.forecast import get_forecast
+
+def resolve_date_range(filter_type, start_date_str=None, end_date_str=None):
+    """Translate a dashboard filter (or custom dates) into a datetime range"""
+    today = datetime.now()
+
+    # Determine date range based on filter or custom dates
+    if start_date_str and end_date_str and filter_type == 'custom':
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+        # Set end_date to end of day
+        end_date = end_date.replace(hour=23, minute=59, second=59)
+    elif filter_type == 'weekly':
+        start_date = today - timedelta(weeks=1)
+        end_date = today
+    elif filter_type == 'monthly':
+        start_date = today - timedelta(weeks=4)
+        end_date = today
+    elif filter_type == 'yearly':
+        start_date = today - timedelta(weeks=52)
+        end_date = today
+    else:
+        start_date = today - timedelta(weeks=1)
+        end_date = today
+
+    return start_date, end_date
+
+# Dashboard filters that are precomputed on every load, so switching between them needs no request
+PRESETS = ('weekly', 'monthly', 'yearly')
+
+def aggregate_windows(windows):
+    """
+    Compute the dashboard breakdowns for several date windows in one pass.
+
+    The daily course rollup and the municipality level of the place rollup
+    are each read once for the span covering every window, and each bucket
+    is added to all the windows that contain its day.
+
+    Args:
+        windows (dict): Window name to ``(start_date, end_date)`` datetimes
+
+    Returns:
+        dict: Window name to ``weekly_course_visits`` (every course, Sunday
+        first), ``place_visits`` (municipalities, busiest first) and
+        ``visits`` (unique daily logins)
+    """
+    day_ranges = {name: (start.date(), end.date()) for name, (start, end) in windows.items()}
+    course_names = [course.course_name for course in Course.query.order_by(Course.id)]
+
+    results = {}
+    for name in day_ranges:
+        results[name] = {
+            # Get all courses first to ensure all are included in chart data
+            'weekly_course_visits': {course_name: [0, 0, 0, 0, 0, 0, 0] for course_name in course_names},
+            'municipalities': {},
+            'visits': 0
+        }
+
+    first_day = min(start for start, _ in day_ranges.values())
+    last_day = max(end for _, end in day_ranges.values())
+    buckets = AttendanceDailyRollup.buckets_between(first_day, last_day)
+    current_app.logger.debug(f"Aggregating {len(buckets)} rollup buckets into {len(windows)} windows")
+
+    for day, course_name, _, visits in buckets:
+        # date.weekday() is Monday=0; the charts start the week on Sunday
+        weekday = (day.weekday() + 1) % 7
+        for name, (start, end) in day_ranges.items():
+            if not start <= day <= end:
+                continue
+            result = results[name]
+            result['visits'] += visits
+            if course_name in result['weekly_course_visits']:
+                result['weekly_course_visits'][course_name][weekday] += visits
+
+    for day, province, municipality, _, visits in AttendancePlaceRollup.visits_between('municipality', first_day, last_day):
+        if not municipality:
+            continue
+        for name, (start, end) in day_ranges.items():
+            if start <= day <= end:
+                municipalities = results[name]['municipalities']
+                municipalities[(province, municipality)] = municipalities.get((province, municipality), 0) + visits
+
+    for result in results.values():
+        municipalities = result.pop('municipalities')
+        result['place_visits'] = [
+            {"municipality": municipality, "province": province, "visits": visits}
+            for (province, municipality), visits in sorted(municipalities.items(), key=lambda item: item[1], reverse=True)
+        ]
+    return results
+
+def get_weekly_course_visits(start_date, end_date):
+    """Visits per course and weekday (Sunday first) between two datetimes, for every course"""
+    return aggregate_windows({'range': (start_date, end_date)})['range']['weekly_course_visits']
+
+def get_monthly_course_visits(academic_year):
+    """
+    Visits per course and month over one academic year.
+
+    One grouped read of the daily rollup returns a row per course and
+    month with visits; the rows are scattered into a courses x 12 array
+    with ``numpy.bincount`` so every course gets all twelve months.
+
+    Args:
+        academic_year (int): Calendar year the academic year starts in
+
+    Returns:
+        dict: Course name to 12 visit counts, in ``academic_month_labels()`` order
+    """
+    start_day, end_day = academic_year_bounds(academic_year)
+    courses = Course.query.with_entities(Course.id, Course.course_name).order_by(Course.id).all()
+    course_ids = np.array([course_id for course_id, _ in courses], dtype=np.int64)
+
+    rows = np.array(AttendanceDailyRollup.visits_by_course_month(start_day, end_day), dtype=np.int64).reshape(-1, 3)
+    # Visits of students without a course, or of deleted courses, have no series
+    positions = np.searchsorted(course_ids, rows[:, 0])
+    known = positions < len(course_ids)
+    known[known] = course_ids[positions[known]] == rows[known, 0]
+    rows, positions = rows[known], positions[known]
+
+    slots = (rows[:, 1] - academic_year_start_month()) % 12
+    counts = np.bincount(
+        positions * 12 + slots,
+        weights=rows[:, 2],
+        minlength=len(course_ids) * 12
+    ).astype(np.int64).reshape(len(course_ids), 12)
+
+    return {course_name: counts[index].tolist() for index, (_, course_name) in enumerate(courses)}
+
+def get_cached_monthly_course_visits(academic_year=None):
+    """
+    ``get_monthly_course_visits`` served from the per-worker dashboard cache.
+
+    Args:
+        academic_year (int, optional): Defaults to the current academic year
+
+    Returns:
+        dict: ``academic_year``, ``months`` (labels) and ``monthly_course_visits``
+    """
+    if academic_year is None:
+        academic_year = academic_year_of(date.today())
+
+    monthly_course_visits, _ = dashboard_cache.get(
+        ('monthly_course_visits', academic_year, academic_year_start_month()),
+        lambda: get_monthly_course_visits(academic_year)
+    )
+    return {
+        'academic_year': academic_year,
+        'months': academic_month_labels(),
+        'monthly_course_visits': monthly_course_visits
+    }
+
+def get_dashboard_data(filter_type='weekly', start_date_str=None, end_date_str=None, include=Student.RELATIONS):
+    """
+    Compute the admin dashboard statistics.
+
+    Args:
+        filter_type (str): weekly, monthly, yearly or custom
+        start_date_str (str, optional): Custom range start (YYYY-MM-DD)
+        end_date_str (str, optional): Custom range end (YYYY-MM-DD)
+        include (tuple, optional): Student relations to embed in logged_in_users
+
+    Returns:
+        dict: JSON-ready dashboard payload
+    """
+    today = datetime.now()
+    start_date, end_date = resolve_date_range(filter_type, start_date_str, end_date_str)
+
+    # Log the filter type and date range for debugging
+    current_app.logger.debug(f"Filter: {filter_type}, Date range: {start_date} to {end_date}")
+
+    # Every window the page needs, computed from one read of the daily rollup
+    month_start = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    prev_month_end = month_start - timedelta(days=1)
+    prev_month_start = prev_month_end.replace(day=1)
+    windows = {preset: resolve_date_range(preset) for preset in PRESETS}
+    windows['selected'] = (start_date, end_date)
+    windows['this_month'] = (month_start, today)
+    windows['last_month'] = (prev_month_start, prev_month_end)
+    aggregates = aggregate_windows(windows)
+
+    weekly_course_visits = aggregates['selected']['weekly_course_visits']
+
+    # Log final chart data
+    current_app.logger.debug(f"Final weekly_course_visits: {weekly_course_visits}")
+
+    # Get place visits data
+    place_visits = aggregates['selected']['place_visits']
+
+    # Get recent logins (students who logged in within the last 24 hours)
+    # Modified to show only one login per student per day
+    recent_time = today - timedelta(hours=24)
+
+    # Get the most recent login per student per day using subquery approach
+    subquery = db.session.query(
+        Attendance.student_id,
+        Attendance.check_in_date.label('login_date'),
+        db.func.max(Attendance.check_in_time).label('latest_login')
+    ).filter(
+        # The day predicate lets the index narrow the scan before the exact cut-off
+        Attendance.check_in_date >= recent_time.date(),
+        Attendance.check_in_time >= recent_time
+    ).group_by(
+        Attendance.student_id,
+        Attendance.check_in_date
+    ).subquery()
+
+    recent_logins = db.session.query(
+        Attendance,
+        Student
+    ).join(
+        Student, Student.id == Attendance.student_id
+    ).join(
+        subquery,
+        db.and_(
+            Attendance.student_id == subquery.c.student_id,
+            Attendance.check_in_time == subquery.c.latest_login
+        )
+    ).options(
+        *Student.eager(include)
+    ).order_by(
+        db.desc(Attendance.check_in_time)
+    ).limit(10).all()
+
+    logged_in_users = []
+    for attendance, student in recent_logins:
+        logged_in_users.append({
+            'student': student.to_dict(include),
+            'login_time': attendance.check_in_time.isoformat()
+        })
+
+    # Twelve-month series per course for the academic year of the selected range
+    monthly = get_cached_monthly_course_visits(academic_year_of(end_date.date()))
+
+    # Next week's stored forecast (see forecast_visits.py)
+    forecast = get_forecast(today.date())
+
+    # Calculate statistics based on unique daily logins
+    total_visitors = aggregates['selected']['visits']
+
+    # Calculate monthly logins (unique daily logins)
+    total_logins_month = aggregates['this_month']['visits']
+
+    # Calculate percentage increase (simplified)
+    prev_month_logins = aggregates['last_month']['visits'] or 1
+
+    login_percentage_increase = round(
+        ((total_logins_month - prev_month_logins) / prev_month_logins) * 100, 1
+    ) if prev_month_logins > 0 else 0
+
+    # Set icon classes based on increase/decrease
+    if login_percentage_increase >= 0:
+        login_icon_class = 'ti-arrow-up-right text-success'
+        login_bg_class = 'bg-light-success'
+    else:
+        login_icon_class = 'ti-arrow-down-right text-danger'
+        login_bg_class = 'bg-light-danger'
+
+    # Top places logic
+    top_weekly_places = place_visits[:2] if place_visits else []
+
+    if top_weekly_places:
+        top_weekly_place_visits_icon_class = 'ti-arrow-up-left text-success'
+        top_weekly_place_visits_bg_class = 'bg-light-success'
+    else:
+        top_weekly_place_visits_icon_class = 'ti-arrow-down-right text-danger'
+        top_weekly_place_visits_bg_class = 'bg-light-danger'
+
+    return {
+        'success': True,
+        'weekly_course_visits': weekly_course_visits,
+        'logged_in_users': logged_in_users,
+        'total_visitors': total_visitors,
+        'total_logins_month': total_logins_month,
+        'login_percentage_increase': login_percentage_increase,
+        'login_icon_class': login_icon_class,
+        'login_bg_class': login_bg_class,
+        'top_weekly_places': top_weekly_places,
+        'top_weekly_place_visits_icon_class': top_weekly_place_visits_icon_class,
+        'top_weekly_place_visits_bg_class': top_weekly_place_visits_bg_class,
+        'place_visits': place_visits,
+        'monthly_course_visits': monthly['monthly_course_visits'],
+        'academic_year': monthly['academic_year'],
+        'academic_months': monthly['months'],
+        'forecast': forecast,
+        'presets': {
+            preset: {
+                'weekly_course_visits': aggregates[preset]['weekly_course_visits'],
+                'place_visits': aggregates[preset]['place_visits'],
+                'total_visitors': aggregates[preset]['visits'],
+                'start_date': windows[preset][0].isoformat(),
+                'end_date': windows[preset][1].isoformat()
+            }
+            for preset in PRESETS
+        },
+        'filter_type': filter_type,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat()
+    }
+
+def dashboard_cache_key(filter_type='weekly', start_date_str=None, end_date_str=None, include=Student.RELATIONS):
+    """
+    Cache key (and ETag basis) for a dashboard request: filter, whole-day range and includes.
+
+    The payload also has sections relative to today (presets, this and last
+    month, the last 24 hours, the forecast), so the key includes today's
+    date and every key expires at midnight.
+    """
+    start_date, end_date = resolve_date_range(filter_type, start_date_str, end_date_str)
+    return (
+        filter_type, start_date.date().isoformat(), end_date.date().isoformat(), tuple(include),
+        date.today().isoformat()
+    )
+
+def get_cached_dashboard_data(filter_type='weekly', start_date_str=None, end_date_str=None, include=Student.RELATIONS):
+    """
+    ``get_dashboard_data`` served from the per-worker dashboard cache.
+
+    The key snaps the date range to whole days, which is the resolution of
+    the rollup it is computed from.
+
+    Returns:
+        tuple: ``(payload, version)`` where ``payload`` is a shallow copy the
+        caller may modify and ``version`` the data version it reflects
+    """
+    key = dashboard_cache_key(filter_type, start_date_str, end_date_str, include)
+
+    payload, version = dashboard_cache.get(
+        key,
+        lambda: get_dashboard_data(filter_type, start_date_str, end_date_str, include)
+    )
+    return dict(payload), version
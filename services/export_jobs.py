@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta
+from models import db
+from models.attendance import Attendance
+from models.data_version import DataVersion
+from utils.conditional import make_etag
+from utils.columnar_export import COLUMNAR_FORMATS, DATASETS, columnar_export_available, write_attendance_columnar
+from utils.export import export_attendance_columnar, export_attendance_csv, export_attendance_pdf, export_filename, write_attendance_csv, write_attendance_pdf
+from utils.export_jobs import export_jobs
+from utils.time_buckets import day_range
+
+def _write_csv(path, start_date, end_date, course_id, dataset):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        write_attendance_csv(f, start_date, end_date, course_id)
+
+def _write_pdf(path, start_date, end_date, course_id, dataset):
+    with open(path, 'wb') as f:
+        write_attendance_pdf(f, start_date, end_date, course_id)
+
+def _columnar_writer(export_format):
+    def write(path, start_date, end_date, course_id, dataset):
+        write_attendance_columnar(path, export_format, start_date, end_date, course_id, dataset)
+    return write
+
+# Export format to artifact writer
+FORMATS = {
+    'csv': _write_csv,
+    'pdf': _write_pdf,
+    **{export_format: _columnar_writer(export_format) for export_format in COLUMNAR_FORMATS}
+}
+
+def parse_export_range(values):
+    """
+    Date range of the download form (``filter``, ``start_date``, ``end_date``).
+
+    Raises:
+        ValueError: If a custom date cannot be parsed or the range is reversed
+    """
+    filter_type = values.get('filter', 'weekly')
+    today = datetime.now()
+
+    if filter_type == 'weekly':
+        start_date, end_date = today - timedelta(weeks=1), today
+    elif filter_type == 'monthly':
+        start_date, end_date = today - timedelta(weeks=4), today
+    elif filter_type == 'yearly':
+        start_date, end_date = today - timedelta(weeks=52), today
+    else:
+        start_date_str = values.get('start_date')
+        end_date_str = values.get('end_date')
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d') if start_date_str else today - timedelta(weeks=1)
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d') if end_date_str else today
+
+    if start_date.date() > end_date.date():
+        raise ValueError('Start date cannot be later than end date')
+    return start_date, end_date
+
+def export_data_version(start_date, end_date):
+    """
+    Version of everything an attendance export of this range reads.
+
+    The attendance, student and course counters change with every write to
+    those tables, including edits of existing check-ins. Artifacts in
+    ``EXPORT_DIR`` outlive the database, and counters start over after a
+    reset or restore, so the range's number and highest id of check-ins are
+    part of the version too.
+    """
+    count, last_id = db.session.query(
+        db.func.count(Attendance.id),
+        db.func.max(Attendance.id)
+    ).filter(
+        *day_range(start_date, end_date)
+    ).one()
+    return DataVersion.current('attendance', 'students', 'courses'), count, last_id
+
+def parse_export_options(values):
+    """
+    Validated export options of download form values.
+
+    Args:
+        values: Mapping with ``format`` (csv, pdf, parquet or arrow) or the
+            ``export_<format>`` button that submitted the form, ``dataset``
+            (``daily`` logins, or raw ``checkins`` for the columnar
+            formats), ``course`` and the range fields read by
+            ``parse_export_range``
+
+    Returns:
+        tuple: ``(export_format, dataset, start_date, end_date, course_id)``
+
+    Raises:
+        ValueError: For an unknown format or dataset, an invalid range, or a
+            columnar format without pyarrow installed
+    """
+    button = next((name for name in FORMATS if f'export_{name}' in values), 'csv')
+    export_format = values.get('format') or button
+    if export_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    dataset = values.get('dataset') or 'daily'
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+    if export_format in COLUMNAR_FORMATS:
+        if not columnar_export_available():
+            raise ValueError(f"{COLUMNAR_FORMATS[export_format]} export requires the pyarrow package")
+    elif dataset != 'daily':
+        raise ValueError('Raw check-ins can only be exported as Parquet or Arrow IPC')
+
+    start_date, end_date = parse_export_range(values)
+    course_id = (values.get('course') or '').strip()
+    return export_format, dataset, start_date, end_date, course_id
+
+def submit_attendance_export(values):
+    """
+    Queue an attendance export described by download form values.
+
+    Args:
+        values: Download form values, see ``parse_export_options``
+
+    Returns:
+        dict: Job status from ``export_jobs``
+
+    Raises:
+        ValueError: If ``parse_export_options`` rejects the values
+    """
+    export_format, dataset, start_date, end_date, course_id = parse_export_options(values)
+
+    # Exports cover whole days, so the key uses days rather than times
+    job_id = make_etag(
+        'attendance_export',
+        export_format,
+        dataset,
+        start_date.date(),
+        end_date.date(),
+        course_id,
+        export_data_version(start_date, end_date)
+    )
+    write = FORMATS[export_format]
+    return export_jobs.submit(
+        job_id,
+        export_format,
+        export_filename(start_date, end_date, export_format, dataset),
+        lambda path: write(path, start_date, end_date, course_id, dataset)
+    )
+
+def export_attendance_now(values):
+    """
+    Build an attendance export in this request instead of queueing a job.
+
+    The download page falls back to this when a job cannot be queued (or
+    without JavaScript), so it takes and validates the same values as
+    ``submit_attendance_export``.
+
+    Args:
+        values: Download form values, see ``parse_export_options``
+
+    Returns:
+        Response: The file as an attachment
+
+    Raises:
+        ValueError: If ``parse_export_options`` rejects the values
+    """
+    export_format, dataset, start_date, end_date, course_id = parse_export_options(values)
+
+    if export_format == 'csv':
+        return export_attendance_csv(start_date, end_date, course_id)
+    if export_format == 'pdf':
+        return export_attendance_pdf(start_date, end_date, course_id)
+    return export_attendance_columnar(start_date, end_date, course_id, export_format, dataset)
@@ -0,0 +1,210 @@
+from datetime import date, timedelta
+import numpy as np
+from flask import current_app
+from models import db
+from models.course import Course
+from models.attendance_rollup import AttendanceDailyRollup
+from models.visit_forecast import VisitForecast
+from utils.academic_year import academic_year_start_month
+
+# Days forecast by each run
+HORIZON_DAYS = 7
+# Recent weeks that set each course's current level against its seasonal profile
+LEVEL_WEEKS = 8
+# Pseudo-weeks at the average level added to every week-of-term estimate,
+# so weeks seen only once or twice do not swing the forecast
+WEEK_SHRINKAGE = 1.0
+# Normal quantile of the confidence band (80%)
+BAND_Z = 1.2816
+
+def day_numbers(start_day, count):
+    """Consecutive days as ``datetime64[D]`` values"""
+    return np.arange(np.datetime64(start_day, 'D'), np.datetime64(start_day, 'D') + count)
+
+def weekdays(days):
+    """Weekday of ``datetime64[D]`` values, 0=Sunday like ``Attendance.dow``"""
+    # 1970-01-01 was a Thursday
+    return (days.astype(np.int64) + 4) % 7
+
+def weeks_of_term(days, start_month=None):
+    """
+    Week of the academic year (0-52) of ``datetime64[D]`` values.
+
+    Weeks are counted from the first day of ``ACADEMIC_YEAR_START_MONTH``,
+    the same boundary as the monthly charts.
+    """
+    start_month = start_month or academic_year_start_month()
+    months = days.astype('datetime64[M]').astype(np.int64)
+    # Months since 1970-01 back to the last start of an academic year
+    term_start = months - (months - (start_month - 1)) % 12
+    term_start_days = term_start.astype('datetime64[M]').astype('datetime64[D]')
+    return (days - term_start_days).astype(np.int64) // 7
+
+def fit_forecasts(history, start_day, horizon_days=HORIZON_DAYS):
+    """
+    Fit the seasonal model to daily visit counts and forecast the next days.
+
+    Each course's visits are modelled as its average daily visits times a
+    weekday factor, a week-of-term factor and a recent level factor. Every
+    factor is a ratio of sums over the history, computed for all courses at
+    once with matrix products against one-hot weekday and week matrices.
+    Confidence bands assume quasi-Poisson noise, with the dispersion
+    estimated from the in-sample residuals.
+
+    Args:
+        history (numpy.ndarray): Courses x days visit counts, ending the day
+            before ``start_day``
+        start_day (date): First forecast day
+        horizon_days (int, optional): Number of days to forecast
+
+    Returns:
+        tuple: ``(expected, lower, upper)`` arrays of courses x ``horizon_days``
+    """
+    courses, history_days = history.shape
+    forecast_days = day_numbers(start_day, horizon_days)
+    if courses == 0 or history_days == 0:
+        zeros = np.zeros((courses, horizon_days))
+        return zeros, zeros.copy(), zeros.copy()
+
+    days = day_numbers(start_day - timedelta(days=history_days), history_days)
+    weekday_onehot = np.eye(7)[weekdays(days)]
+    week_onehot = np.eye(53)[weeks_of_term(days)]
+
+    mean = history.mean(axis=1)
+    scale = np.where(mean > 0, mean, 1.0)[:, None]
+
+    # Average visits on each weekday, relative to the course's daily average
+    weekday_factor = (history @ weekday_onehot) / np.maximum(weekday_onehot.sum(axis=0), 1) / scale
+
+    # Visits in each week of term against what the weekday profile alone expects
+    weekday_fitted = mean[:, None] * (weekday_factor @ weekday_onehot.T)
+    prior = WEEK_SHRINKAGE * 7 * mean[:, None]
+    week_factor = (history @ week_onehot + prior) / np.maximum(weekday_fitted @ week_onehot + prior, 1e-9)
+
+    # How the last weeks compare with the seasonal profile
+    seasonal_fitted = weekday_fitted * (week_factor @ week_onehot.T)
+    recent = slice(max(history_days - LEVEL_WEEKS * 7, 0), None)
+    prior = WEEK_SHRINKAGE * 7 * mean
+    level = (history[:, recent].sum(axis=1) + prior) / np.maximum(seasonal_fitted[:, recent].sum(axis=1) + prior, 1e-9)
+
+    # Dispersion of the residuals relative to Poisson noise
+    fitted = seasonal_fitted > 0
+    pearson = np.where(fitted, (history - seasonal_fitted) ** 2 / np.where(fitted, seasonal_fitted, 1.0), 0.0)
+    dispersion = np.sqrt(pearson.sum(axis=1) / np.maximum(fitted.sum(axis=1), 1))
+
+    expected = (
+        (mean * level)[:, None]
+        * weekday_factor[:, weekdays(forecast_days)]
+        * week_factor[:, weeks_of_term(forecast_days)]
+    )
+    spread = BAND_Z * np.maximum(dispersion, 1.0)[:, None] * np.sqrt(expected)
+    return expected, np.maximum(expected - spread, 0.0), expected + spread
+
+def update_forecasts(start_day=None, horizon_days=HORIZON_DAYS):
+    """
+    Refit the model on the whole rollup history and store the forecasts.
+
+    One grouped query reads daily visits per course; the rows are scattered
+    into a dense courses x days array (days without visits count as zero)
+    before fitting. The caller commits.
+
+    Args:
+        start_day (date, optional): First forecast day; defaults to tomorrow
+        horizon_days (int, optional): Number of days to forecast
+
+    Returns:
+        int: Number of forecast rows written
+    """
+    start_day = start_day or date.today() + timedelta(days=1)
+    first_day = db.session.query(db.func.min(AttendanceDailyRollup.day)).scalar()
+    courses = [course_id for (course_id,) in Course.query.with_entities(Course.id).order_by(Course.id)]
+
+    history_days = (start_day - first_day).days if first_day and first_day < start_day else 0
+    history = np.zeros((len(courses), history_days))
+    if history_days:
+        rows = AttendanceDailyRollup.visits_by_day_course(first_day, start_day - timedelta(days=1))
+        course_index = {course_id: index for index, course_id in enumerate(courses)}
+        known = [
+            ((day - first_day).days, course_index[course_id], visits)
+            for day, course_id, visits in rows if course_id in course_index
+        ]
+        if known:
+            day_offsets, positions, visits = np.array(known, dtype=np.int64).T
+            np.add.at(history, (positions, day_offsets), visits)
+
+    expected, lower, upper = fit_forecasts(history, start_day, horizon_days)
+    current_app.logger.info(
+        f"Fitted visit forecasts for {len(courses)} courses on {history_days} days of history"
+    )
+
+    rows = [
+        {
+            'day': start_day + timedelta(days=offset),
+            'course_id': course_id,
+            'expected': round(float(expected[index, offset]), 2),
+            'lower': round(float(lower[index, offset]), 2),
+            'upper': round(float(upper[index, offset]), 2)
+        }
+        for index, course_id in enumerate(courses)
+        for offset in range(horizon_days)
+    ]
+    VisitForecast.replace_from(start_day, rows)
+    return len(rows)
+
+def get_forecast(start_day=None, days=HORIZON_DAYS):
+    """
+    Stored forecasts for the next days, shaped for charts.
+
+    Days without a stored forecast (the nightly job did not run, or a course
+    was added since) are ``None`` rather than zero, so charts show a gap
+    instead of an empty library.
+
+    Args:
+        start_day (date, optional): First day; defaults to today
+        days (int, optional): Number of days
+
+    Returns:
+        dict: ``days`` (ISO dates), ``courses`` mapping course name to
+        ``expected``/``lower``/``upper`` lists aligned with ``days``,
+        ``total`` with the same lists for the courses forecast on each day
+        (``None`` if none are), and ``generated_at`` of the newest run (None
+        if nothing is stored)
+    """
+    start_day = start_day or date.today()
+    day_list = [start_day + timedelta(days=offset) for offset in range(days)]
+    offsets = {day: offset for offset, day in enumerate(day_list)}
+
+    courses = {}
+    generated_at = None
+    for day, course_name, expected, lower, upper, generated in VisitForecast.between(day_list[0], day_list[-1]):
+        if course_name is None:
+            continue
+        series = courses.setdefault(course_name, {key: [None] * days for key in ('expected', 'lower', 'upper')})
+        offset = offsets[day]
+        series['expected'][offset] = expected
+        series['lower'][offset] = lower
+        series['upper'][offset] = upper
+        generated_at = max(generated_at, generated) if generated_at else generated
+
+    # Course errors are treated as independent: spreads add in quadrature.
+    # Missing days are NaN and left out of the sums.
+    expected = np.array([series['expected'] for series in courses.values()], dtype=float).reshape(-1, days)
+    spread = np.array([series['upper'] for series in courses.values()], dtype=float).reshape(-1, days) - expected
+    forecast_days = ~np.isnan(expected).all(axis=0)
+    total_expected = np.nansum(expected, axis=0)
+    total_spread = np.sqrt(np.nansum(spread ** 2, axis=0))
+
+    def day_values(values):
+        return [value if known else None for value, known in zip(np.round(values, 2).tolist(), forecast_days)]
+
+    total = {
+        'expected': day_values(total_expected),
+        'lower': day_values(np.maximum(total_expected - total_spread, 0.0)),
+        'upper': day_values(total_expected + total_spread)
+    }
+    return {
+        'days': [day.isoformat() for day in day_list],
+        'courses': courses,
+        'total': total,
+        'generated_at': generated_at.isoformat() if generated_at else None
+    }
@@ -0,0 +1,113 @@
+import json
+from datetime import datetime
+from flask import current_app, jsonify
+from services.dashboard import (
+    resolve_date_range,
+    get_weekly_course_visits,
+    get_cached_monthly_course_visits
+)
+from utils.academic_year import academic_year_of
+from models.place_rollup import AttendancePlaceRollup
+from utils.graph_export import (
+    generate_visitor_statistics_graph,
+    generate_visitor_comparison_graph,
+    generate_summary_dashboard
+)
+
+# Municipalities shown in the places panel of the summary graph
+TOP_PLACES = 5
+
+def render_graph(params):
+    """
+    Render a downloadable dashboard graph.
+
+    Args:
+        params: Mapping of request values (``request.values`` or ``request.args``)
+            with optional ``weekly_course_visits``, ``start_date``,
+            ``end_date``, ``filter``, ``type``, ``monthly_data``,
+            ``academic_year`` and ``top_places``. Without
+            ``weekly_course_visits`` the visits are read from the daily rollup
+            for the filter or date range; without ``monthly_data`` the monthly
+            and summary graphs use the 12 months of ``academic_year`` (by
+            default the academic year the range ends in); without
+            ``top_places`` the summary shows the busiest municipalities of
+            the range from the place rollup.
+
+    Returns:
+        Flask response with the PNG image, or a JSON error response
+    """
+    weekly_course_visits_str = params.get('weekly_course_visits')
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    graph_type = params.get('type', 'weekly')
+    month_names = None
+
+    if not weekly_course_visits_str:
+        try:
+            filter_type = 'custom' if start_date and end_date else params.get('filter', 'weekly')
+            range_start, range_end = resolve_date_range(filter_type, start_date, end_date)
+            weekly_course_visits_str = json.dumps(get_weekly_course_visits(range_start, range_end))
+            start_date, end_date = range_start.strftime('%Y-%m-%d'), range_end.strftime('%Y-%m-%d')
+        except ValueError:
+            current_app.logger.error(f"Invalid graph date range: {start_date} to {end_date}")
+            return jsonify({'success': False, 'message': 'Invalid date range'}), 400
+
+    monthly_data = params.get('monthly_data')
+    if graph_type in ('monthly', 'summary') and not monthly_data:
+        try:
+            academic_year = params.get('academic_year')
+            if academic_year:
+                academic_year = int(academic_year)
+            elif end_date:
+                academic_year = academic_year_of(datetime.strptime(end_date[:10], '%Y-%m-%d').date())
+            else:
+                academic_year = None
+            monthly = get_cached_monthly_course_visits(academic_year)
+        except ValueError:
+            current_app.logger.error(f"Invalid academic year: {params.get('academic_year')}")
+            return jsonify({'success': False, 'message': 'Invalid academic year'}), 400
+        monthly_data = json.dumps(monthly['monthly_course_visits'])
+        month_names = monthly['months']
+        academic_year = monthly['academic_year']
+
+    # Generate the appropriate graph based on type
+    if graph_type == 'summary':
+        # For summary dashboard, we need monthly data too
+        try:
+            top_places = params.get('top_places')
+
+            if top_places:
+                top_places = json.loads(top_places)
+            else:
+                filter_type = 'custom' if start_date and end_date else params.get('filter', 'weekly')
+                range_start, range_end = resolve_date_range(filter_type, start_date, end_date)
+                places = AttendancePlaceRollup.drill_down('municipality', range_start.date(), range_end.date())
+                top_places = [place for place in places if place['municipality']][:TOP_PLACES]
+
+            return generate_summary_dashboard(
+                json.loads(weekly_course_visits_str),
+                json.loads(monthly_data),
+                top_places,
+                month_names=month_names
+            )
+        except Exception as e:
+            current_app.logger.error(f"Error generating summary: {str(e)}")
+            # Fall back to weekly view
+            return generate_visitor_statistics_graph(weekly_course_visits_str, start_date, end_date)
+
+    elif graph_type == 'monthly':
+        # Generate monthly comparison graph
+        if month_names:
+            title = f"Monthly Visitor Comparison (A.Y. {academic_year}-{academic_year + 1})"
+        elif start_date and end_date:
+            title = f"Monthly Visitor Comparison ({start_date} to {end_date})"
+        else:
+            title = "Monthly Visitor Comparison"
+        return generate_visitor_comparison_graph(
+            json.loads(monthly_data),
+            title=title,
+            month_names=month_names
+        )
+
+    # Default to weekly visitor statistics graph
+    return generate_visitor_statistics_graph(weekly_course_visits_str, start_date, end_date)
@@ -0,0 +1,67 @@
+import itertools
+import numpy as np
+from models import db
+from models.attendance import Attendance
+from models.course import Course
+from models.student import Student
+from models.attendance_rollup import NO_COURSE
+from utils.time_buckets import day_range, bucket_expression
+
+# Weekday (0=Sunday) x hour of day
+CELLS = 7 * 24
+
+def occupancy_matrix(start_date, end_date, course_id=None, by_course=False):
+    """
+    Check-ins per weekday and hour of day over a whole-day range.
+
+    Only the stored ``dow``/``hour`` parts are read (from
+    ``ix_attendance_day_dow_hour``, plus the student's course when a
+    course dimension is needed) and binned with ``numpy.bincount``, so a
+    full year of check-ins is counted without a Python loop per row.
+
+    Args:
+        start_date: First day (date or datetime)
+        end_date: Last day (date or datetime)
+        course_id (int, optional): Only count students of this course
+        by_course (bool, optional): Also return one matrix per course
+
+    Returns:
+        dict: ``matrix`` (7 lists of 24 counts, Sunday first), ``total``
+        and, with ``by_course``, ``courses`` mapping course name to its matrix
+    """
+    cell = (bucket_expression('weekday') * 24 + bucket_expression('hour')).label('cell')
+
+    if not by_course:
+        query = db.select(cell).where(*day_range(start_date, end_date))
+        if course_id:
+            query = query.join(Student, Student.id == Attendance.student_id).where(Student.course_id == course_id)
+        cells = np.fromiter(db.session.execute(query).scalars(), dtype=np.int32)
+        matrix = np.bincount(cells, minlength=CELLS).reshape(7, 24)
+        return {'matrix': matrix.tolist(), 'total': int(cells.size)}
+
+    course_column = db.func.coalesce(Student.course_id, NO_COURSE)
+    query = db.select(course_column, cell).join(
+        Student, Student.id == Attendance.student_id
+    ).where(*day_range(start_date, end_date))
+    if course_id:
+        query = query.where(Student.course_id == course_id)
+
+    pairs = np.fromiter(
+        itertools.chain.from_iterable(db.session.execute(query).tuples()),
+        dtype=np.int32
+    ).reshape(-1, 2)
+    course_ids, course_index = np.unique(pairs[:, 0], return_inverse=True)
+    counts = np.bincount(
+        course_index * CELLS + pairs[:, 1],
+        minlength=len(course_ids) * CELLS
+    ).reshape(len(course_ids), 7, 24)
+
+    names = dict(db.session.query(Course.id, Course.course_name).filter(Course.id.in_(course_ids.tolist())))
+    return {
+        'matrix': counts.sum(axis=0).tolist() if len(course_ids) else np.zeros((7, 24), dtype=int).tolist(),
+        'total': int(len(pairs)),
+        'courses': {
+            names.get(int(course), 'No course'): counts[index].tolist()
+            for index, course in enumerate(course_ids)
+        }
+    }
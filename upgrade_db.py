@@ -0,0 +1,137 @@
+from flask import Flask
+from sqlalchemy import inspect, text
+from models import db
+from models.attendance import Attendance
+from models.attendance_rollup import AttendanceDailyRollup
+from models.place_rollup import AttendancePlaceRollup
+from utils.backup import backup_deleted_records
+from utils.time_buckets import weekday_of, hour_of
+from config import Config
+
+def upgrade_database(app=None):
+    """
+    Bring an existing database up to the current schema without dropping data.
+
+    Every step checks the live schema first, so running this again is a no-op.
+    """
+    # If no app was provided, create a temporary one for the upgrade
+    if app is None:
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        db.init_app(app)
+
+    with app.app_context():
+        # Create any tables that do not exist yet
+        db.create_all()
+
+        add_attendance_time_columns()
+        add_attendance_unique_day()
+        drop_rollup_unique_visitors()
+        build_attendance_rollup()
+        build_place_rollup()
+
+def add_attendance_time_columns():
+    """Add the stored date parts of ``attendance.check_in_time`` and their index."""
+    inspector = inspect(db.engine)
+    columns = {column['name'] for column in inspector.get_columns('attendance')}
+    indexes = {index['name'] for index in inspector.get_indexes('attendance')}
+
+    added = []
+    for name, sql_type in (('attendance_day', 'DATE'), ('dow', 'SMALLINT'), ('hour', 'SMALLINT')):
+        if name not in columns:
+            print(f"Adding attendance.{name}")
+            db.session.execute(text(f"ALTER TABLE attendance ADD COLUMN {name} {sql_type}"))
+            added.append(name)
+    db.session.commit()
+
+    # Backfill rows written before the columns existed
+    for column, expression in (
+        (Attendance.attendance_day, db.func.date(Attendance.check_in_time)),
+        (Attendance.dow, weekday_of(Attendance.check_in_time)),
+        (Attendance.hour, hour_of(Attendance.check_in_time))
+    ):
+        db.session.execute(
+            db.update(Attendance.__table__)
+            .where(column.is_(None))
+            .values({column.key: expression})
+        )
+    db.session.commit()
+
+    if added and db.engine.dialect.name == 'postgresql':
+        # SQLite cannot add the constraint after the fact; the model enforces it there
+        for name in added:
+            db.session.execute(text(f"ALTER TABLE attendance ALTER COLUMN {name} SET NOT NULL"))
+        db.session.commit()
+
+    if 'ix_attendance_day_dow_hour' not in indexes:
+        print("Creating index ix_attendance_day_dow_hour")
+        db.Index(
+            'ix_attendance_day_dow_hour',
+            Attendance.attendance_day,
+            Attendance.dow,
+            Attendance.hour
+        ).create(db.engine)
+
+def add_attendance_unique_day():
+    """Add the one-check-in-per-day unique key, removing earlier duplicates."""
+    indexes = {index['name'] for index in inspect(db.engine).get_indexes('attendance')}
+    if 'uq_attendance_student_day' in indexes:
+        return
+
+    # Keep the first check-in of each student per day, back up the rest
+    first_ids = db.session.query(db.func.min(Attendance.id)).group_by(
+        Attendance.student_id,
+        Attendance.attendance_day
+    )
+    duplicates = Attendance.query.filter(~Attendance.id.in_(first_ids)).all()
+    if duplicates:
+        backup_file = backup_deleted_records('Attendance', duplicates)
+        print(f"Removing {len(duplicates)} duplicate check-ins (backed up to {backup_file})")
+        Attendance.query.filter(~Attendance.id.in_(first_ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+    print("Creating unique index uq_attendance_student_day")
+    db.Index(
+        'uq_attendance_student_day',
+        Attendance.student_id,
+        Attendance.attendance_day,
+        unique=True
+    ).create(db.engine)
+
+def build_attendance_rollup():
+    """Fill ``attendance_daily_rollup`` from history the first time it is created."""
+    if db.session.query(AttendanceDailyRollup.id).first() is not None:
+        return
+    if db.session.query(Attendance.id).first() is None:
+        return
+
+    buckets = AttendanceDailyRollup.rebuild()
+    db.session.commit()
+    print(f"Built attendance_daily_rollup from history: {buckets} buckets")
+
+def drop_rollup_unique_visitors():
+    """Drop the rollups' ``unique_visitors`` columns, which only ever repeated ``visits``."""
+    inspector = inspect(db.engine)
+    for table in ('attendance_daily_rollup', 'attendance_place_rollup'):
+        columns = {column['name'] for column in inspector.get_columns(table)}
+        if 'unique_visitors' not in columns:
+            continue
+
+        print(f"Dropping {table}.unique_visitors")
+        db.session.execute(text(f"ALTER TABLE {table} DROP COLUMN unique_visitors"))
+    db.session.commit()
+
+def build_place_rollup():
+    """Fill ``attendance_place_rollup`` from history the first time it is created."""
+    if db.session.query(AttendancePlaceRollup.id).first() is not None:
+        return
+    if db.session.query(Attendance.id).first() is None:
+        return
+
+    buckets = AttendancePlaceRollup.rebuild()
+    db.session.commit()
+    print(f"Built attendance_place_rollup from history: {buckets} buckets")
+
+# This allows the script to be run directly
+if __name__ == '__main__':
+    upgrade_database()
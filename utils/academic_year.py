@@ -0,0 +1,30 @@
+"""
+Academic year calendar shared by the dashboard charts and the visit forecasts.
+
+The academic year starts on the first day of ``ACADEMIC_YEAR_START_MONTH``
+and is named after the calendar year it starts in.
+"""
+import calendar
+from datetime import date, timedelta
+from flask import current_app
+
+def academic_year_start_month():
+    """First calendar month (1-12) of the academic year"""
+    return current_app.config.get('ACADEMIC_YEAR_START_MONTH', 8)
+
+def academic_year_of(day):
+    """Academic year containing ``day``, named after the calendar year it starts in"""
+    start_month = academic_year_start_month()
+    return day.year if day.month >= start_month else day.year - 1
+
+def academic_year_bounds(academic_year):
+    """First and last day of an academic year"""
+    start_month = academic_year_start_month()
+    start_day = date(academic_year, start_month, 1)
+    end_day = date(academic_year + 1, start_month, 1) - timedelta(days=1)
+    return start_day, end_day
+
+def academic_month_labels():
+    """Month abbreviations in academic year order"""
+    start_month = academic_year_start_month()
+    return [calendar.month_abbr[(start_month - 1 + offset) % 12 + 1] for offset in range(12)]
@@ -0,0 +1,219 @@
+import threading
+import time
+import sqlalchemy.exc
+from flask import current_app
+from models import db
+from models.attendance import Attendance, time_columns
+from models.attendance_rollup import AttendanceDailyRollup
+from models.place_rollup import AttendancePlaceRollup
+from models.data_version import DataVersion
+
+class _PendingCheckin:
+    __slots__ = ('row', 'event', 'lead', 'error', 'inserted')
+
+    def __init__(self, row):
+        self.row = row
+        self.event = threading.Event()
+        self.lead = False
+        self.error = None
+        self.inserted = False
+
+class GroupCommitWriter:
+    """
+    Group-commit writer for kiosk check-ins.
+
+    Request threads hand their ``Attendance`` row to ``submit`` and block
+    until it is durable. The first thread to arrive becomes the leader: it
+    waits up to ``CHECKIN_FLUSH_INTERVAL_MS`` for more rows (or until
+    ``CHECKIN_BATCH_SIZE`` rows are queued), writes the whole batch with a
+    single ``executemany`` in one transaction, together with the matching
+    ``attendance_daily_rollup`` increments, and then wakes everyone in it.
+    If more rows queued up meanwhile, the oldest of them is promoted to lead
+    the next batch.
+
+    Rows are written with ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` on
+    the per-day unique key, so a second check-in for the same student and
+    day is rejected by the database, even when it comes from another worker.
+    If a batch hits a constraint or data error it is retried row by row;
+    any other error (e.g. a locked database) fails the whole batch at once.
+    Nobody waits longer than ``CHECKIN_WAIT_TIMEOUT_SECONDS``.
+
+    Batching happens between threads of one worker process (waitress,
+    gunicorn gthread, uwsgi threads); separate processes still take turns
+    on the database write lock.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending = []
+        self._leader_active = False
+
+        # Metrics
+        self.batches = 0
+        self.rows = 0
+        self.max_batch = 0
+        self.failed_batches = 0
+        self.total_commit_ms = 0.0
+        self.max_commit_ms = 0.0
+        self.last_commit_ms = 0.0
+
+    def submit(self, student_id, check_in_time):
+        """
+        Queue a check-in and return once it has been committed.
+
+        Returns:
+            bool: False if the student already had a check-in that day
+        """
+        entry = _PendingCheckin({
+            'student_id': student_id,
+            'check_in_time': check_in_time,
+            **time_columns(check_in_time)
+        })
+
+        with self._cond:
+            self._pending.append(entry)
+            if not self._leader_active:
+                self._leader_active = True
+                entry.lead = True
+            elif len(self._pending) >= current_app.config.get('CHECKIN_BATCH_SIZE', 64):
+                # Let the waiting leader flush a full batch right away
+                self._cond.notify_all()
+
+        timeout = current_app.config.get('CHECKIN_WAIT_TIMEOUT_SECONDS', 30)
+        if not entry.lead:
+            self._wait(entry, timeout)
+        if entry.lead:
+            # Either the first arrival or promoted by the previous leader
+            entry.event.clear()
+            self._lead()
+            self._wait(entry, timeout)
+
+        if entry.error is not None:
+            raise entry.error
+        return entry.inserted
+
+    def _wait(self, entry, timeout):
+        """Wait for the entry's leader, giving up after ``timeout`` seconds"""
+        if entry.event.wait(timeout):
+            return
+        with self._cond:
+            if entry.event.is_set():
+                return
+            if entry in self._pending:
+                # Never picked up; withdraw it so it is not written after we give up
+                self._pending.remove(entry)
+                entry.error = TimeoutError(f"Check-in was not written within {timeout}s")
+            else:
+                # Its batch is still being written; the outcome is unknown
+                entry.error = TimeoutError(f"Check-in commit did not finish within {timeout}s")
+            entry.lead = False
+
+    def _lead(self):
+        config = current_app.config
+        interval = config.get('CHECKIN_FLUSH_INTERVAL_MS', 5) / 1000.0
+        batch_size = max(1, config.get('CHECKIN_BATCH_SIZE', 64))
+        deadline = time.monotonic() + interval
+        batch = []
+
+        try:
+            with self._cond:
+                while len(self._pending) < batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:batch_size]
+                del self._pending[:batch_size]
+
+            self._flush(batch)
+        except BaseException as e:
+            for entry in batch:
+                if entry.error is None and not entry.inserted:
+                    entry.error = e
+            raise
+        finally:
+            # Always hand over leadership and wake the batch, or they would wait forever
+            with self._cond:
+                if self._pending:
+                    successor = self._pending[0]
+                    successor.lead = True
+                    successor.event.set()
+                else:
+                    self._leader_active = False
+
+            for entry in batch:
+                entry.lead = False
+                entry.event.set()
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        statement = Attendance.insert_once_per_day(db.engine.dialect.name)
+        try:
+            self._write(statement, batch)
+        except (sqlalchemy.exc.IntegrityError, sqlalchemy.exc.DataError) as e:
+            current_app.logger.error(f"Group commit of {len(batch)} check-ins failed: {str(e)}")
+            with self._cond:
+                self.failed_batches += 1
+            if len(batch) == 1:
+                batch[0].error = e
+                return
+            # Retry row by row so one bad row does not fail the whole batch
+            for entry in batch:
+                try:
+                    self._write(statement, [entry])
+                except Exception as row_error:
+                    entry.error = row_error
+            return
+        except Exception as e:
+            # Locked or unreachable database: retrying each row would only wait longer
+            current_app.logger.error(f"Group commit of {len(batch)} check-ins failed: {str(e)}")
+            with self._cond:
+                self.failed_batches += 1
+            for entry in batch:
+                entry.error = e
+            return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._cond:
+            self.batches += 1
+            self.rows += len(batch)
+            self.max_batch = max(self.max_batch, len(batch))
+            self.total_commit_ms += elapsed_ms
+            self.max_commit_ms = max(self.max_commit_ms, elapsed_ms)
+            self.last_commit_ms = elapsed_ms
+
+    def _write(self, statement, entries):
+        """Insert the entries and their rollup increments in one transaction"""
+        with db.engine.begin() as conn:
+            inserted = conn.execute(statement, [entry.row for entry in entries]).all()
+            AttendanceDailyRollup.record_checkins(conn, inserted)
+            AttendancePlaceRollup.record_checkins(conn, inserted)
+            if inserted:
+                DataVersion.bump(conn, 'attendance')
+        _mark_inserted(entries, inserted)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'batches': self.batches,
+                'rows': self.rows,
+                'pending': len(self._pending),
+                'avg_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+                'max_batch_size': self.max_batch,
+                'failed_batches': self.failed_batches,
+                'avg_commit_ms': round(self.total_commit_ms / self.batches, 2) if self.batches else 0.0,
+                'max_commit_ms': round(self.max_commit_ms, 2),
+                'last_commit_ms': round(self.last_commit_ms, 2)
+            }
+
+def _mark_inserted(batch, inserted_rows):
+    """Match RETURNING rows back to the entries that produced them"""
+    remaining = {(row.student_id, row.attendance_day) for row in inserted_rows}
+    for entry in batch:
+        key = (entry.row['student_id'], entry.row['attendance_day'])
+        # Only the first entry for a key in the batch can have been inserted
+        entry.inserted = key in remaining
+        remaining.discard(key)
+
+# One writer per worker process
+attendance_writer = GroupCommitWriter()
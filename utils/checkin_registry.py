@@ -0,0 +1,87 @@
+import datetime
+import threading
+from flask import current_app
+from models import db
+from models.attendance import Attendance
+
+class DailyCheckins:
+    """
+    Day-scoped map of student ID to first login time for today.
+
+    The map is rebuilt from the database at startup and again on the first
+    lookup after local midnight, and every successful check-in is recorded
+    in it. A hit answers the "already logged in today" check without any
+    database access. A miss in ``first_login`` still falls back to the
+    database, because the student may have checked in through another
+    worker process; the kiosk path uses ``peek`` and lets the per-day
+    unique key reject the insert instead.
+    """
+
+    def __init__(self):
+        self._day = None
+        self._logins = {}
+        self._lock = threading.Lock()
+
+    def rebuild(self):
+        """Reload today's first login times from the database."""
+        today = datetime.date.today()
+
+        rows = db.session.query(
+            Attendance.student_id,
+            Attendance.check_in_time
+        ).filter(
+            Attendance.attendance_day == today
+        ).all()
+
+        logins = {student_id: check_in_time for student_id, check_in_time in rows}
+        with self._lock:
+            self._day = today
+            self._logins = logins
+
+        current_app.logger.debug(f"Daily check-in registry rebuilt for {today}: {len(logins)} students")
+
+    def peek(self, student_id):
+        """Return today's first login time if this worker knows it, without touching the database."""
+        self._roll_over()
+
+        with self._lock:
+            return self._logins.get(student_id)
+
+    def first_login(self, student_id):
+        """Return today's first login time for a student, or None."""
+        self._roll_over()
+
+        with self._lock:
+            login_time = self._logins.get(student_id)
+        if login_time is not None:
+            return login_time
+
+        existing = Attendance.get_today_login(student_id)
+        if existing:
+            self.record(student_id, existing.check_in_time)
+            return existing.check_in_time
+        return None
+
+    def record(self, student_id, check_in_time):
+        """Remember a successful check-in if it belongs to the current day."""
+        self._roll_over()
+
+        with self._lock:
+            if check_in_time.date() == self._day:
+                current = self._logins.get(student_id)
+                if current is None or check_in_time < current:
+                    self._logins[student_id] = check_in_time
+
+    def stats(self):
+        with self._lock:
+            return {
+                'day': self._day.isoformat() if self._day else None,
+                'students': len(self._logins)
+            }
+
+    def _roll_over(self):
+        if self._day != datetime.date.today():
+            self.rebuild()
+
+# One registry per worker process
+daily_checkins = DailyCheckins()
@@ -0,0 +1,168 @@
+"""
+Attendance exports as Parquet or Arrow IPC files for analysis tools.
+
+Rows are fetched in batches (``iter_row_batches``) and written as columns, so
+multi-year exports never build the whole table in memory or as text.
+Rows are ordered newest day first and cut into row groups (Parquet) or
+record batches (Arrow) at month boundaries; Parquet statistics and the
+page index then let readers skip whole months when filtering on ``day``,
+and Parquet dictionary-encodes repeated text such as course names.
+
+pyarrow is optional and imported on first use.
+"""
+from flask import current_app
+from models.attendance import Attendance
+from utils.daily_logins import iter_daily_logins, CHUNK_ROWS
+from utils.row_batches import iter_row_batches
+
+# Row groups also end at month boundaries, so most are smaller than this
+ROW_GROUP_MAX_ROWS = 100000
+
+# File extension and label of each columnar format
+COLUMNAR_FORMATS = {
+    'parquet': 'Parquet',
+    'arrow': 'Arrow IPC'
+}
+
+# Exported tables: unique daily logins (the CSV rows) or raw check-ins
+DATASETS = ('daily', 'checkins')
+
+def columnar_export_available():
+    """Whether pyarrow can be imported"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _schema(pa, dataset):
+    text = pa.string()
+    if dataset == 'daily':
+        return pa.schema([
+            ('student_id', text),
+            ('last_name', text),
+            ('first_name', text),
+            ('middle_name', text),
+            ('course_name', text),
+            ('day', pa.date32()),
+            ('login_time', pa.timestamp('us'))
+        ])
+    return pa.schema([
+        ('id', pa.int64()),
+        ('student_id', text),
+        ('course_id', pa.int32()),
+        ('course_name', text),
+        ('check_in_time', pa.timestamp('us')),
+        ('day', pa.date32()),
+        ('dow', pa.int8()),
+        ('hour', pa.int8())
+    ])
+
+def _daily_batches(start_date, end_date, course_id, chunk_rows):
+    for logins in iter_daily_logins(start_date, end_date, course_id, chunk_rows):
+        yield {
+            'student_id': logins.student_id,
+            'last_name': logins.last_name,
+            'first_name': logins.first_name,
+            'middle_name': logins.middle_name,
+            'course_name': logins.course_name,
+            'day': logins.day,
+            'login_time': logins.login_time
+        }
+
+def _checkin_batches(start_date, end_date, course_id, chunk_rows):
+    query = Attendance.checkins_query(start_date, end_date, course_id)
+    names = ('id', 'student_id', 'course_id', 'course_name', 'check_in_time', 'day', 'dow', 'hour')
+    for batch in iter_row_batches(query.statement, chunk_rows):
+        yield dict(zip(names, (list(column) for column in zip(*batch))))
+
+def _month_groups(batches):
+    """Regroup column batches into groups of one month and at most ``ROW_GROUP_MAX_ROWS`` rows"""
+    group = None
+    group_month = None
+    for batch in batches:
+        start = 0
+        for index, day in enumerate(batch['day']):
+            month = (day.year, day.month)
+            if group is not None and month == group_month and len(group['day']) + index - start < ROW_GROUP_MAX_ROWS:
+                continue
+            if group is not None:
+                for name, values in batch.items():
+                    group[name].extend(values[start:index])
+                yield group
+            group = {name: [] for name in batch}
+            group_month = month
+            start = index
+        if group is not None:
+            for name, values in batch.items():
+                group[name].extend(values[start:])
+    if group:
+        yield group
+
+def write_attendance_columnar(output, export_format, start_date, end_date, course_id=None,
+                              dataset='daily', chunk_rows=CHUNK_ROWS):
+    """
+    Write attendance as a Parquet or Arrow IPC file.
+
+    Args:
+        output: Path or binary file object
+        export_format (str): A key of ``COLUMNAR_FORMATS``
+        start_date: First day (date or datetime)
+        end_date: Last day (date or datetime)
+        course_id (str, optional): Only students of this course
+        dataset (str, optional): ``daily`` for unique daily logins (the CSV
+            rows) or ``checkins`` for raw check-ins
+        chunk_rows (int, optional): Rows fetched from the database per batch
+
+    Returns:
+        int: Number of rows written
+
+    Raises:
+        ValueError: For an unknown format or dataset
+        ImportError: If pyarrow is not installed
+    """
+    if export_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format: {export_format}")
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+
+    import pyarrow as pa
+
+    schema = _schema(pa, dataset).with_metadata({
+        'dataset': dataset,
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'course_id': (course_id or '').strip()
+    })
+
+    if export_format == 'parquet':
+        import pyarrow.parquet as parquet
+
+        writer = parquet.ParquetWriter(
+            output,
+            schema,
+            compression='zstd',
+            write_statistics=True,
+            write_page_index=True,
+            sorting_columns=[parquet.SortingColumn(schema.get_field_index('day'), descending=True)]
+        )
+        write = lambda table: writer.write_table(table, row_group_size=ROW_GROUP_MAX_ROWS)
+    else:
+        writer = pa.ipc.new_file(output, schema)
+        write = lambda table: writer.write_table(table, max_chunksize=ROW_GROUP_MAX_ROWS)
+
+    batches = (_daily_batches if dataset == 'daily' else _checkin_batches)(start_date, end_date, course_id, chunk_rows)
+    written = 0
+    try:
+        for group in _month_groups(batches):
+            write(pa.Table.from_pydict(group, schema=schema))
+            written += len(group['day'])
+        if not written:
+            # An empty file still carries the schema
+            write(schema.empty_table())
+    finally:
+        writer.close()
+        batches.close()
+
+    current_app.logger.info(f"{COLUMNAR_FORMATS[export_format]} export successful: {written} {dataset} records")
+    return written
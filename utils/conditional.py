@@ -0,0 +1,28 @@
+import hashlib
+from flask import request, current_app
+
+def make_etag(*parts):
+    """
+    Build an ETag value from the watermarks and arguments a response depends on.
+
+    Args:
+        *parts: Data versions and request arguments; anything with a stable repr()
+
+    Returns:
+        str: Unquoted entity tag
+    """
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:20]
+
+def is_not_modified(etag):
+    """True if the request's If-None-Match already names this ETag"""
+    return request.if_none_match.contains_weak(etag)
+
+def not_modified(etag):
+    """An empty 304 response carrying the validators"""
+    return with_validators(current_app.response_class(status=304), etag)
+
+def with_validators(response, etag):
+    """Attach the ETag and make browsers revalidate before reusing the body"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
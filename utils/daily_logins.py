@@ -0,0 +1,138 @@
+"""
+Unique daily logins (first check-in per student and day) as column lists.
+
+Exports format the same few hundred days and minutes for thousands of
+rows, so ``DailyLogins`` keeps one list per column and formats each
+distinct day, weekday and login minute once, reusing the string for
+every row that shares it.
+"""
+from datetime import date, datetime, time
+from flask import current_app
+from models import db
+from models.attendance import Attendance
+from utils.row_batches import iter_row_batches
+
+# Rows fetched from the database cursor per chunk when streaming
+CHUNK_ROWS = 1000
+
+class DayFormats:
+    """Memoized parsing and formatting of days and login times, shared by chunks"""
+
+    def __init__(self):
+        self._parsed = {}
+        self._formatted = {}
+
+    def parse_day(self, value):
+        """A ``date`` from a date column value (SQLite may return ISO strings), or None"""
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        if isinstance(value, str):
+            parsed = self._parsed.get(value)
+            if parsed is None:
+                try:
+                    parsed = self._parsed[value] = datetime.strptime(value, '%Y-%m-%d').date()
+                except ValueError:
+                    current_app.logger.error(f"Error parsing date string: {value}")
+                    return None
+            return parsed
+        current_app.logger.error(f"Unexpected date type: {type(value)}")
+        return None
+
+    def parse_time(self, value):
+        """A ``datetime`` from an aggregated timestamp (SQLite returns strings), or None"""
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                current_app.logger.error(f"Error parsing login time: {value}")
+                return None
+        return value
+
+    def format(self, key, value, fmt):
+        """``value.strftime(fmt)``, computed once per distinct ``key`` and format"""
+        cache_key = (fmt, key)
+        formatted = self._formatted.get(cache_key)
+        if formatted is None:
+            formatted = self._formatted[cache_key] = value.strftime(fmt)
+        return formatted
+
+class DailyLogins:
+    """
+    Unique daily logins as parallel column lists.
+
+    Rows whose day or login time cannot be parsed are skipped (and logged)
+    when they are added, so every column has ``len(self)`` entries.
+    """
+    COLUMNS = ('student_id', 'first_name', 'middle_name', 'last_name', 'course_name', 'day', 'login_time')
+
+    def __init__(self, formats=None):
+        self.formats = formats or DayFormats()
+        for column in self.COLUMNS:
+            setattr(self, column, [])
+
+    def __len__(self):
+        return len(self.student_id)
+
+    def extend(self, rows):
+        """Append query rows of ``Attendance.unique_daily_logins_query``"""
+        formats = self.formats
+        for student_id, first_name, middle_name, last_name, course_name, day, login_time in rows:
+            day = formats.parse_day(day)
+            login_time = formats.parse_time(login_time)
+            if day is None or login_time is None:
+                continue
+            self.student_id.append(student_id)
+            self.first_name.append(first_name)
+            self.middle_name.append(middle_name)
+            self.last_name.append(last_name)
+            self.course_name.append(course_name)
+            self.day.append(day)
+            self.login_time.append(login_time)
+        return self
+
+    def dates(self, fmt='%Y-%m-%d'):
+        """The day column formatted with ``fmt``; also used for weekday names (``%A``)"""
+        format_day = self.formats.format
+        return [format_day(day, day, fmt) for day in self.day]
+
+    def times(self, fmt='%I:%M %p'):
+        """The login time column formatted with ``fmt`` at minute resolution"""
+        format_time = self.formats.format
+        return [
+            format_time((login.hour, login.minute), time(login.hour, login.minute), fmt)
+            for login in self.login_time
+        ]
+
+def fetch_daily_logins(start_date, end_date, course_id=None):
+    """
+    All unique daily logins in a date range as one ``DailyLogins``.
+
+    Args:
+        start_date: First day (date or datetime)
+        end_date: Last day (date or datetime)
+        course_id (optional): Only students of this course
+
+    Returns:
+        DailyLogins: Ordered by date (newest first), last name and first name
+    """
+    query = Attendance.unique_daily_logins_query(start_date, end_date, course_id)
+    return DailyLogins().extend(db.session.execute(query.statement))
+
+def iter_daily_logins(start_date, end_date, course_id=None, chunk_rows=CHUNK_ROWS):
+    """
+    Unique daily logins in a date range, ``chunk_rows`` rows at a time.
+
+    The query runs before this returns, so query errors surface to the
+    caller. Rows are read with ``iter_row_batches`` (a server-side cursor on
+    PostgreSQL, a temporary file on SQLite so a slow download does not hold
+    the database lock), and all chunks share one formatting memo.
+
+    Returns:
+        generator: ``DailyLogins`` chunks in export order
+    """
+    query = Attendance.unique_daily_logins_query(start_date, end_date, course_id)
+    batches = iter_row_batches(query.statement, chunk_rows)
+    formats = DayFormats()
+    return (DailyLogins(formats).extend(batch) for batch in batches)
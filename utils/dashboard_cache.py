@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from models.data_version import DataVersion
+
+class _Entry:
+    __slots__ = ('version', 'value', 'stale_since', 'refreshing')
+
+    def __init__(self, version, value):
+        self.version = version
+        self.value = value
+        self.stale_since = None
+        self.refreshing = False
+
+class DashboardCache:
+    """
+    Per-worker cache of dashboard payloads with stale-while-revalidate.
+
+    Entries are tagged with the ``dashboard`` data version they were
+    computed at. When the version has moved on, the previous payload is
+    still served while one background thread recomputes it, so concurrent
+    dashboard requests never wait on the aggregation. Only a cold key, or
+    an entry stale for longer than ``DASHBOARD_CACHE_MAX_STALE_SECONDS``,
+    is computed in the request; concurrent requests for it wait for the
+    first one instead of computing it again.
+
+    Keys include arbitrary date ranges, so at most
+    ``DASHBOARD_CACHE_MAX_ENTRIES`` payloads are kept, least recently used
+    evicted first.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._computing = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+
+    def get(self, key, compute):
+        """
+        Return the cached value for ``key``, computing it with ``compute()`` if needed.
+
+        Args:
+            key (tuple): Cache key
+            compute (callable): Builds the value; called inside an app context
+
+        Returns:
+            tuple: ``(value, version)``, where ``version`` is the data version
+            the value was computed at (older than current when stale)
+        """
+        version = DataVersion.current()
+        max_stale = current_app.config.get('DASHBOARD_CACHE_MAX_STALE_SECONDS', 60)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if entry is not None and entry.version == version:
+                self.hits += 1
+                return entry.value, entry.version
+
+            if entry is not None:
+                if entry.stale_since is None:
+                    entry.stale_since = now
+                if now - entry.stale_since <= max_stale:
+                    self.stale_hits += 1
+                    if not entry.refreshing:
+                        entry.refreshing = True
+                        self._refresh_in_background(key, compute)
+                    return entry.value, entry.version
+
+            self.misses += 1
+            pending = self._computing.get(key)
+            if pending is None:
+                pending = self._computing[key] = threading.Event()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            # Someone else is computing this key; use their result
+            pending.wait()
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry.value, entry.version
+            return compute(), version
+
+        try:
+            value = compute()
+            self._store(key, version, value)
+            return value, version
+        finally:
+            with self._lock:
+                self._computing.pop(key, None)
+            pending.set()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'refresh_errors': self.refresh_errors,
+                'evictions': self.evictions,
+                'hit_ratio': round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0
+            }
+
+    def _store(self, key, version, value):
+        max_entries = max(current_app.config.get('DASHBOARD_CACHE_MAX_ENTRIES', 64), 1)
+        with self._lock:
+            current = self._entries.get(key)
+            # A slower computation must not overwrite a newer one
+            if current is None or current.version <= version:
+                self._entries[key] = _Entry(version, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _refresh_in_background(self, key, compute):
+        app = current_app._get_current_object()
+
+        def refresh():
+            with app.app_context():
+                try:
+                    # Read the version first so changes made during compute() trigger another refresh
+                    version = DataVersion.current()
+                    value = compute()
+                    self._store(key, version, value)
+                    with self._lock:
+                        self.refreshes += 1
+                except Exception as e:
+                    app.logger.error(f"Dashboard cache refresh failed for {key}: {str(e)}", exc_info=True)
+                    with self._lock:
+                        self.refresh_errors += 1
+                        entry = self._entries.get(key)
+                        if entry is not None:
+                            entry.refreshing = False
+
+        threading.Thread(target=refresh, name='dashboard-cache-refresh', daemon=True).start()
+
+# One cache per worker process
+dashboard_cache = DashboardCache()
@@ -1,60 +1,48 @@
-from flask import Response, render_template, make_response, current_app
-from models import db
-from models.attendance import Attendance
-from models.student import Student
-from models.course import Course
-from weasyprint import HTML
+from flask import Response, current_app, stream_with_context
+from utils.daily_logins import fetch_daily_logins, iter_daily_logins, CHUNK_ROWS
+from utils.columnar_export import write_attendance_columnar
 import datetime  # Import datetime module
 import csv
 import io
-from datetime import datetime, timedelta, date
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
+import tempfile
+import time
+from datetime import datetime, timedelta
 
-def export_attendance_csv(start_date, end_date, course_id=None):
-    """Export attendance data as CSV with unique daily logins"""
-    try:
-        # Create query for unique daily attendance records
-        query = db.session.query(
-            Attendance.student_id,
-            Student.first_name,
-            Student.middle_name,
-            Student.last_name,
-            Course.course_name,
-            db.func.date(Attendance.check_in_time).label('attendance_date'),
-            db.func.min(Attendance.check_in_time).label('first_login_time')
-        ).join(
-            Student, Student.id == Attendance.student_id
-        ).join(
-            Course, Course.id == Student.course_id
-        ).filter(
-            Attendance.check_in_time >= start_date,
-            Attendance.check_in_time <= end_date
-        )
+# Bytes per block when streaming a spooled download
+STREAM_BLOCK_BYTES = 64 * 1024
+
+COLUMNAR_MIMETYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file'
+}
+
+def iter_attendance_csv(start_date, end_date, course_id=None, chunk_rows=CHUNK_ROWS):
+    """
+    Generate the attendance CSV in chunks of ``chunk_rows`` rows.
+
+    The query runs before the first chunk is yielded, so query errors
+    surface to the caller. Only the current chunk is held in memory,
+    however long the range is, and each chunk is written column-wise from
+    ``DailyLogins`` with dates, weekdays and times formatted once per
+    distinct value.
+
+    Args:
+        start_date: First day (date or datetime)
+        end_date: Last day (date or datetime)
+        course_id (str, optional): Only students of this course
+        chunk_rows (int, optional): Rows per chunk
 
-        # Filter by course if specified
-        if course_id and course_id.strip():
-            query = query.filter(Student.course_id == course_id)
-
-        # Group by student and date to get unique daily logins
-        attendance_data = query.group_by(
-            Attendance.student_id,
-            db.func.date(Attendance.check_in_time)
-        ).order_by(
-            db.desc('attendance_date'),
-            Student.last_name,
-            Student.first_name
-        ).all()
-
-        # Create CSV content
+    Returns:
+        generator: CSV text chunks, the header first
+    """
+    chunks = iter_daily_logins(start_date, end_date, course_id, chunk_rows)
+
+    def generate():
         output = io.StringIO()
         writer = csv.writer(output)
 
         # Write headers
-        headers = [
+        writer.writerow([
             'Student ID',
             'Last Name',
             'First Name',
@@ -63,221 +51,225 @@ def export_attendance_csv(start_date, end_date, course_id=None):
             'Date',
             'Login Time',
             'Day of Week'
-        ]
-        writer.writerow(headers)
-
-        # Write attendance data
-        for record in attendance_data:
-            student_id = record.student_id
-            first_name = record.first_name or ''
-            middle_name = record.middle_name or ''
-            last_name = record.last_name or ''
-            course_name = record.course_name or ''
-
-            # Handle attendance_date - convert to date object if it's a string
-            attendance_date = record.attendance_date
-            if isinstance(attendance_date, str):
-                try:
-                    attendance_date = datetime.strptime(attendance_date, '%Y-%m-%d').date()
-                except ValueError:
-                    current_app.logger.error(f"Error parsing date string: {attendance_date}")
-                    continue
-            elif not isinstance(attendance_date, date):
-                current_app.logger.error(f"Unexpected date type: {type(attendance_date)}")
-                continue
-
-            # Handle first_login_time
-            login_time = record.first_login_time
-            if isinstance(login_time, str):
-                try:
-                    login_time = datetime.fromisoformat(login_time)
-                except ValueError:
-                    current_app.logger.error(f"Error parsing login time: {login_time}")
-                    continue
-
-            # Format date and time
-            date_str = attendance_date.strftime('%Y-%m-%d')
-            time_str = login_time.strftime('%I:%M %p')
-            day_of_week = attendance_date.strftime('%A')
-
-            writer.writerow([
-                student_id,
-                last_name,
-                first_name,
-                middle_name,
-                course_name,
-                date_str,
-                time_str,
-                day_of_week
-            ])
-
-        # Create response
-        csv_content = output.getvalue()
-        output.close()
-
-        response = make_response(csv_content)
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = f'attachment; filename=attendance_records_{start_date.strftime("%Y%m%d")}_{end_date.strftime("%Y%m%d")}.csv'
-
-        current_app.logger.info(f"CSV export successful: {len(attendance_data)} unique daily records")
+        ])
+        yield output.getvalue()
+
+        written = 0
+        try:
+            for logins in chunks:
+                output.seek(0)
+                output.truncate(0)
+                writer.writerows(zip(
+                    logins.student_id,
+                    [name or '' for name in logins.last_name],
+                    [name or '' for name in logins.first_name],
+                    [name or '' for name in logins.middle_name],
+                    [name or '' for name in logins.course_name],
+                    logins.dates('%Y-%m-%d'),
+                    logins.times('%I:%M %p'),
+                    logins.dates('%A')
+                ))
+                written += len(logins)
+                yield output.getvalue()
+        except Exception as e:
+            # Headers are already sent; the download ends early
+            current_app.logger.error(f"Error streaming CSV export after {written} records: {str(e)}")
+            raise
+        finally:
+            chunks.close()
+
+        current_app.logger.info(f"CSV export successful: {written} unique daily records")
+
+    return generate()
+
+def export_attendance_csv(start_date, end_date, course_id=None):
+    """
+    Export attendance data as CSV with unique daily logins.
+
+    The body is streamed chunk by chunk (see ``iter_attendance_csv``), so
+    the first bytes go out at once and worker memory stays flat for any
+    date range.
+    """
+    try:
+        chunks = iter_attendance_csv(start_date, end_date, course_id)
+
+        # Keep the request context (and its database session) alive while streaming
+        response = Response(stream_with_context(chunks), mimetype='text/csv')
+        response.headers['Content-Disposition'] = f'attachment; filename={export_filename(start_date, end_date, "csv")}'
+        response.headers['X-Accel-Buffering'] = 'no'
         return response
 
     except Exception as e:
         current_app.logger.error(f"Error exporting CSV: {str(e)}")
         raise
 
+def export_filename(start_date, end_date, extension, dataset='daily'):
+    """Download name of an attendance export (``daily`` records or raw ``checkins``)"""
+    prefix = 'attendance_checkins' if dataset == 'checkins' else 'attendance_records'
+    return f'{prefix}_{start_date.strftime("%Y%m%d")}_{end_date.strftime("%Y%m%d")}.{extension}'
+
+def write_attendance_csv(output, start_date, end_date, course_id=None):
+    """
+    Write the attendance CSV to a text file object chunk by chunk.
+
+    Returns:
+        int: Number of characters written
+    """
+    written = 0
+    for chunk in iter_attendance_csv(start_date, end_date, course_id):
+        written += output.write(chunk)
+    return written
+
+def attendance_pdf_sections(logins):
+    """
+    Rows of the attendance PDF grouped into one section per day.
+
+    Args:
+        logins (DailyLogins): Unique daily logins in export order
+
+    Returns:
+        list: ``(heading, rows)`` pairs, newest day first
+    """
+    sections = []
+    current_day = None
+    for day, student_id, last_name, first_name, middle_name, course_name, date_str, time_str, day_of_week in zip(
+        logins.day,
+        logins.student_id,
+        logins.last_name,
+        logins.first_name,
+        logins.middle_name,
+        logins.course_name,
+        logins.dates('%m/%d/%Y'),
+        logins.times('%I:%M %p'),
+        logins.dates('%a')
+    ):
+        if day != current_day:
+            current_day = day
+            rows = []
+            sections.append((logins.formats.format(day, day, '%A, %B %d, %Y'), rows))
+
+        full_name = f"{last_name}, {first_name}"
+        if middle_name:
+            full_name += f" {middle_name}"
+
+        rows.append([
+            student_id,
+            full_name,
+            course_name or 'N/A',
+            date_str,
+            time_str,
+            day_of_week
+        ])
+
+    return [(f"{heading} ({len(rows)} logins)", rows) for heading, rows in sections]
+
+def write_attendance_pdf(output, start_date, end_date, course_id=None):
+    """
+    Render the attendance PDF into a binary file object.
+
+    Each day is a section of page-sized tables. Long reports are rendered
+    in chunks by a pool of ``PDF_RENDER_PROCESSES`` processes and merged
+    (see ``utils.pdf_chunks``).
+
+    Returns:
+        int: Number of unique daily records in the document
+    """
+    # reportlab loads on the first PDF export rather than at worker start-up
+    from utils.pdf_chunks import render_report
+
+    # Same unique daily attendance records as the CSV
+    logins = fetch_daily_logins(start_date, end_date, course_id)
+
+    intro = [
+        ('title', "Library Attendance Records"),
+        ('normal',
+         f"<b>Period:</b> {start_date.strftime('%B %d, %Y')} to {end_date.strftime('%B %d, %Y')}<br/>"
+         f"<b>Generated:</b> {datetime.now().strftime('%B %d, %Y at %I:%M %p')}<br/>"
+         f"<b>Total Records:</b> {len(logins)} unique daily logins")
+    ]
+    sections = attendance_pdf_sections(logins)
+    del logins
+
+    started = time.perf_counter()
+    chunks = render_report(output, intro, sections, current_app.config.get('PDF_RENDER_PROCESSES', 1))
+    current_app.logger.info(f"Rendered PDF in {chunks} chunk(s) in {time.perf_counter() - started:.2f}s")
+
+    return sum(len(rows) for _, rows in sections)
+
+def spooled_download(write, mimetype, download_name):
+    """
+    Render a download into a spooled temporary file and stream it from there.
+
+    The file stays in memory up to ``EXPORT_SPOOL_MAX_BYTES`` and moves to disk
+    beyond that.
+
+    Args:
+        write (callable): ``write(file)`` renders into a binary file object
+        mimetype (str): Content type of the response
+        download_name (str): File name offered to the browser
+
+    Returns:
+        tuple: The streaming response and the result of ``write``
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=current_app.config.get('EXPORT_SPOOL_MAX_BYTES', 8 * 1024 * 1024))
+    try:
+        result = write(spool)
+        size = spool.tell()
+        spool.seek(0)
+    except Exception:
+        spool.close()
+        raise
+
+    def generate():
+        with spool:
+            while True:
+                block = spool.read(STREAM_BLOCK_BYTES)
+                if not block:
+                    break
+                yield block
+
+    response = Response(generate(), mimetype=mimetype)
+    response.headers['Content-Length'] = str(size)
+    response.headers['Content-Disposition'] = f'attachment; filename={download_name}'
+    return response, result
+
 def export_attendance_pdf(start_date, end_date, course_id=None):
-    """Export attendance data as PDF with unique daily logins"""
+    """
+    Export attendance data as PDF with unique daily logins.
+
+    The document is rendered into a spooled temporary file and streamed
+    from there (see ``spooled_download``).
+    """
     try:
-        # Create query for unique daily attendance records (same as CSV)
-        query = db.session.query(
-            Attendance.student_id,
-            Student.first_name,
-            Student.middle_name,
-            Student.last_name,
-            Course.course_name,
-            db.func.date(Attendance.check_in_time).label('attendance_date'),
-            db.func.min(Attendance.check_in_time).label('first_login_time')
-        ).join(
-            Student, Student.id == Attendance.student_id
-        ).join(
-            Course, Course.id == Student.course_id
-        ).filter(
-            Attendance.check_in_time >= start_date,
-            Attendance.check_in_time <= end_date
+        response, records = spooled_download(
+            lambda output: write_attendance_pdf(output, start_date, end_date, course_id),
+            'application/pdf',
+            export_filename(start_date, end_date, 'pdf')
         )
 
-        # Filter by course if specified
-        if course_id and course_id.strip():
-            query = query.filter(Student.course_id == course_id)
-
-        # Group by student and date to get unique daily logins
-        attendance_data = query.group_by(
-            Attendance.student_id,
-            db.func.date(Attendance.check_in_time)
-        ).order_by(
-            db.desc('attendance_date'),
-            Student.last_name,
-            Student.first_name
-        ).all()
-
-        # Create PDF content
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, leftMargin=0.5*inch, rightMargin=0.5*inch)
-
-        # Get styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=20,
-            alignment=1  # Center alignment
-        )
+        current_app.logger.info(f"PDF export successful: {records} unique daily records")
+        return response
 
-        # Build PDF content
-        story = []
+    except Exception as e:
+        current_app.logger.error(f"Error exporting PDF: {str(e)}")
+        raise
 
-        # Title
-        title = Paragraph("Library Attendance Records", title_style)
-        story.append(title)
+def export_attendance_columnar(start_date, end_date, course_id=None, export_format='parquet', dataset='daily'):
+    """
+    Export unique daily logins or raw check-ins as Parquet or Arrow IPC.
 
-        # Date range info
-        date_range = Paragraph(
-            f"<b>Period:</b> {start_date.strftime('%B %d, %Y')} to {end_date.strftime('%B %d, %Y')}<br/>"
-            f"<b>Generated:</b> {datetime.now().strftime('%B %d, %Y at %I:%M %p')}<br/>"
-            f"<b>Total Records:</b> {len(attendance_data)} unique daily logins",
-            styles['Normal']
+    See ``utils.columnar_export``; requires pyarrow.
+    """
+    try:
+        response, _ = spooled_download(
+            lambda output: write_attendance_columnar(output, export_format, start_date, end_date, course_id, dataset),
+            COLUMNAR_MIMETYPES[export_format],
+            export_filename(start_date, end_date, export_format, dataset)
         )
-        story.append(date_range)
-        story.append(Spacer(1, 20))
-
-        # Create table data
-        table_data = [
-            ['Student ID', 'Name', 'Course', 'Date', 'Login Time', 'Day']
-        ]
-
-        for record in attendance_data:
-            full_name = f"{record.last_name}, {record.first_name}"
-            if record.middle_name:
-                full_name += f" {record.middle_name}"
-
-            # Handle attendance_date - convert to date object if it's a string
-            attendance_date = record.attendance_date
-            if isinstance(attendance_date, str):
-                try:
-                    attendance_date = datetime.strptime(attendance_date, '%Y-%m-%d').date()
-                except ValueError:
-                    current_app.logger.error(f"Error parsing date string: {attendance_date}")
-                    continue
-            elif not isinstance(attendance_date, date):
-                current_app.logger.error(f"Unexpected date type: {type(attendance_date)}")
-                continue
-
-            # Handle first_login_time
-            login_time = record.first_login_time
-            if isinstance(login_time, str):
-                try:
-                    login_time = datetime.fromisoformat(login_time)
-                except ValueError:
-                    current_app.logger.error(f"Error parsing login time: {login_time}")
-                    continue
-
-            date_str = attendance_date.strftime('%m/%d/%Y')
-            time_str = login_time.strftime('%I:%M %p')
-            day_of_week = attendance_date.strftime('%a')
-
-            table_data.append([
-                record.student_id,
-                full_name,
-                record.course_name or 'N/A',
-                date_str,
-                time_str,
-                day_of_week
-            ])
-
-        # Create table
-        table = Table(table_data, colWidths=[0.8*inch, 2.5*inch, 2*inch, 0.9*inch, 0.9*inch, 0.6*inch])
-
-        # Style the table
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('TOPPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('LEFTPADDING', (0, 0), (-1, -1), 6),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 1), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 8)
-        ]))
-
-        story.append(table)
-
-        # Build PDF
-        doc.build(story)
-
-        # Create response
-        pdf_content = buffer.getvalue()
-        buffer.close()
-
-        response = make_response(pdf_content)
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename=attendance_records_{start_date.strftime("%Y%m%d")}_{end_date.strftime("%Y%m%d")}.pdf'
-
-        current_app.logger.info(f"PDF export successful: {len(attendance_data)} unique daily records")
         return response
 
     except Exception as e:
-        current_app.logger.error(f"Error exporting PDF: {str(e)}")
+        current_app.logger.error(f"Error exporting {export_format}: {str(e)}")
         raise
 
 def export_model_to_csv(model_data, filename=None):
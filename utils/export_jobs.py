@@ -0,0 +1,194 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+# Job ids are artifact keys: hex digests only, so they are safe in file names
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{16,64}$')
+
+class ExportJobQueue:
+    """
+    Background export jobs with their finished files cached on disk.
+
+    A job id is the key of the artifact it produces, derived from
+    everything the file depends on, so submitting the same export again
+    returns the finished file instead of building it twice. Job state lives
+    next to the artifacts in ``EXPORT_DIR``:
+
+    - ``<id>.pending`` while a worker builds it (touched at submit time)
+    - ``<id>.<ext>`` and ``<id>.json`` (download name, size, timings) when done
+    - ``<id>.error`` with the message if it failed
+
+    so any worker process can answer a status poll or serve the download.
+    Builds run in a small thread pool per worker process
+    (``EXPORT_JOB_WORKERS``) inside an app context.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._running = set()
+        self._last_prune = 0.0
+        self.submitted = 0
+        self.cache_hits = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, job_id, extension, download_name, build):
+        """
+        Start building an artifact unless it exists or is being built.
+
+        Args:
+            job_id (str): Artifact key
+            extension (str): File extension of the artifact
+            download_name (str): File name offered to the browser
+            build (callable): ``build(path)`` writes the artifact to ``path``;
+                called in a pool thread inside an app context
+
+        Returns:
+            dict: The job status (see ``status``)
+        """
+        self._prune()
+        status = self.status(job_id)
+        if status['status'] == 'done':
+            with self._lock:
+                self.cache_hits += 1
+            return status
+        if status['status'] == 'running':
+            return status
+
+        app = current_app._get_current_object()
+        with self._lock:
+            if job_id in self._running:
+                return self.status(job_id)
+            self._running.add(job_id)
+            self.submitted += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=app.config.get('EXPORT_JOB_WORKERS', 2),
+                    thread_name_prefix='export-job'
+                )
+
+        self._remove(job_id, 'error')
+        with open(self._path(job_id, 'pending'), 'w') as f:
+            f.write(str(os.getpid()))
+        self._executor.submit(self._run, app, job_id, extension, download_name, build)
+        return self.status(job_id)
+
+    def status(self, job_id):
+        """
+        Current state of a job, read from ``EXPORT_DIR``.
+
+        Returns:
+            dict: ``job_id`` and ``status`` (``done``, ``running``,
+            ``failed`` or ``missing``); finished jobs add ``download_name``
+            and ``size``, failed ones ``message``
+        """
+        metadata_path = self._path(job_id, 'json')
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                return {'job_id': job_id, 'status': 'done', **json.load(f)}
+
+        error_path = self._path(job_id, 'error')
+        if os.path.exists(error_path):
+            with open(error_path) as f:
+                return {'job_id': job_id, 'status': 'failed', 'message': f.read()}
+
+        pending_path = self._path(job_id, 'pending')
+        if os.path.exists(pending_path):
+            timeout = current_app.config.get('EXPORT_JOB_TIMEOUT_SECONDS', 900)
+            if time.time() - os.path.getmtime(pending_path) <= timeout:
+                return {'job_id': job_id, 'status': 'running'}
+            # The worker that owned it died or gave up; the job can be submitted again
+            return {'job_id': job_id, 'status': 'failed', 'message': 'Export timed out'}
+
+        return {'job_id': job_id, 'status': 'missing'}
+
+    def artifact(self, job_id):
+        """``(path, download_name)`` of a finished artifact, or None"""
+        status = self.status(job_id)
+        if status['status'] != 'done':
+            return None
+        return self._path(job_id, status['extension']), status['download_name']
+
+    def stats(self):
+        with self._lock:
+            return {
+                'running': len(self._running),
+                'submitted': self.submitted,
+                'cache_hits': self.cache_hits,
+                'completed': self.completed,
+                'failed': self.failed
+            }
+
+    def _run(self, app, job_id, extension, download_name, build):
+        with app.app_context():
+            started = time.perf_counter()
+            final_path = self._path(job_id, extension)
+            part_path = self._path(job_id, f'{extension}.part')
+            try:
+                build(part_path)
+                os.replace(part_path, final_path)
+                metadata = {
+                    'extension': extension,
+                    'download_name': download_name,
+                    'size': os.path.getsize(final_path),
+                    'build_seconds': round(time.perf_counter() - started, 3)
+                }
+                # The metadata file marks the job as done, so write it last and atomically
+                with open(self._path(job_id, 'json.part'), 'w') as f:
+                    json.dump(metadata, f)
+                os.replace(self._path(job_id, 'json.part'), self._path(job_id, 'json'))
+                app.logger.info(f"Export job {job_id} finished in {metadata['build_seconds']}s ({metadata['size']} bytes)")
+                with self._lock:
+                    self.completed += 1
+            except Exception as e:
+                app.logger.error(f"Export job {job_id} failed: {str(e)}", exc_info=True)
+                self._remove(job_id, f'{extension}.part')
+                with open(self._path(job_id, 'error'), 'w') as f:
+                    f.write(f'Export failed: {str(e)}')
+                with self._lock:
+                    self.failed += 1
+            finally:
+                self._remove(job_id, 'pending')
+                with self._lock:
+                    self._running.discard(job_id)
+
+    def _prune(self):
+        """Delete artifacts older than ``EXPORT_ARTIFACT_MAX_AGE_HOURS``, at most once a minute"""
+        now = time.time()
+        with self._lock:
+            if now - self._last_prune < 60:
+                return
+            self._last_prune = now
+
+        max_age = current_app.config.get('EXPORT_ARTIFACT_MAX_AGE_HOURS', 24) * 3600
+        directory = self._directory()
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if name.split('.')[0] not in self._running and now - os.path.getmtime(path) > max_age:
+                    os.remove(path)
+            except OSError:
+                # Removed by another worker in the meantime
+                pass
+
+    def _directory(self):
+        directory = current_app.config['EXPORT_DIR']
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def _path(self, job_id, suffix):
+        return os.path.join(self._directory(), f'{job_id}.{suffix}')
+
+    def _remove(self, job_id, suffix):
+        try:
+            os.remove(self._path(job_id, suffix))
+        except FileNotFoundError:
+            pass
+
+# One pool per worker process; artifacts are shared through EXPORT_DIR
+export_jobs = ExportJobQueue()
@@ -1,9 +1,11 @@
 import io
 import json
-import matplotlib.pyplot as plt
 from datetime import datetime
 from flask import send_file, jsonify, current_app
 
+# matplotlib.pyplot is imported inside each generator: loading it dominates
+# worker start-up, and most workers never draw a chart (see utils/prewarm.py)
+
 def generate_visitor_statistics_graph(weekly_course_visits, start_date=None, end_date=None):
     """
     Generate a visitor statistics graph based on the provided data.
@@ -16,6 +18,8 @@ def generate_visitor_statistics_graph(weekly_course_visits, start_date=None, end
     Returns:
         Flask response object with the generated image
     """
+    import matplotlib.pyplot as plt
+
     try:
         # Parse JSON string if needed
         if isinstance(weekly_course_visits, str):
@@ -73,24 +77,27 @@ def generate_visitor_statistics_graph(weekly_course_visits, start_date=None, end
         current_app.logger.error(f"Error generating graph: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'message': f'Error generating graph: {str(e)}'}), 500
 
-def generate_visitor_comparison_graph(monthly_data, title="Monthly Visitor Comparison"):
+def generate_visitor_comparison_graph(monthly_data, title="Monthly Visitor Comparison", month_names=None):
     """
     Generate a bar chart comparing monthly visitor data.
 
     Args:
         monthly_data (dict): Monthly visitor data by course
         title (str): Title for the graph
+        month_names (list, optional): Labels of the 12 values; Jan to Dec by default
 
     Returns:
         Flask response object with the generated image
     """
+    import matplotlib.pyplot as plt
+
     try:
         fig, ax = plt.subplots(figsize=(12, 7))
 
         # Extract months and courses
         months = list(range(1, 13))
-        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+        month_names = month_names or ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
         courses = list(monthly_data.keys())
 
         # Bar position and width
@@ -138,7 +145,7 @@ def generate_visitor_comparison_graph(monthly_data, title="Monthly Visitor Compa
         current_app.logger.error(f"Error generating comparison graph: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'message': f'Error generating graph: {str(e)}'}), 500
 
-def generate_summary_dashboard(weekly_data, monthly_data, top_places=None):
+def generate_summary_dashboard(weekly_data, monthly_data, top_places=None, month_names=None):
     """
     Generate a summary dashboard with multiple graphs.
 
@@ -146,10 +153,13 @@ def generate_summary_dashboard(weekly_data, monthly_data, top_places=None):
         weekly_data (dict): Weekly visitor data by course
         monthly_data (dict): Monthly visitor data by course
         top_places (list): Top places data
+        month_names (list, optional): Labels of the 12 monthly values; Jan to Dec by default
 
     Returns:
         Flask response object with the generated image
     """
+    import matplotlib.pyplot as plt
+
     try:
         fig = plt.figure(figsize=(16, 10))
 
@@ -173,8 +183,8 @@ def generate_summary_dashboard(weekly_data, monthly_data, top_places=None):
         ax1.spines['right'].set_visible(False)
 
         # Plot 2: Monthly comparison (simplified)
-        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+        month_names = month_names or ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
 
         # Get a color for each course
         colors = plt.cm.tab10(range(len(monthly_data)))
@@ -192,7 +202,8 @@ def generate_summary_dashboard(weekly_data, monthly_data, top_places=None):
 
         # Plot 3: Place visits (if data provided)
         if top_places and len(top_places) > 0:
-            places = [p['municipality'] for p in top_places]
+            # Municipality names repeat across provinces
+            places = [f"{p['municipality']}, {p['province']}" if p.get('province') else p['municipality'] for p in top_places]
             visits = [p['visits'] for p in top_places]
 
             # Create horizontal bar chart
@@ -237,3 +248,59 @@ def generate_summary_dashboard(weekly_data, monthly_data, top_places=None):
     except Exception as e:
         current_app.logger.error(f"Error generating summary dashboard: {str(e)}", exc_info=True)
         return jsonify({'success': False, 'message': f'Error generating dashboard: {str(e)}'}), 500
+
+def generate_occupancy_heatmap(matrix, title="Library Occupancy by Hour", course_matrices=None):
+    """
+    Generate a weekday by hour-of-day heatmap of check-ins.
+
+    Args:
+        matrix (list): 7 rows (Sunday first) of 24 hourly counts
+        title (str): Title for the graph
+        course_matrices (dict, optional): Course name to its own 7x24 matrix,
+            drawn as one panel per course below the overall heatmap
+
+    Returns:
+        Flask response object with the generated image
+    """
+    import matplotlib.pyplot as plt
+
+    try:
+        days = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+        panels = [('All courses', matrix)] + list((course_matrices or {}).items())
+
+        fig, axes = plt.subplots(len(panels), 1, figsize=(14, 3.2 * len(panels) + 1), squeeze=False)
+
+        for ax, (label, data) in zip(axes[:, 0], panels):
+            image = ax.imshow(data, aspect='auto', cmap='YlOrRd', interpolation='nearest')
+            ax.set_title(label, fontsize=13)
+            ax.set_yticks(range(7))
+            ax.set_yticklabels(days)
+            ax.set_xticks(range(24))
+            ax.set_xticklabels([f'{hour:02d}' for hour in range(24)], fontsize=9)
+            ax.set_xlabel('Hour of Day', fontsize=11)
+            fig.colorbar(image, ax=ax, label='Check-ins')
+
+        fig.suptitle(title, fontsize=16)
+        plt.tight_layout()
+
+        # Create timestamp for the filename
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f'occupancy_heatmap_{timestamp}.png'
+
+        # Save to BytesIO object
+        img = io.BytesIO()
+        plt.savefig(img, format='png', dpi=120)
+        img.seek(0)
+        plt.close(fig)
+
+        # Return file
+        return send_file(
+            img,
+            mimetype='image/png',
+            as_attachment=True,
+            download_name=filename
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"Error generating occupancy heatmap: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'message': f'Error generating heatmap: {str(e)}'}), 500
@@ -0,0 +1,239 @@
+import collections
+import datetime
+import itertools
+import os
+import queue
+import threading
+import time
+from flask import current_app
+from models import db
+from models.attendance import Attendance
+from models.student import Student
+
+# Check-ins read per poll query
+POLL_ROWS = 500
+
+class LiveFeed:
+    """
+    In-process publish/subscribe feed of successful check-ins.
+
+    ``publish`` is called by the check-in service once a check-in (kiosk or
+    offline replay) is committed, so live updates cost no database queries.
+    The last ``LIVE_FEED_BUFFER_SIZE`` events are kept in a ring buffer as
+    the snapshot for new subscribers, and every subscriber has its own
+    bounded queue for what follows; one that stops reading is dropped
+    instead of holding the others back.
+
+    The feed only sees check-ins handled by its own worker process. For
+    multi-process deployments, ``LIVE_FEED_POLL_DATABASE`` switches it to a
+    fallback: while anyone is subscribed, one thread per process polls
+    ``attendance`` every ``LIVE_FEED_POLL_SECONDS`` for ids above the last
+    one it has seen (with ``Attendance.changes_after``, so it never moves
+    past an id that can still commit), and ``publish`` is ignored.
+
+    Each subscriber holds a server thread for as long as its stream is
+    open, so ``subscribe`` admits at most ``WEB_THREADS - 1`` of them per
+    process, leaving a thread for kiosk check-ins.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = collections.deque(maxlen=10)
+        self._subscribers = set()
+        self._sequence = itertools.count(1)
+        self._last_id = 0
+        self._poller_pid = None
+        self.published = 0
+        self.polls = 0
+        self.poll_errors = 0
+        self.dropped_subscribers = 0
+
+    def prime(self):
+        """Fill the ring buffer with the latest check-ins of the last 24 hours and catch up to the newest id."""
+        size = current_app.config.get('LIVE_FEED_BUFFER_SIZE', 10)
+        since = datetime.datetime.now() - datetime.timedelta(hours=24)
+
+        last_id = db.session.execute(db.select(db.func.max(Attendance.id))).scalar() or 0
+        rows = db.session.query(Attendance.check_in_time, Student).join(
+            Student, Student.id == Attendance.student_id
+        ).options(
+            *Student.eager(('course',))
+        ).filter(
+            Attendance.check_in_time >= since
+        ).order_by(
+            db.desc(Attendance.check_in_time)
+        ).limit(size).all()
+
+        with self._lock:
+            self._events = collections.deque(maxlen=size)
+            for check_in_time, student in reversed(rows):
+                self._events.append(self._event(feed_view(student), check_in_time))
+            self._last_id = last_id
+
+        current_app.logger.debug(f"Live check-in feed primed with {len(rows)} events")
+
+    def publish(self, student, check_in_time):
+        """
+        Announce a committed check-in to every subscriber.
+
+        Args:
+            student (dict): Kiosk view of the student (see ``roster_cache``)
+            check_in_time (datetime): Time of the check-in
+        """
+        if current_app.config.get('LIVE_FEED_POLL_DATABASE', False):
+            # The poller reads it back from the database
+            return
+        with self._lock:
+            self._publish(self._event(student, check_in_time))
+
+    def max_subscribers(self):
+        """Subscribers allowed per process: the configured limit, leaving one server thread free"""
+        config = current_app.config
+        return max(0, min(config.get('LIVE_FEED_MAX_SUBSCRIBERS', 8), config.get('WEB_THREADS', 8) - 1))
+
+    def subscribe(self):
+        """
+        Register a subscriber, starting this process's poller if polling is on and it is idle.
+
+        Returns:
+            tuple: ``(queue, snapshot)`` where ``snapshot`` is the buffered
+            events, oldest first, or ``(None, None)`` if the subscriber limit
+            has been reached
+        """
+        limit = self.max_subscribers()
+        with self._lock:
+            if len(self._subscribers) >= limit:
+                return None, None
+            subscriber = queue.Queue(maxsize=current_app.config.get('LIVE_FEED_QUEUE_SIZE', 100))
+            self._subscribers.add(subscriber)
+            start_poller = (
+                current_app.config.get('LIVE_FEED_POLL_DATABASE', False)
+                and self._poller_pid != os.getpid()
+            )
+            if start_poller:
+                self._poller_pid = os.getpid()
+
+        if start_poller:
+            try:
+                # Nobody was watching, so the buffer may be behind
+                self.prime()
+            except Exception:
+                with self._lock:
+                    self._subscribers.discard(subscriber)
+                    self._poller_pid = None
+                raise
+            app = current_app._get_current_object()
+            threading.Thread(target=self._run, args=(app,), name='live-feed-poller', daemon=True).start()
+
+        with self._lock:
+            return subscriber, list(self._events)
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'polling': self._poller_pid == os.getpid(),
+                'last_id': self._last_id,
+                'buffered': len(self._events),
+                'published': self.published,
+                'polls': self.polls,
+                'poll_errors': self.poll_errors,
+                'dropped_subscribers': self.dropped_subscribers
+            }
+
+    def _run(self, app):
+        interval = app.config.get('LIVE_FEED_POLL_SECONDS', 1)
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if not self._subscribers:
+                    # The next subscriber starts a new poller
+                    self._poller_pid = None
+                    return
+            try:
+                with app.app_context():
+                    self._poll()
+            except Exception as e:
+                app.logger.error(f"Live check-in feed poll failed: {str(e)}")
+                with self._lock:
+                    self.poll_errors += 1
+
+    def _poll(self):
+        """Publish the settled check-ins above the last seen id"""
+        while True:
+            rows = db.session.execute(
+                Attendance.changes_after(self._last_id, POLL_ROWS, db.engine.dialect.name)
+            ).all()
+            settled = []
+            for row in rows:
+                if not row.settled:
+                    break
+                settled.append(row)
+
+            with self._lock:
+                self.polls += 1
+            if not settled:
+                return
+
+            student_ids = list({row.student_id for row in settled})
+            students = {
+                student.id: feed_view(student)
+                for student in Student.query.options(*Student.eager(('course',))).filter(Student.id.in_(student_ids))
+            }
+            with self._lock:
+                for row in settled:
+                    student = students.get(row.student_id)
+                    # Check-ins of students deleted since are skipped
+                    if student is not None:
+                        self._publish(self._event(student, row.check_in_time))
+                self._last_id = settled[-1].id
+
+            if len(settled) < POLL_ROWS:
+                return
+
+    def _publish(self, event):
+        """Buffer an event and queue it for every subscriber; call with the lock held"""
+        self._events.append(event)
+        self.published += 1
+
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Too far behind; the stream closes and the browser reconnects
+                self._subscribers.discard(subscriber)
+                with subscriber.mutex:
+                    subscriber.queue.clear()
+                subscriber.put_nowait(None)
+                self.dropped_subscribers += 1
+
+    def _event(self, student, check_in_time):
+        course = student.get('course') or {}
+        return {
+            'seq': next(self._sequence),
+            'student': {
+                'id': student['id'],
+                'first_name': student['first_name'],
+                'last_name': student['last_name'],
+                'image': student.get('image'),
+                'course_name': course.get('course_name')
+            },
+            'login_time': check_in_time.isoformat()
+        }
+
+def feed_view(student):
+    """The fields of a ``Student`` the live feed needs, shaped like the kiosk view."""
+    return {
+        'id': student.id,
+        'first_name': student.first_name,
+        'last_name': student.last_name,
+        'image': student.image,
+        'course': {'course_name': student.course.course_name} if student.course else None
+    }
+
+# One feed per worker process
+live_feed = LiveFeed()
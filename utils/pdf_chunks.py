@@ -0,0 +1,189 @@
+"""
+Chunked rendering of the attendance PDF.
+
+One reportlab ``Table`` holding every row gets slower with each page it is
+split across, so the report is cut into per-day sections of page-sized
+tables instead, and the sections into chunks that are rendered as
+separate documents (in a process pool when there are several) and merged
+with pypdf. Rendering work then grows linearly with the number of rows.
+
+This module only imports reportlab, so pool processes start quickly.
+"""
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+
+# Rows per table: about one A4 page, so reportlab rarely has to split a table
+ROWS_PER_TABLE = 30
+# Rows rendered as one document by one process
+ROWS_PER_CHUNK = 3000
+
+TABLE_HEADER = ['Student ID', 'Name', 'Course', 'Date', 'Login Time', 'Day']
+COLUMN_WIDTHS = [0.8*inch, 2.5*inch, 2*inch, 0.9*inch, 0.9*inch, 0.6*inch]
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('TOPPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 8)
+])
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def plan_chunks(sections, rows_per_chunk=ROWS_PER_CHUNK):
+    """
+    Group sections into chunks of at most ``rows_per_chunk`` rows.
+
+    A section larger than a chunk is split, and its later parts are
+    headed "(continued)".
+
+    Args:
+        sections (list): ``(heading, rows)`` pairs in report order
+
+    Returns:
+        list: Chunks, each a list of ``(heading, rows)`` pairs
+    """
+    chunks = [[]]
+    size = 0
+    for heading, rows in sections:
+        for start in range(0, len(rows) or 1, rows_per_chunk):
+            part = rows[start:start + rows_per_chunk]
+            if size and size + len(part) > rows_per_chunk:
+                chunks.append([])
+                size = 0
+            chunks[-1].append((heading if start == 0 else f"{heading} (continued)", part))
+            size += len(part)
+    return [chunk for chunk in chunks if chunk]
+
+def render_chunk(intro, sections):
+    """
+    Render one chunk of sections as a standalone PDF.
+
+    Args:
+        intro (list): ``(style name, text)`` paragraphs opening the chunk
+            (the report title for the first chunk, empty otherwise)
+        sections (list): ``(heading, rows)`` pairs; rows match ``TABLE_HEADER``
+
+    Returns:
+        bytes: The PDF document
+    """
+    styles = getSampleStyleSheet()
+    paragraph_styles = {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            spaceAfter=20,
+            alignment=1  # Center alignment
+        ),
+        'normal': styles['Normal'],
+        'section': styles['Heading3']
+    }
+
+    story = []
+    for style, text in intro:
+        story.append(Paragraph(text, paragraph_styles[style]))
+    if intro:
+        story.append(Spacer(1, 20))
+
+    for heading, rows in sections:
+        story.append(Paragraph(heading, paragraph_styles['section']))
+        for start in range(0, len(rows), ROWS_PER_TABLE):
+            table = Table([TABLE_HEADER, *rows[start:start + ROWS_PER_TABLE]], colWidths=COLUMN_WIDTHS)
+            table.setStyle(TABLE_STYLE)
+            story.append(table)
+        story.append(Spacer(1, 12))
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, leftMargin=0.5*inch, rightMargin=0.5*inch)
+    doc.build(story)
+    return buffer.getvalue()
+
+def _render_chunk_job(job):
+    return render_chunk(*job)
+
+def render_report(output, intro, sections, processes=1):
+    """
+    Render the report into a binary file object.
+
+    Several chunks are rendered in parallel by up to ``processes`` pool
+    processes and merged in order. Without pypdf, or with a single chunk,
+    the report is rendered as one document in this process.
+
+    Args:
+        output: Binary file object
+        intro (list): Opening paragraphs, see ``render_chunk``
+        sections (list): ``(heading, rows)`` pairs in report order
+        processes (int, optional): Pool size; 1 renders in this process
+
+    Returns:
+        int: Number of chunks rendered
+    """
+    chunks = plan_chunks(sections)
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        PdfWriter = None
+
+    if len(chunks) <= 1 or PdfWriter is None:
+        output.write(render_chunk(intro, sections))
+        return 1
+
+    jobs = [(intro if index == 0 else [], chunk) for index, chunk in enumerate(chunks)]
+    if processes > 1:
+        parts = _get_pool(processes).map(_render_chunk_job, jobs)
+    else:
+        parts = map(_render_chunk_job, jobs)
+
+    writer = PdfWriter()
+    try:
+        for part in parts:
+            writer.append(io.BytesIO(part))
+    except BrokenProcessPool:
+        # A pool process died (e.g. killed for memory); start a new pool next time
+        _discard_pool()
+        raise
+    writer.write(output)
+    return len(chunks)
+
+def _get_pool(processes):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Never fork the (multi-threaded) web worker: fork pool processes from
+            # a server process that has preloaded this module. As with any start
+            # method but fork, they also import the main module once, so entry
+            # points keep starting the server under ``if __name__ == '__main__':``
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            if 'forkserver' in methods:
+                context.set_forkserver_preload([__name__])
+            _pool = ProcessPoolExecutor(max_workers=processes, mp_context=context)
+        return _pool
+
+def _discard_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,64 @@
+import importlib
+import os
+import threading
+import time
+
+# Chart and export backends left out of worker start-up, in prewarm order
+BACKENDS = ('matplotlib.pyplot', 'utils.pdf_chunks', 'pypdf')
+
+class BackendPrewarm:
+    """
+    Per-worker background import of the chart and export backends.
+
+    matplotlib and reportlab are imported where they are used, so a worker
+    boots without them. With ``PREWARM_BACKENDS`` on, the first request a
+    worker serves starts a daemon thread that imports them, so the first
+    chart or PDF does not wait for the import either. It starts on a
+    request rather than at import time so that preforking servers (uwsgi,
+    gunicorn ``--preload``) never fork while a thread holds an import lock.
+    """
+
+    def __init__(self, modules=BACKENDS):
+        self.modules = modules
+        self._lock = threading.Lock()
+        self._pid = None
+        self.seconds = {}
+        self.failed = {}
+
+    def init_app(self, app):
+        if app.config.get('PREWARM_BACKENDS', True):
+            app.before_request(lambda: self.start(app))
+
+    def start(self, app):
+        """Start the prewarm thread unless it already ran in this process"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._run, args=(app,), name='backend-prewarm', daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'started': self._pid == os.getpid(),
+                'seconds': dict(self.seconds),
+                'failed': dict(self.failed)
+            }
+
+    def _run(self, app):
+        for name in self.modules:
+            started = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                # Optional or broken backends fail again, with the real error, on use
+                app.logger.warning(f"Could not prewarm {name}: {str(e)}")
+                with self._lock:
+                    self.failed[name] = str(e)
+                continue
+            with self._lock:
+                self.seconds[name] = round(time.perf_counter() - started, 3)
+        app.logger.info(f"Prewarmed backends in {sum(self.seconds.values()):.2f}s")
+
+# One per worker process
+backend_prewarm = BackendPrewarm()
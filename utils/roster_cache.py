@@ -0,0 +1,85 @@
+import copy
+import threading
+import time
+from flask import current_app
+from sqlalchemy.orm import joinedload
+from models.student import Student
+
+# Relations included in the kiosk view
+KIOSK_RELATIONS = ('course', 'location')
+
+class RosterCache:
+    """
+    Per-worker cache of the kiosk view of each student, keyed by student ID.
+
+    Entries are the pre-serialized dictionaries returned to the kiosk, so a
+    cache hit needs no database access at all. Callers get their own copy
+    of an entry, so changing it cannot leak into later lookups or other
+    threads. Entries expire after ``ROSTER_CACHE_TTL`` seconds so edits made
+    through another worker process are eventually picked up as well.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, student_id):
+        """Return a copy of the kiosk view for a student, loading it on a miss."""
+        student_id = str(student_id).strip()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+
+        view = self._load(student_id)
+        if view is not None:
+            ttl = current_app.config.get('ROSTER_CACHE_TTL', 300)
+            with self._lock:
+                self._entries[student_id] = (now + ttl, view)
+        return copy.deepcopy(view)
+
+    def invalidate(self, student_id=None):
+        """Drop one student from the cache, or everyone if no ID is given."""
+        with self._lock:
+            if student_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(student_id).strip(), None)
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+    @staticmethod
+    def _load(student_id):
+        # Course and location are loaded in the same SELECT as the student
+        student = Student.query.options(
+            joinedload(Student.course),
+            joinedload(Student.location)
+        ).filter_by(id=student_id).first()
+
+        if not student:
+            return None
+        return kiosk_view(student)
+
+def kiosk_view(student):
+    """Compact serialization of a student for the check-in kiosk."""
+    return student.to_dict(KIOSK_RELATIONS)
+
+# One cache per worker process
+roster_cache = RosterCache()
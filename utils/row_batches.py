@@ -0,0 +1,60 @@
+"""
+Large query results read in batches without blocking check-ins.
+
+On PostgreSQL an open server-side cursor (``yield_per``) does not block
+writers, so batches are fetched while the caller consumes them. SQLite
+(without WAL, as configured by default) holds its database read lock for
+as long as a statement is open, so a download streamed from a live cursor
+would make every kiosk check-in fail with "database is locked". There the
+rows are first copied into a temporary file in batches and the cursor is
+closed before the first batch is returned.
+"""
+import pickle
+import tempfile
+from models import db
+
+def iter_row_batches(statement, chunk_rows):
+    """
+    Rows of ``statement`` in lists of at most ``chunk_rows`` tuples.
+
+    The statement runs before this returns, so query errors surface to the
+    caller; on SQLite all rows have also been read by then.
+
+    Args:
+        statement: Select to execute in the current session
+        chunk_rows (int): Rows per batch
+
+    Returns:
+        generator: Lists of row tuples in query order
+    """
+    result = db.session.execute(statement.execution_options(yield_per=chunk_rows))
+
+    if db.engine.dialect.name != 'sqlite':
+        def generate():
+            try:
+                for partition in result.partitions():
+                    yield [tuple(row) for row in partition]
+            finally:
+                result.close()
+        return generate()
+
+    spool = tempfile.TemporaryFile()
+    try:
+        for partition in result.partitions():
+            pickle.dump([tuple(row) for row in partition], spool, protocol=pickle.HIGHEST_PROTOCOL)
+        spool.seek(0)
+    except Exception:
+        spool.close()
+        raise
+    finally:
+        result.close()
+
+    def replay():
+        with spool:
+            while True:
+                try:
+                    yield pickle.load(spool)
+                except EOFError:
+                    return
+
+    return replay()
@@ -0,0 +1,142 @@
+"""
+Time bucketing for attendance aggregations.
+
+Buckets are built from the date parts stored with each check-in
+(``attendance_day``/``check_in_date``, ``dow`` and ``hour``) instead of
+wrapping ``check_in_time`` in SQL functions, so range filters and
+groupings can use ``ix_attendance_day_dow_hour`` on both SQLite and
+PostgreSQL. Weeks start on Sunday, like the dashboard charts.
+"""
+import datetime
+from models import db
+from models.attendance import Attendance
+
+BUCKETS = ('hour', 'day', 'weekday', 'week', 'month')
+
+def day_range(start, end):
+    """
+    Range predicates for whole days between ``start`` and ``end`` (inclusive).
+
+    Args:
+        start: date or datetime; the time of day is ignored
+        end: date or datetime; the time of day is ignored
+
+    Returns:
+        list: Filter clauses on ``Attendance.check_in_date``
+    """
+    return [
+        Attendance.check_in_date >= _as_date(start),
+        Attendance.check_in_date <= _as_date(end)
+    ]
+
+def bucket_expression(bucket, day=None, dialect_name=None):
+    """
+    SQL expression that groups rows into ``bucket``.
+
+    ``hour``, ``day`` and ``weekday`` are the stored attendance columns;
+    ``week`` (the Sunday that starts it) and ``month`` (its first day) are
+    derived from the day with the dialect's date arithmetic. Other tables
+    with a date column, such as the rollups, pass it as ``day``; they have
+    no ``hour``.
+
+    Args:
+        bucket (str): One of ``BUCKETS``
+        day (optional): Date column to bucket; defaults to
+            ``Attendance.check_in_date``
+        dialect_name (str, optional): Defaults to ``db.engine.dialect.name``
+
+    Returns:
+        Column expression; normalize its values with ``bucket_key``
+
+    Raises:
+        ValueError: For an unknown bucket, or ``hour`` of another table
+    """
+    dialect_name = dialect_name or db.engine.dialect.name
+    on_attendance = day is None
+    if on_attendance:
+        day = Attendance.check_in_date
+
+    if bucket == 'hour':
+        if not on_attendance:
+            raise ValueError('Hour buckets need attendance.hour')
+        return Attendance.hour
+    if bucket == 'day':
+        return day
+    # The stored weekday where there is one, otherwise computed from the day
+    weekday = Attendance.dow if on_attendance else weekday_of(day, dialect_name)
+    if bucket == 'weekday':
+        return weekday
+    if bucket == 'week':
+        # Step back weekday days to the Sunday that starts the week
+        if dialect_name == 'postgresql':
+            return day - weekday
+        if dialect_name == 'sqlite':
+            return db.func.date(day, '-' + db.cast(weekday, db.String) + ' days')
+        raise NotImplementedError(f"Week buckets are not supported on {dialect_name}")
+    if bucket == 'month':
+        if dialect_name == 'postgresql':
+            # Inlined, so SELECT and GROUP BY render the same expression
+            return db.cast(db.func.date_trunc(db.literal_column("'month'"), day), db.Date)
+        if dialect_name == 'sqlite':
+            return db.func.strftime('%Y-%m-01', day)
+        raise NotImplementedError(f"Month buckets are not supported on {dialect_name}")
+    raise ValueError(f"Unknown time bucket: {bucket}")
+
+def bucket_key(bucket, value):
+    """Normalize a bucket value from any dialect: int for hour/weekday, date otherwise"""
+    if value is None:
+        return None
+    if bucket in ('hour', 'weekday'):
+        return int(value)
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, str):
+        # SQLite returns date arithmetic as ISO strings
+        return datetime.date.fromisoformat(value[:10])
+    return value
+
+def count_by(bucket, start, end, *filters):
+    """
+    Count check-ins per bucket over a whole-day range.
+
+    Args:
+        bucket (str): One of ``BUCKETS``
+        start: First day (date or datetime)
+        end: Last day (date or datetime)
+        *filters: Extra filter clauses on ``Attendance``
+
+    Returns:
+        dict: Bucket key to number of check-ins
+    """
+    expression = bucket_expression(bucket).label(bucket)
+    rows = db.session.query(
+        expression,
+        db.func.count(Attendance.id)
+    ).filter(
+        *day_range(start, end),
+        *filters
+    ).group_by(
+        expression
+    ).all()
+    return {bucket_key(bucket, value): count for value, count in rows}
+
+def weekday_of(timestamp, dialect_name=None):
+    """SQL weekday (0=Sunday) of a date or timestamp column; used to backfill ``dow``"""
+    dialect_name = dialect_name or db.engine.dialect.name
+    if dialect_name == 'postgresql':
+        return db.cast(db.extract('dow', timestamp), db.SmallInteger)
+    if dialect_name == 'sqlite':
+        return db.cast(db.func.strftime('%w', timestamp), db.SmallInteger)
+    raise NotImplementedError(f"Weekday extraction is not supported on {dialect_name}")
+
+def hour_of(timestamp, dialect_name=None):
+    """SQL hour of a timestamp column; used to backfill ``hour``"""
+    dialect_name = dialect_name or db.engine.dialect.name
+    if dialect_name == 'postgresql':
+        return db.cast(db.extract('hour', timestamp), db.SmallInteger)
+    if dialect_name == 'sqlite':
+        return db.cast(db.func.strftime('%H', timestamp), db.SmallInteger)
+    raise NotImplementedError(f"Hour extraction is not supported on {dialect_name}")
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime.datetime) else value
@@ -5,5 +5,6 @@ if __name__ == "__main__":
     # Get config from Flask app
     port = app.config['PORT']
     host = app.config['HOST']
-    print(f"Starting Waitress server on {host}:{port}...")
-    serve(app, host=host, port=port)
+    threads = app.config['WEB_THREADS']
+    print(f"Starting Waitress server on {host}:{port} with {threads} threads...")
+    serve(app, host=host, port=port, threads=threads)